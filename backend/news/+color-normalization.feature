@@ -0,0 +1 @@
+Parse colors with one shared parser, store them in canonical form and add `color-schema/validate` to validate and normalize a whole schema in one request.
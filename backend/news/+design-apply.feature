@@ -0,0 +1 @@
+Add the @design-apply endpoint and design_apply script to set or clear design fields on a whole subtree in resumable batches.
@@ -0,0 +1 @@
+Index the view type, overridden design fields and effective colors of content, with the effective design values as catalog metadata.
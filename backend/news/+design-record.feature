@@ -0,0 +1 @@
+Store the design schema fields of content in a small annotation record instead of on the content object, with an upgrade step moving existing values.
@@ -0,0 +1 @@
+List the effective design values of pages in summaries with metadata_fields=design_schema, from the catalog only.
@@ -0,0 +1 @@
+Store identical design values once per site and share them between pages.
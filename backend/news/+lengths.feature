@@ -0,0 +1 @@
+Parse CSS lengths of the design schema, color schema and theming when saved, reject invalid ones and return the parsed form.
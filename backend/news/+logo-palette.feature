@@ -0,0 +1 @@
+Add `@logo-palette`, suggesting a color schema out of the dominant colors of the logo, computed in the background when the logo is saved.
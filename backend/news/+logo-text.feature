@@ -0,0 +1 @@
+Render the logo text to sanitized HTML and plain text when it is saved and return it with the inherited design.
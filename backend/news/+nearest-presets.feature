@@ -0,0 +1 @@
+Add `color-schema/nearest` to find the presets closest to a set of brand colors by CIEDE2000 or OKLab distance.
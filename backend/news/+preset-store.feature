@@ -0,0 +1 @@
+Add a shared, indexed preset store used by the `color-schema` and `@design-schema` services, with category/tag facets, paging and ETags.
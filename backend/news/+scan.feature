@@ -0,0 +1 @@
+Scan the content of a site in parallel worker threads with pluggable visitors, with design consistency, contrast and storage audits.
@@ -0,0 +1 @@
+Store each custom section as its own persistent object in an OOBTree instead of one registry record, with an upgrade step migrating existing sections.
@@ -0,0 +1 @@
+Add a library `version` and `@custom-sections?since=<version>` returning only the sections added and removed since then.
@@ -0,0 +1 @@
+Store large custom section block data compressed and serve it as is from `@custom-sections/<id>/data` to clients accepting the deflate encoding.
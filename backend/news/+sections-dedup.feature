@@ -0,0 +1 @@
+Store large blocks of custom sections once per library, shared by all sections using them.
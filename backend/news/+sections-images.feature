@@ -0,0 +1 @@
+Store base64 images embedded in custom sections as blobs, served from `@custom-sections-images/<hash>` with immutable caching.
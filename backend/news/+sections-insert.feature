@@ -0,0 +1 @@
+Insert custom sections into pages on the server with `POST <page>/@custom-sections/<id>/insert`.
@@ -0,0 +1 @@
+Add batching, `category`/`created_by` filters, a `summary` mode without block data and `@custom-sections/<id>` to `@custom-sections`, with category counts kept up to date on write.
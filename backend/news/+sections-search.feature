@@ -0,0 +1 @@
+Search custom sections by name, description, category and block text with `@custom-sections?q=`.
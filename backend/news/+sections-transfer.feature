@@ -0,0 +1 @@
+Add streaming NDJSON export and import of custom section libraries, as `@custom-sections-export`/`@custom-sections-import` and a zconsole script.
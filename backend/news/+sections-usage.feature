@@ -0,0 +1 @@
+Tag blocks inserted from custom sections, index the sections each page uses and list them with `@custom-sections/<id>/usage`.
@@ -0,0 +1 @@
+Resolve the internal links of the inherited header tools to their URLs in one lookup, flagging broken ones.
@@ -0,0 +1 @@
+Run the content migrations of the upgrade steps in resumable, throttled batches.
@@ -0,0 +1 @@
+Limit writes to the lunasites endpoints per user and per site with token buckets, answering 429 with `Retry-After`, and expose the counters at `@write-limits`.
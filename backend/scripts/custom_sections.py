@@ -0,0 +1,74 @@
+"""Export or import the custom sections of a site as NDJSON.
+
+    SECTIONS_ACTION=export SECTIONS_FILE=sections.ndjson \
+        zconsole run instance/etc/zope.conf scripts/custom_sections.py
+
+    SECTIONS_ACTION=import SECTIONS_FILE=sections.ndjson SECTIONS_POLICY=rename \
+        zconsole run instance/etc/zope.conf scripts/custom_sections.py
+
+Imports commit after every batch of sections, so an interrupted import
+can be run again with the skip policy.
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from lunasites.sections.storage import get_library
+from lunasites.sections.transfer import export_sections
+from lunasites.sections.transfer import import_sections
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+
+import os
+import sys
+import transaction
+
+
+truthy = frozenset(("t", "true", "y", "yes", "on", "1"))
+
+SITE_ID = os.getenv("SITE_ID", "Plone")
+ACTION = os.getenv("SECTIONS_ACTION", "export")
+FILENAME = os.getenv("SECTIONS_FILE", "custom-sections.ndjson")
+POLICY = os.getenv("SECTIONS_POLICY", "skip")
+NEW_IDS = os.getenv("SECTIONS_NEW_IDS", "").lower() in truthy
+
+app = makerequest(globals()["app"])
+
+admin = app.acl_users.getUserById("admin")
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+
+
+def report_progress(report):
+    print(
+        "{created} created, {overwritten} overwritten, {renamed} renamed, "
+        "{skipped} skipped, {errors} invalid".format(
+            **dict(report, errors=len(report["errors"]))
+        ),
+        file=sys.stderr,
+    )
+
+
+if ACTION == "export":
+    count = 0
+    with open(FILENAME, "wb") as output:
+        for line in export_sections(get_library(site)):
+            output.write(line)
+            count += 1
+    print(f"Exported {count} sections to {FILENAME}", file=sys.stderr)
+elif ACTION == "import":
+    with open(FILENAME, "rb") as source:
+        report = import_sections(
+            get_library(site, create=True),
+            source,
+            policy=POLICY,
+            new_ids=NEW_IDS,
+            commit=True,
+            progress=report_progress,
+        )
+    transaction.commit()
+    for error in report["errors"]:
+        print(f"Line {error['line']}: {error['error']}", file=sys.stderr)
+else:
+    sys.exit(f"Unknown SECTIONS_ACTION {ACTION!r}, use export or import")
@@ -0,0 +1,76 @@
+"""Set or clear design fields on all content of a subtree.
+
+    DESIGN_PATCH='{"color_schema": {"primary_color": "#094ce1"}}' \
+    DESIGN_PATH=customers/acme DESIGN_PORTAL_TYPES=Document \
+        zconsole run instance/etc/zope.conf scripts/design_apply.py
+
+DESIGN_DEPTH limits the levels below DESIGN_PATH, DESIGN_ONLY_OVERRIDES=1
+changes only objects setting one of the patched fields, DESIGN_BATCH_SIZE
+sets the number of objects per commit. After a failure, run the script
+again with DESIGN_RESUME=1 to go on after the last committed batch.
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from lunasites.design_apply import apply_design
+from lunasites.design_apply import BATCH_SIZE
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+
+import json
+import os
+import sys
+import transaction
+
+
+truthy = frozenset(("t", "true", "y", "yes", "on", "1"))
+
+SITE_ID = os.getenv("SITE_ID", "Plone")
+PATH = os.getenv("DESIGN_PATH", "")
+PATCH = os.getenv("DESIGN_PATCH", "")
+PORTAL_TYPES = [
+    name for name in os.getenv("DESIGN_PORTAL_TYPES", "").split(",") if name
+]
+DEPTH = os.getenv("DESIGN_DEPTH")
+ONLY_OVERRIDES = os.getenv("DESIGN_ONLY_OVERRIDES", "").lower() in truthy
+BATCH = int(os.getenv("DESIGN_BATCH_SIZE") or BATCH_SIZE)
+RESUME = os.getenv("DESIGN_RESUME", "").lower() in truthy
+
+app = makerequest(globals()["app"])
+
+admin = app.acl_users.getUserById("admin")
+admin = admin.__of__(app.acl_users)
+newSecurityManager(None, admin)
+
+site = app[SITE_ID]
+setSite(site)
+
+
+def report_progress(report):
+    print(
+        "{processed}/{total} objects, {changed} changed, "
+        "{unchanged} unchanged".format(**report),
+        file=sys.stderr,
+    )
+
+
+try:
+    patch = json.loads(PATCH)
+except ValueError:
+    sys.exit("DESIGN_PATCH must be a JSON object of design fields")
+context = site.unrestrictedTraverse(PATH.strip("/")) if PATH.strip("/") else site
+
+try:
+    apply_design(
+        context,
+        patch,
+        portal_types=PORTAL_TYPES,
+        depth=int(DEPTH) if DEPTH else None,
+        only_overrides=ONLY_OVERRIDES,
+        resume=RESUME,
+        batch_size=BATCH,
+        commit=True,
+        progress=report_progress,
+    )
+except ValueError as error:
+    sys.exit(str(error))
+transaction.commit()
@@ -0,0 +1,44 @@
+"""Scan the content of a site in parallel with a scan visitor.
+
+    SCAN_VISITOR=contrast SCAN_WORKERS=8 SCAN_FILE=contrast.ndjson \
+        zconsole run instance/etc/zope.conf scripts/scan.py
+
+The visitors are the named IScanVisitor utilities: design-consistency,
+contrast and design-storage come with lunasites. Results are written as
+NDJSON, to standard output without SCAN_FILE.
+"""
+
+from contextlib import nullcontext
+from lunasites.interfaces import IScanVisitor
+from lunasites.scan.scanner import scan
+from lunasites.scan.scanner import WORKERS
+from Testing.makerequest import makerequest
+from zope.component import getUtilitiesFor
+from zope.component import queryUtility
+from zope.component.hooks import setSite
+
+import json
+import os
+import sys
+
+
+SITE_ID = os.getenv("SITE_ID", "Plone")
+VISITOR = os.getenv("SCAN_VISITOR", "design-consistency")
+WORKER_COUNT = int(os.getenv("SCAN_WORKERS") or WORKERS)
+FILENAME = os.getenv("SCAN_FILE")
+
+app = makerequest(globals()["app"])
+site = app[SITE_ID]
+setSite(site)
+
+visitor = queryUtility(IScanVisitor, name=VISITOR)
+if visitor is None:
+    names = ", ".join(sorted(name for name, _ in getUtilitiesFor(IScanVisitor)))
+    sys.exit(f"Unknown SCAN_VISITOR {VISITOR!r}, use one of {names}")
+
+count = 0
+with open(FILENAME, "w") if FILENAME else nullcontext(sys.stdout) as output:
+    for result in scan(site, visitor, workers=WORKER_COUNT):
+        output.write(json.dumps(result) + "\n")
+        count += 1
+print(f"{count} results", file=sys.stderr)
@@ -6,15 +6,43 @@ from zope import schema
 from plone.schema import JSONField
 import json
 from zope.component import adapter
-from zope.interface import implementer, provider
+from zope.interface import implementer, Interface, provider
+from zope.annotation.interfaces import IAnnotations
+from zope.schema import getFieldNamesInOrder
+from zope.schema import ValidationError
+from Acquisition import aq_base
+from persistent import Persistent
 from plone.namedfile.field import NamedBlobImage
 from eea.schema.slate.field import SlateJSONField
 
 from lunasites import _
+from lunasites.colors import normalize_color_schema
+from lunasites.design_values import get_value_store
+from lunasites.design_values import SHARED_FIELDS
+from lunasites.design_values import SharedValue
+from lunasites.design_values import value_key
+from lunasites.lengths import is_valid_length
+from lunasites.lengths import parse_length
+from lunasites.slate import render_slate
 
 
 OBJECT_LIST_DEFAULT_VALUE = []
 
+
+class InvalidColorSchema(ValidationError):
+    __doc__ = _("Invalid color schema")
+
+    def doc(self):
+        return ", ".join(self.args[0].values())
+
+
+def is_valid_color_schema(value):
+    """Constraint of the color schema: all colors and lengths valid."""
+    _normalized, errors, _display = normalize_color_schema(value)
+    if errors:
+        raise InvalidColorSchema(errors)
+    return True
+
 OBJECT_LIST = json.dumps({
     "type": "array",
     "items": {
@@ -51,6 +79,7 @@ class IDesignSchema(model.Schema):
         required=False,
         missing_value={},
         default={},
+        constraint=is_valid_color_schema,
     )
     
     logo_image = NamedBlobImage(
@@ -94,12 +123,14 @@ class IDesignSchema(model.Schema):
         title=_('Navbar Width'),
         description=_('Width value (e.g., 1200px, 100%, 90vw). Leave empty to inherit from parent.'),
         required=False,
+        constraint=is_valid_length,
     )
     
     container_width = schema.TextLine(
         title=_('Container Width'),
         description=_('Width value (e.g., 1000px, 90%, 80vw). Leave empty to inherit from parent.'),
         required=False,
+        constraint=is_valid_length,
     )
     
     tools_header = JSONField(
@@ -127,99 +158,286 @@ class IDesignSchema(model.Schema):
     
 
 
-@implementer(IDesignSchema)
-@adapter(IDexterityContent)
-class DesignSchemaBehavior:
-    """Adapter for design schema behavior"""
+class IDesignSchemaMarker(Interface):
+    """Marker for content with the design schema behavior"""
 
-    def __init__(self, context):
-        self.context = context
 
-    @property
-    def color_schema(self):
-        return getattr(self.context, 'color_schema', {})
+# Annotation holding the DesignRecord of a content object
+ANNOTATION_KEY = "lunasites.design_schema"
 
-    @color_schema.setter
-    def color_schema(self, value):
-        self.context.color_schema = value or {}
-    
-    @property
-    def tools_header(self):
-        return getattr(self.context, 'tools_header', [])
+# Fields stored on the content object itself: image downloads and scales
+# look the image up as an attribute, and the image is its own persistent
+# record anyway
+CONTENT_FIELDS = ("logo_image",)
 
-    @tools_header.setter
-    def tools_header(self, value):
-        self.context.tools_header = value or []
-    
-    @property
-    def navbar_width(self):
-        return getattr(self.context, 'navbar_width', None)
+# Fields holding a CSS length, stored parsed as well
+LENGTH_FIELDS = ("navbar_width", "container_width")
 
-    @navbar_width.setter
-    def navbar_width(self, value):
-        self.context.navbar_width = value
+# Slate fields, stored rendered to HTML and plain text as well
+RENDERED_FIELDS = ("logo_text",)
 
-    @property
-    def container_width(self):
-        return getattr(self.context, 'container_width', None)
+_marker = object()
 
-    @container_width.setter
-    def container_width(self, value):
-        self.context.container_width = value
-    
-    @property
-    def view_type(self):
-        return getattr(self.context, 'view_type', None)
 
-    @view_type.setter
-    def view_type(self, value):
-        self.context.view_type = value
-    
-    @property
-    def hide_login_button(self):
-        return getattr(self.context, 'hide_login_button', False)
+class DesignRecord(Persistent):
+    """The design values of a content object, only the ones set.
 
-    @hide_login_button.setter
-    def hide_login_button(self, value):
-        self.context.hide_login_button = value
-    
-    @property
-    def hide_search_button(self):
-        return getattr(self.context, 'hide_search_button', False)
+    Kept in an annotation so that design edits write this small record
+    instead of the whole content object.
+    """
 
-    @hide_search_button.setter
-    def hide_search_button(self, value):
-        self.context.hide_search_button = value
-    
-    @property
-    def logo_text_bold(self):
-        return getattr(self.context, 'logo_text_bold', False)
+    # Field name -> parsed form of the length of the LENGTH_FIELDS
+    lengths = None
+
+    # Field name -> HTML and plain text of the RENDERED_FIELDS
+    rendered = None
+
+    # Color schema key -> color as typed, for colors not typed in hex
+    display = None
+
+
+def record_fields():
+    """Return the names of the fields stored in the design record."""
+    return [
+        name
+        for name in getFieldNamesInOrder(IDesignSchema)
+        if name not in CONTENT_FIELDS
+    ]
+
+
+def get_design_record(context, create=False):
+    annotations = IAnnotations(aq_base(context))
+    record = annotations.get(ANNOTATION_KEY)
+    if record is None and create:
+        record = annotations[ANNOTATION_KEY] = DesignRecord()
+    return record
+
+
+def get_design_value(context, name, default=None):
+    """Return the value of a design field of a content object.
+
+    Falls back to the attribute of objects not migrated to the design
+    record yet.
+    """
+    base = aq_base(context)
+    if name in CONTENT_FIELDS:
+        return getattr(base, name, default)
+    record = get_design_record(base)
+    if record is not None:
+        value = getattr(record, name, _marker)
+        if isinstance(value, SharedValue):
+            return value.get()
+        if value is not _marker:
+            return value
+    if isinstance(base, Persistent):
+        base._p_activate()
+    return vars(base).get(name, default)
+
+
+def set_design_value(context, name, value):
+    """Set the value of a design field of a content object.
+
+    Values of the SHARED_FIELDS are stored in the design value store of
+    the site and shared with the objects having the same value.
+    """
+    base = aq_base(context)
+    # Tells the modified event handlers to reindex the descendants
+    base._v_design_changed = True
+    if name in CONTENT_FIELDS:
+        setattr(base, name, value)
+        return
+    record = get_design_record(base, create=True)
+    current = getattr(record, name, None)
+    value = _coerce(record, name, value)
+    if name in SHARED_FIELDS and value:
+        if isinstance(current, SharedValue) and current.key == value_key(value):
+            store = get_value_store()
+            if store is not None and store.is_shared(current):
+                return
+        value = get_value_store(create=True).intern(value)
+    if isinstance(current, SharedValue):
+        store = get_value_store()
+        if store is not None:
+            store.release(current)
+    setattr(record, name, value)
+    if name in vars(base):
+        delattr(base, name)
+
+
+def _coerce(record, name, value):
+    """Return a value in its stored form, updating the values derived from it.
+
+    Colors are stored canonical, lengths parsed and rich text rendered.
+    """
+    if name == "color_schema" and isinstance(value, dict):
+        value, display = canonical_colors(value)
+        record.display = display or None
+    if name in LENGTH_FIELDS:
+        lengths = dict(record.lengths or {})
+        lengths[name] = parse_length(value)
+        record.lengths = lengths
+    if name in RENDERED_FIELDS:
+        rendered = dict(record.rendered or {})
+        rendered[name] = render_slate(value)
+        record.rendered = rendered
+    return value
+
+
+def canonical_colors(schema):
+    """Return the canonical form of a color schema and the colors as typed.
+
+    Invalid values, rejected by the field constraint, are kept as they are.
+    """
+    normalized, errors, display = normalize_color_schema(schema)
+    for key in errors:
+        normalized[key] = schema[key]
+    return normalized, display
+
+
+def get_color_display(context):
+    """Return the colors of the color schema as they were typed."""
+    record = get_design_record(context)
+    return dict(record.display or {}) if record is not None else {}
+
+
+def get_design_length(context, name):
+    """Return the parsed form of a length field, None if empty or invalid."""
+    record = get_design_record(context)
+    if record is not None and name in (record.lengths or {}):
+        return record.lengths[name]
+    # Set before lengths were parsed on save
+    return parse_length(get_design_value(context, name))
+
+
+def get_rendered_value(context, name):
+    """Return the HTML and plain text of a Slate field, None if empty."""
+    record = get_design_record(context)
+    if record is not None and name in (record.rendered or {}):
+        return record.rendered[name]
+    # Set before Slate fields were rendered on save
+    return render_slate(get_design_value(context, name))
+
+
+def get_shared_value(context, name):
+    """Return the SharedValue of a design field, None if not shared."""
+    record = get_design_record(context)
+    value = getattr(record, name, None)
+    return value if isinstance(value, SharedValue) else None
+
+
+def same_design_value(context, other, name):
+    """Return whether two content objects have the same value of a field.
+
+    Shared values are compared by identity, other values by equality.
+    """
+    shared = get_shared_value(context, name)
+    if shared is not None and shared is get_shared_value(other, name):
+        return True
+    return get_design_value(context, name) == get_design_value(other, name)
+
+
+def share_design_values(context):
+    """Share the design values of an object stored only on the object.
+
+    Values set before values were shared, and values of copied objects,
+    which got their own copy of the shared value, are stored (or found)
+    in the design value store. Returns whether anything changed.
+    """
+    record = get_design_record(context)
+    if record is None:
+        return False
+    store = get_value_store()
+    changed = False
+    for name in SHARED_FIELDS:
+        value = getattr(record, name, None)
+        if not value:
+            continue
+        if isinstance(value, SharedValue):
+            if store is not None and store.is_shared(value):
+                continue
+            value = value.get()
+        store = get_value_store(create=True)
+        setattr(record, name, store.intern(value))
+        changed = True
+    return changed
+
+
+def release_design_values(context):
+    """Drop the references of a removed object to shared values."""
+    record = get_design_record(context)
+    store = get_value_store()
+    if record is None or store is None:
+        return
+    for name in SHARED_FIELDS:
+        value = getattr(record, name, None)
+        if isinstance(value, SharedValue):
+            store.release(value)
+
+
+def move_design_fields(context):
+    """Move design values stored as attributes into the design record.
+
+    Returns whether anything was moved.
+    """
+    base = aq_base(context)
+    if isinstance(base, Persistent):
+        base._p_activate()
+    names = [name for name in record_fields() if name in vars(base)]
+    if not names:
+        return False
+    for name in names:
+        set_design_value(base, name, vars(base)[name])
+    return True
+
+
+class DesignField:
+    """A field of the design schema adapter, stored in the design record"""
+
+    def __init__(self, name, default=None, factory=None):
+        self.name = name
+        self.default = default
+        # Makes a new default value for every access, also stored for
+        # empty values, so no two objects share a mutable default
+        self.factory = factory
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        default = self.default if self.factory is None else self.factory()
+        return get_design_value(instance.context, self.name, default)
+
+    def __set__(self, instance, value):
+        if self.factory is not None:
+            value = value or self.factory()
+        set_design_value(instance.context, self.name, value)
+
+
+@implementer(IDesignSchema)
+@adapter(IDexterityContent)
+class DesignSchemaBehavior:
+    """Adapter for design schema behavior"""
+
+    def __init__(self, context):
+        self.context = context
+
+    color_schema = DesignField("color_schema", factory=dict)
+    tools_header = DesignField("tools_header", factory=list)
+    navbar_width = DesignField("navbar_width")
+    container_width = DesignField("container_width")
+    view_type = DesignField("view_type")
+    hide_login_button = DesignField("hide_login_button", default=False)
+    hide_search_button = DesignField("hide_search_button", default=False)
+    logo_text = DesignField("logo_text")
+    logo_text_bold = DesignField("logo_text_bold", default=False)
+    logo_image = DesignField("logo_image")
 
-    @logo_text_bold.setter
-    def logo_text_bold(self, value):
-        self.context.logo_text_bold = value
-    
     def get_width_type(self, width_value):
         """Auto-detect width type based on value format"""
         if not width_value:
             return None
-        
-        width_str = str(width_value).strip().lower()
-        
-        # Check for relative units
-        if any(unit in width_str for unit in ['%', 'vw', 'vh', 'vmin', 'vmax', 'em', 'rem']):
-            return 'relative'
-        
-        # Check for fixed units (px, pt, cm, mm, in, etc.)
-        if any(unit in width_str for unit in ['px', 'pt', 'cm', 'mm', 'in', 'pc']):
-            return 'fixed'
-        
-        # If no unit specified, assume pixels (fixed)
-        if width_str.replace('.', '').isdigit():
-            return 'fixed'
-        
-        # Default to relative for unrecognized formats
-        return 'relative'
+        parsed = parse_length(str(width_value))
+        # Default to relative for keywords and unrecognized formats
+        return (parsed and parsed["type"]) or "relative"
     
     def get_navbar_width_type(self):
         """Get navbar width type based on value"""
@@ -0,0 +1,380 @@
+"""Color parsing and perceptual color space helpers.
+
+`parse_color` is the one parser for CSS color values used by all lunasites
+services. It normalizes a value to its canonical form: ``#rrggbb`` (or
+``#rrggbbaa`` when not opaque) for actual colors, lowercase keywords and
+whitespace-normalized gradients.
+
+The conversions work on NumPy arrays of sRGB values in the 0..1 range with
+the channels on the last axis, so whole preset collections are converted and
+compared in one vectorized call.
+"""
+
+from functools import lru_cache
+from lunasites.lengths import parse_length
+
+import colorsys
+import numpy as np
+import re
+
+
+# sRGB (D65) to CIE XYZ
+_RGB_TO_XYZ = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]
+)
+_D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+# Linear sRGB to LMS and LMS' to OKLab, see https://bottosson.github.io/posts/oklab/
+_RGB_TO_LMS = np.array(
+    [
+        [0.4122214708, 0.5363325363, 0.0514459929],
+        [0.2119034982, 0.6806995451, 0.1073969566],
+        [0.0883024619, 0.2817188376, 0.6299787005],
+    ]
+)
+_LMS_TO_OKLAB = np.array(
+    [
+        [0.2104542553, 0.7936177850, -0.0040720468],
+        [1.9779984951, -2.4285922050, 0.4505937099],
+        [0.0259040371, 0.7827717662, -0.8086757660],
+    ]
+)
+
+METRICS = ("ciede2000", "oklab")
+
+# Values which are valid but no actual color
+KEYWORDS = frozenset(("transparent", "currentcolor", "inherit", "initial", "unset"))
+
+# Keys of a color schema which hold CSS lengths
+LENGTH_FIELDS = frozenset(("toolbar_border_thickness",))
+
+# fmt: off
+NAMED_COLORS = {
+    "aliceblue": "#f0f8ff", "antiquewhite": "#faebd7", "aqua": "#00ffff",
+    "aquamarine": "#7fffd4", "azure": "#f0ffff", "beige": "#f5f5dc",
+    "bisque": "#ffe4c4", "black": "#000000", "blanchedalmond": "#ffebcd",
+    "blue": "#0000ff", "blueviolet": "#8a2be2", "brown": "#a52a2a",
+    "burlywood": "#deb887", "cadetblue": "#5f9ea0", "chartreuse": "#7fff00",
+    "chocolate": "#d2691e", "coral": "#ff7f50", "cornflowerblue": "#6495ed",
+    "cornsilk": "#fff8dc", "crimson": "#dc143c", "cyan": "#00ffff",
+    "darkblue": "#00008b", "darkcyan": "#008b8b", "darkgoldenrod": "#b8860b",
+    "darkgray": "#a9a9a9", "darkgreen": "#006400", "darkgrey": "#a9a9a9",
+    "darkkhaki": "#bdb76b", "darkmagenta": "#8b008b", "darkolivegreen": "#556b2f",
+    "darkorange": "#ff8c00", "darkorchid": "#9932cc", "darkred": "#8b0000",
+    "darksalmon": "#e9967a", "darkseagreen": "#8fbc8f", "darkslateblue": "#483d8b",
+    "darkslategray": "#2f4f4f", "darkslategrey": "#2f4f4f", "darkturquoise": "#00ced1",
+    "darkviolet": "#9400d3", "deeppink": "#ff1493", "deepskyblue": "#00bfff",
+    "dimgray": "#696969", "dimgrey": "#696969", "dodgerblue": "#1e90ff",
+    "firebrick": "#b22222", "floralwhite": "#fffaf0", "forestgreen": "#228b22",
+    "fuchsia": "#ff00ff", "gainsboro": "#dcdcdc", "ghostwhite": "#f8f8ff",
+    "gold": "#ffd700", "goldenrod": "#daa520", "gray": "#808080", "green": "#008000",
+    "greenyellow": "#adff2f", "grey": "#808080", "honeydew": "#f0fff0",
+    "hotpink": "#ff69b4", "indianred": "#cd5c5c", "indigo": "#4b0082",
+    "ivory": "#fffff0", "khaki": "#f0e68c", "lavender": "#e6e6fa",
+    "lavenderblush": "#fff0f5", "lawngreen": "#7cfc00", "lemonchiffon": "#fffacd",
+    "lightblue": "#add8e6", "lightcoral": "#f08080", "lightcyan": "#e0ffff",
+    "lightgoldenrodyellow": "#fafad2", "lightgray": "#d3d3d3", "lightgreen": "#90ee90",
+    "lightgrey": "#d3d3d3", "lightpink": "#ffb6c1", "lightsalmon": "#ffa07a",
+    "lightseagreen": "#20b2aa", "lightskyblue": "#87cefa", "lightslategray": "#778899",
+    "lightslategrey": "#778899", "lightsteelblue": "#b0c4de", "lightyellow": "#ffffe0",
+    "lime": "#00ff00", "limegreen": "#32cd32", "linen": "#faf0e6", "magenta": "#ff00ff",
+    "maroon": "#800000", "mediumaquamarine": "#66cdaa", "mediumblue": "#0000cd",
+    "mediumorchid": "#ba55d3", "mediumpurple": "#9370db", "mediumseagreen": "#3cb371",
+    "mediumslateblue": "#7b68ee", "mediumspringgreen": "#00fa9a",
+    "mediumturquoise": "#48d1cc", "mediumvioletred": "#c71585",
+    "midnightblue": "#191970", "mintcream": "#f5fffa", "mistyrose": "#ffe4e1",
+    "moccasin": "#ffe4b5", "navajowhite": "#ffdead", "navy": "#000080",
+    "oldlace": "#fdf5e6", "olive": "#808000", "olivedrab": "#6b8e23",
+    "orange": "#ffa500", "orangered": "#ff4500", "orchid": "#da70d6",
+    "palegoldenrod": "#eee8aa", "palegreen": "#98fb98", "paleturquoise": "#afeeee",
+    "palevioletred": "#db7093", "papayawhip": "#ffefd5", "peachpuff": "#ffdab9",
+    "peru": "#cd853f", "pink": "#ffc0cb", "plum": "#dda0dd", "powderblue": "#b0e0e6",
+    "purple": "#800080", "rebeccapurple": "#663399", "red": "#ff0000",
+    "rosybrown": "#bc8f8f", "royalblue": "#4169e1", "saddlebrown": "#8b4513",
+    "salmon": "#fa8072", "sandybrown": "#f4a460", "seagreen": "#2e8b57",
+    "seashell": "#fff5ee", "sienna": "#a0522d", "silver": "#c0c0c0",
+    "skyblue": "#87ceeb", "slateblue": "#6a5acd", "slategray": "#708090",
+    "slategrey": "#708090", "snow": "#fffafa", "springgreen": "#00ff7f",
+    "steelblue": "#4682b4", "tan": "#d2b48c", "teal": "#008080", "thistle": "#d8bfd8",
+    "tomato": "#ff6347", "turquoise": "#40e0d0", "violet": "#ee82ee",
+    "wheat": "#f5deb3", "white": "#ffffff", "whitesmoke": "#f5f5f5",
+    "yellow": "#ffff00", "yellowgreen": "#9acd32",
+}
+# fmt: on
+
+_CANONICAL = re.compile(r"#[0-9a-f]{6}")
+_HEX = re.compile(r"#([0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})")
+_FUNCTION = re.compile(r"(rgba?|hsla?)\(\s*(.*?)\s*\)", re.IGNORECASE)
+_GRADIENT = re.compile(
+    r"(?:repeating-)?(?:linear|radial|conic)-gradient\(.+\)", re.IGNORECASE
+)
+_NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?(%|deg|turn|rad)?")
+
+
+def parse_color(value):
+    """Return the canonical form of a CSS color value, or None if invalid.
+
+    Values which are canonical already take a fast path; everything else is
+    memoized, since the same handful of values are parsed over and over.
+    """
+    if not isinstance(value, str):
+        return None
+    if len(value) == 7 and _CANONICAL.fullmatch(value):
+        return value
+    return _parse_color(value)
+
+
+@lru_cache(maxsize=4096)
+def _parse_color(value):
+    value = " ".join(value.split())
+    lowered = value.lower()
+    if not value:
+        return None
+    if value[0] == "#":
+        match = _HEX.fullmatch(value)
+        if not match:
+            return None
+        digits = lowered[1:]
+        if len(digits) <= 4:
+            digits = "".join(char * 2 for char in digits)
+        return _hex(digits[:6], digits[6:] or "ff")
+    if lowered in KEYWORDS:
+        return lowered
+    if lowered in NAMED_COLORS:
+        return NAMED_COLORS[lowered]
+    match = _FUNCTION.fullmatch(value)
+    if match:
+        return _parse_function(match.group(1).lower(), match.group(2))
+    if _GRADIENT.fullmatch(value):
+        return re.sub(r"\s*([(),])\s*", r"\1", value).replace(",", ", ")
+    return None
+
+
+def _hex(rgb, alpha="ff"):
+    return f"#{rgb}" if alpha == "ff" else f"#{rgb}{alpha}"
+
+
+def _parse_function(name, arguments):
+    """Parse the arguments of rgb()/rgba()/hsl()/hsla() into a hex color."""
+    arguments = arguments.replace("/", ",")
+    parts = [part for part in re.split(r"\s*,\s*|\s+", arguments) if part]
+    if len(parts) not in (3, 4):
+        return None
+    numbers = []
+    for part in parts:
+        match = _NUMBER.fullmatch(part.lower())
+        if not match:
+            return None
+        unit = match.group(1)
+        numbers.append((float(part[: len(part) - len(unit or "")]), unit))
+
+    alpha = 1.0
+    if len(numbers) == 4:
+        alpha, unit = numbers[3]
+        alpha = alpha / 100 if unit == "%" else alpha
+        if unit not in (None, "%"):
+            return None
+
+    if name.startswith("rgb"):
+        channels = []
+        for number, unit in numbers[:3]:
+            if unit not in (None, "%"):
+                return None
+            channels.append(number / 100 if unit == "%" else number / 255)
+    else:
+        (hue, hue_unit), (saturation, s_unit), (lightness, l_unit) = numbers[:3]
+        if hue_unit == "turn":
+            hue *= 360
+        elif hue_unit == "rad":
+            hue = hue * 180 / np.pi
+        elif hue_unit == "%":
+            return None
+        if s_unit != "%" or l_unit != "%":
+            return None
+        channels = colorsys.hls_to_rgb(
+            (hue % 360) / 360,
+            min(max(lightness / 100, 0), 1),
+            min(max(saturation / 100, 0), 1),
+        )
+
+    rgb = "".join(f"{round(min(max(channel, 0), 1) * 255):02x}" for channel in channels)
+    return _hex(rgb, f"{round(min(max(alpha, 0), 1) * 255):02x}")
+
+
+def is_valid_color(value):
+    return parse_color(value) is not None
+
+
+def normalize_color_schema(schema):
+    """Normalize all colors of a color schema mapping.
+
+    Returns a (normalized, errors, display) tuple: the schema with
+    canonical colors (empty values are dropped, lengths are kept as they
+    are), a mapping of invalid keys to an error message and, for values
+    that were typed in another notation than hex, the original value so
+    editors can still show it the way it was entered.
+    """
+    normalized, errors, display = {}, {}, {}
+    for key, value in (schema or {}).items():
+        if value in (None, ""):
+            continue
+        if key in LENGTH_FIELDS:
+            if parse_length(str(value)) is None:
+                errors[key] = f"Invalid length: {value}"
+            else:
+                normalized[key] = value
+            continue
+        canonical = parse_color(value)
+        if canonical is None:
+            errors[key] = f"Invalid color: {value}"
+            continue
+        normalized[key] = canonical
+        if not value.strip().startswith("#") and canonical != value.strip().lower():
+            display[key] = value
+    return normalized, errors, display
+
+
+def hex_to_rgb(value):
+    """Parse #rgb, #rrggbb or #rrggbbaa into a (r, g, b) tuple in 0..1.
+
+    Returns None for anything else.
+    """
+    if not isinstance(value, str):
+        return None
+    value = value.strip().lstrip("#")
+    if len(value) in (3, 4):
+        value = "".join(char * 2 for char in value)
+    if len(value) not in (6, 8):
+        return None
+    try:
+        return tuple(int(value[i : i + 2], 16) / 255 for i in (0, 2, 4))
+    except ValueError:
+        return None
+
+
+def color_to_rgb(value):
+    """Parse any CSS color into a (r, g, b) tuple in 0..1.
+
+    Bare hex digits (as sent in query strings) are accepted as well.
+    Returns None for keywords, gradients and invalid values.
+    """
+    if isinstance(value, str) and value[:1] != "#" and hex_to_rgb(value):
+        value = f"#{value}"
+    canonical = parse_color(value)
+    if canonical is None or canonical[0] != "#":
+        return None
+    return hex_to_rgb(canonical)
+
+
+def srgb_to_linear(rgb):
+    rgb = np.asarray(rgb, dtype=float)
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def relative_luminance(rgb):
+    """WCAG relative luminance of sRGB values."""
+    return srgb_to_linear(rgb) @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(color1, color2):
+    """WCAG contrast ratio of two CSS colors, None if either is no color."""
+    rgb1, rgb2 = color_to_rgb(color1), color_to_rgb(color2)
+    if rgb1 is None or rgb2 is None:
+        return None
+    lighter, darker = sorted(
+        (float(relative_luminance(rgb1)), float(relative_luminance(rgb2))),
+        reverse=True,
+    )
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def rgb_to_lab(rgb):
+    """Convert sRGB values to CIE L*a*b* (D65)."""
+    xyz = srgb_to_linear(rgb) @ _RGB_TO_XYZ.T / _D65_WHITE
+    delta = 6 / 29
+    f = np.where(xyz > delta**3, np.cbrt(xyz), xyz / (3 * delta**2) + 4 / 29)
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    return np.stack((116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)), axis=-1)
+
+
+def rgb_to_oklab(rgb):
+    """Convert sRGB values to OKLab."""
+    lms = np.cbrt(srgb_to_linear(rgb) @ _RGB_TO_LMS.T)
+    return lms @ _LMS_TO_OKLAB.T
+
+
+def oklab_distance(lab1, lab2):
+    """Euclidean distance in OKLab, broadcast over the leading axes."""
+    return np.linalg.norm(np.asarray(lab1) - np.asarray(lab2), axis=-1)
+
+
+def ciede2000(lab1, lab2):
+    """CIEDE2000 color difference, broadcast over the leading axes."""
+    lab1 = np.asarray(lab1, dtype=float)
+    lab2 = np.asarray(lab2, dtype=float)
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    c_bar7 = ((np.hypot(a1, b1) + np.hypot(a2, b2)) / 2) ** 7
+    g = 0.5 * (1 - np.sqrt(c_bar7 / (c_bar7 + 25**7)))
+    a1p = (1 + g) * a1
+    a2p = (1 + g) * a2
+    c1p = np.hypot(a1p, b1)
+    c2p = np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+    chroma_product = c1p * c2p
+
+    delta_l = L2 - L1
+    delta_c = c2p - c1p
+    delta_h = h2p - h1p
+    delta_h = np.where(delta_h > 180, delta_h - 360, delta_h)
+    delta_h = np.where(delta_h < -180, delta_h + 360, delta_h)
+    delta_h = np.where(chroma_product == 0, 0, delta_h)
+    delta_big_h = 2 * np.sqrt(chroma_product) * np.sin(np.radians(delta_h / 2))
+
+    l_bar = (L1 + L2) / 2
+    c_bar = (c1p + c2p) / 2
+    h_sum = h1p + h2p
+    h_bar = np.where(
+        np.abs(h1p - h2p) <= 180,
+        h_sum / 2,
+        np.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2),
+    )
+    h_bar = np.where(chroma_product == 0, h_sum, h_bar)
+
+    t = (
+        1
+        - 0.17 * np.cos(np.radians(h_bar - 30))
+        + 0.24 * np.cos(np.radians(2 * h_bar))
+        + 0.32 * np.cos(np.radians(3 * h_bar + 6))
+        - 0.20 * np.cos(np.radians(4 * h_bar - 63))
+    )
+    delta_theta = 30 * np.exp(-(((h_bar - 275) / 25) ** 2))
+    c_bar7 = c_bar**7
+    r_c = 2 * np.sqrt(c_bar7 / (c_bar7 + 25**7))
+    s_l = 1 + 0.015 * (l_bar - 50) ** 2 / np.sqrt(20 + (l_bar - 50) ** 2)
+    s_c = 1 + 0.045 * c_bar
+    s_h = 1 + 0.015 * c_bar * t
+    r_t = -np.sin(np.radians(2 * delta_theta)) * r_c
+
+    term_l = delta_l / s_l
+    term_c = delta_c / s_c
+    term_h = delta_big_h / s_h
+    return np.sqrt(term_l**2 + term_c**2 + term_h**2 + r_t * term_c * term_h)
+
+
+def to_space(rgb, metric):
+    """Convert sRGB values into the color space used by the given metric."""
+    return rgb_to_oklab(rgb) if metric == "oklab" else rgb_to_lab(rgb)
+
+
+def distance(space1, space2, metric):
+    """Distance between colors already converted with `to_space`."""
+    if metric == "oklab":
+        return oklab_distance(space1, space2)
+    return ciede2000(space1, space2)
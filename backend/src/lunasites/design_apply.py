@@ -0,0 +1,188 @@
+"""Apply design values to all content of a subtree at once.
+
+Used to rebrand a site or a part of it: the same design fields are set
+(or cleared) on thousands of objects. Objects are changed in path order,
+batch by batch, with the checkpoints of `lunasites.upgrades.batch`, so an
+interrupted run can be resumed where it stopped.
+
+No modified events are sent per object: the design indexes of the changed
+objects are updated as they are changed, and the effective design values
+of the rest of the subtree once at the end. The whole subtree is purged
+from the caching proxies once, after the commit.
+"""
+
+from Acquisition import aq_base
+from lunasites import logger
+from lunasites.behaviors.design_schema import get_design_value
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.behaviors.design_schema import record_fields
+from lunasites.behaviors.design_schema import set_design_value
+from lunasites.colors import normalize_color_schema
+from lunasites.design_reindex import reindex_descendants
+from lunasites.design_values import value_key
+from lunasites.indexers.design_schema import INHERITED_INDEXES
+from lunasites.purge import PurgePaths
+from lunasites.upgrades.batch import catalog_items
+from lunasites.upgrades.batch import clear_checkpoint
+from lunasites.upgrades.batch import get_checkpoint
+from lunasites.upgrades.batch import run_batched
+from zope.schema import ValidationError
+
+
+BATCH_SIZE = 500
+
+# Indexes updated for the changed objects
+DESIGN_INDEXES = ("view_type", "design_overrides", *INHERITED_INDEXES)
+
+# Values stored for cleared fields
+EMPTY = {"color_schema": {}, "tools_header": []}
+
+
+def validate_patch(patch):
+    """Return the patch with values in their stored form.
+
+    Raises ValueError for unknown fields and invalid values.
+    """
+    if not isinstance(patch, dict) or not patch:
+        raise ValueError("The patch must map design fields to values")
+    fields = record_fields()
+    validated = {}
+    for name, value in patch.items():
+        if name not in fields:
+            raise ValueError(f"Unknown design field {name!r}")
+        if value in (None, "", {}, []):
+            validated[name] = EMPTY.get(name)
+            continue
+        if name == "color_schema" and isinstance(value, dict):
+            value, errors, _display = normalize_color_schema(value)
+            if errors:
+                raise ValueError(", ".join(errors.values()))
+        try:
+            IDesignSchema[name].validate(value)
+        except ValidationError as error:
+            raise ValueError(f"Invalid value of {name}: {value!r}") from error
+        validated[name] = value
+    return validated
+
+
+def find_targets(context, portal_types=None, depth=None, only_overrides=()):
+    """Return the (path, get) items of the objects of a subtree to change.
+
+    Only objects with the design schema, of one of `portal_types` and at
+    most `depth` levels below the context are returned, and with
+    `only_overrides` only the ones setting one of the given fields. The
+    items are in path order, see `lunasites.upgrades.batch.catalog_items`.
+    """
+    query = {
+        "path": {
+            "query": "/".join(context.getPhysicalPath()),
+            "depth": -1 if depth is None else depth,
+        },
+        "object_provides": IDesignSchemaMarker.__identifier__,
+    }
+    if portal_types:
+        query["portal_type"] = list(portal_types)
+    if only_overrides:
+        query["design_overrides"] = {"query": list(only_overrides), "operator": "or"}
+    return catalog_items(**query)
+
+
+def checkpoint_name(context, patch):
+    """Name of the checkpoint of a run, see `lunasites.upgrades.batch`."""
+    path = "/".join(context.getPhysicalPath())
+    return f"design_apply:{path}:{value_key(patch)}"
+
+
+def apply_design(
+    context,
+    patch,
+    portal_types=None,
+    depth=None,
+    only_overrides=False,
+    resume=False,
+    batch_size=BATCH_SIZE,
+    commit=False,
+    progress=None,
+):
+    """Set design fields on the objects of the subtree of a context.
+
+    `patch` maps design fields to their new values, empty values clear a
+    field. With `only_overrides` only objects setting one of the patched
+    fields are changed. After every `batch_size` objects a savepoint is
+    made, or a commit with `commit`, and `progress` is called with the
+    report so far. With `resume` a run interrupted after a commit goes on
+    after the last object it changed, if it had the same patch. The
+    changed subtree is purged from the caching proxies after the commit.
+
+    Returns the report: the number of objects to change, the ones
+    processed so far, changed and unchanged.
+    """
+    patch = validate_patch(patch)
+    name = checkpoint_name(context, patch)
+    if not resume:
+        clear_checkpoint(name)
+    after = get_checkpoint(name)
+    items = find_targets(
+        context,
+        portal_types=portal_types,
+        depth=depth,
+        only_overrides=list(patch) if only_overrides else (),
+    )
+    if after is not None:
+        items = [(key, get) for key, get in items if key > after]
+    report = {
+        "total": len(items),
+        "processed": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "resumed_after": after and "/".join(after),
+    }
+    changed = set()
+    purge = PurgePaths()
+
+    def visit(obj):
+        if not _apply(obj, patch):
+            return False
+        obj.reindexObject(idxs=list(DESIGN_INDEXES))
+        changed.add("/".join(obj.getPhysicalPath()))
+        purge.add(obj)
+        return True
+
+    def batch_done(batch_report):
+        report["processed"] = batch_report["visited"]
+        report["changed"] = batch_report["changed"]
+        report["unchanged"] = report["processed"] - report["changed"]
+        if progress is not None:
+            progress(report)
+        else:
+            logger.info(
+                "Applied design to {processed}/{total} objects: "
+                "{changed} changed, {unchanged} unchanged".format(**report)
+            )
+
+    run_batched(
+        name, items, visit, batch_size=batch_size, commit=commit, progress=batch_done
+    )
+    purge.purge_after_commit()
+    if changed or resume:
+        # The effective design values of the rest of the subtree
+        reindex_descendants(
+            context, batch_size=batch_size, skip=changed, commit=commit, resume=resume
+        )
+    return report
+
+
+def _apply(obj, patch):
+    values = {
+        name: value
+        for name, value in patch.items()
+        if get_design_value(obj, name) != value
+    }
+    for name, value in values.items():
+        set_design_value(obj, name, value)
+    # Descendants are reindexed once at the end
+    base = aq_base(obj)
+    if getattr(base, "_v_design_changed", False):
+        del base._v_design_changed
+    return bool(values)
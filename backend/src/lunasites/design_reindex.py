@@ -0,0 +1,131 @@
+"""Update the effective design values of descendants in the background.
+
+When the design of an object changes, the inherited design indexes of all
+its descendants are out of date. Reindexing them in the editing request
+would turn an edit of the site root into a site wide reindex in one
+transaction, so the subtree is handed to a worker thread once the edit is
+committed. The worker has its own ZODB connection and reindexes only the
+inherited design indexes, in resumable batches, see
+`lunasites.upgrades.batch`, and purges the reindexed objects from the
+caching proxies at the end.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from lunasites import logger
+from lunasites.indexers.design_schema import INHERITED_INDEXES
+from lunasites.purge import PurgePaths
+from lunasites.scan.scanner import open_site
+from lunasites.upgrades.batch import catalog_items
+from lunasites.upgrades.batch import clear_checkpoint
+from lunasites.upgrades.batch import run_batched
+from plone import api
+
+import threading
+import transaction
+
+
+# Reindex in a worker thread after the commit, the test layers reindex in
+# the editing transaction instead
+IN_BACKGROUND = True
+
+_pending = set()
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # One worker, so runs for overlapping subtrees don't conflict
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="lunasites-design-reindex"
+            )
+        return _executor
+
+
+def schedule_reindex(obj):
+    """Reindex the design of the descendants of an object after the commit."""
+    count = getattr(obj, "objectCount", None)
+    if count is None or not count():
+        return
+    if not IN_BACKGROUND:
+        reindex_descendants(obj)
+        return
+    portal = api.portal.get()
+    transaction.get().addAfterCommitHook(
+        _schedule_after_commit,
+        args=(
+            portal._p_jar.db(),
+            portal.getPhysicalPath(),
+            "/".join(obj.getPhysicalPath()),
+        ),
+    )
+
+
+def _schedule_after_commit(success, db, site_path, path):
+    if not success:
+        return
+    with _lock:
+        if path in _pending:
+            return
+        _pending.add(path)
+    _get_executor().submit(_work, db, site_path, path)
+
+
+def _work(db, site_path, path):
+    with _lock:
+        _pending.discard(path)
+    try:
+        with open_site(db, site_path) as site:
+            obj = site.unrestrictedTraverse(path, None)
+            if obj is not None:
+                reindex_descendants(obj)
+                # Sends the purges
+                transaction.commit()
+    except Exception:
+        logger.exception(f"Reindexing the design below {path} failed")
+
+
+def reindex_descendants(obj, batch_size=None, skip=(), commit=True, resume=False):
+    """Reindex the inherited design indexes of the descendants of an object.
+
+    Descendants with a path in `skip` are left out, and with `resume` the
+    ones an interrupted run already reindexed. The reindexed objects are
+    purged after the next commit. Returns the report of `run_batched`.
+    """
+    path = tuple(obj.getPhysicalPath())
+    name = "reindex_design:" + "/".join(path)
+    if not resume:
+        clear_checkpoint(name)
+    items = [
+        (key, partial(_get, get))
+        for key, get in catalog_items(path="/".join(path))
+        if key != path and "/".join(key) not in skip
+    ]
+    purge = PurgePaths()
+
+    def visit(item):
+        if item is None:
+            return False
+        item.reindexObject(idxs=list(INHERITED_INDEXES))
+        purge.add(item)
+        return True
+
+    report = run_batched(name, items, visit, batch_size=batch_size, commit=commit)
+    purge.purge_after_commit()
+    return report
+
+
+def _get(get):
+    try:
+        return get()
+    except (AttributeError, KeyError):
+        # Stale catalog entry
+        return None
+
+
+def wait():
+    """Wait until the scheduled reindexing is done."""
+    _get_executor().submit(lambda: None).result()
@@ -0,0 +1,92 @@
+"""Design values shared between content objects.
+
+Pages copied from a template carry identical color schemas and header
+tools. Such values are stored once per site, under the hash of their
+canonical JSON, and the design records of the pages refer to the shared
+value. Changing the value of one page stores (or finds) another shared
+value and leaves the other pages alone. Pages using the same design value
+refer to the same persistent object.
+"""
+
+from BTrees.OIBTree import OIBTree
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+
+import copy
+import hashlib
+import json
+
+
+ANNOTATION_KEY = "lunasites.design_values"
+
+# Design fields whose values are shared
+SHARED_FIELDS = ("color_schema", "tools_header", "logo_text")
+
+
+def value_key(value):
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SharedValue(Persistent):
+    """A design value used by one or more content objects.
+
+    Never changed once stored.
+    """
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+    def get(self):
+        """Return a copy of the value, safe to change."""
+        return copy.deepcopy(self.value)
+
+
+class DesignValueStore(Persistent):
+    """The shared design values of a site."""
+
+    def __init__(self):
+        # hash -> SharedValue
+        self.values = OOBTree()
+        # hash -> number of design records using the value
+        self.refcounts = OIBTree()
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        """Return the shared value equal to a value, storing it if needed."""
+        key = value_key(value)
+        shared = self.values.get(key)
+        if shared is None:
+            shared = self.values[key] = SharedValue(key, copy.deepcopy(value))
+        self.refcounts[key] = self.refcounts.get(key, 0) + 1
+        return shared
+
+    def release(self, shared):
+        """Drop a reference, removing values which are not used anymore.
+
+        Copies of a shared value made by copying content are not counted.
+        """
+        if self.values.get(shared.key) is not shared:
+            return
+        count = self.refcounts.get(shared.key, 0) - 1
+        if count > 0:
+            self.refcounts[shared.key] = count
+            return
+        self.refcounts.pop(shared.key, None)
+        del self.values[shared.key]
+
+    def is_shared(self, shared):
+        return self.values.get(shared.key) is shared
+
+
+def get_value_store(create=False):
+    annotations = IAnnotations(api.portal.get())
+    store = annotations.get(ANNOTATION_KEY)
+    if store is None and create:
+        store = annotations[ANNOTATION_KEY] = DesignValueStore()
+    return store
@@ -0,0 +1,27 @@
+from lunasites.sections.instantiate import SOURCE_KEY
+from plone.indexer import indexer
+from plone.restapi.behaviors import IBlocks
+
+
+def section_ids(blocks):
+    """Return the ids of the custom sections blocks were inserted from."""
+    ids = set()
+    stack = [blocks]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            source = value.get(SOURCE_KEY)
+            if isinstance(source, str):
+                ids.add(source)
+            stack.extend(
+                item for item in value.values() if isinstance(item, (dict, list))
+            )
+        elif isinstance(value, list):
+            stack.extend(item for item in value if isinstance(item, (dict, list)))
+    return sorted(ids)
+
+
+@indexer(IBlocks)
+def custom_sections(obj):
+    """Index the custom sections used on a page."""
+    return section_ids(getattr(obj, "blocks", None) or {})
@@ -0,0 +1,126 @@
+"""Index the design schema of content.
+
+Overrides and view_type are the values set on the object itself. The
+colors and the design_schema metadata are the effective values, inherited
+field by field (color by color for the color schema) from the closest
+ancestor setting them, like the @design-schema-inherit service does.
+"""
+
+from Acquisition import aq_chain
+from Acquisition import aq_inner
+from lunasites.behaviors.design_schema import get_design_value
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.behaviors.design_schema import record_fields
+from lunasites.colors import parse_color
+from plone.indexer import indexer
+
+
+# Fields inherited from ancestors
+INHERITED_FIELDS = (
+    "color_schema",
+    "navbar_width",
+    "container_width",
+    "tools_header",
+    "logo_image",
+    "logo_text",
+    "logo_text_bold",
+    "hide_login_button",
+    "hide_search_button",
+)
+
+# Indexes holding effective values, to update when an ancestor changes
+INHERITED_INDEXES = ("primary_color", "background_color")
+
+
+def is_set(value):
+    """Return whether a design value overrides the inherited one."""
+    if value is None:
+        return False
+    if isinstance(value, dict):
+        return any(item and str(item).strip() for item in value.values())
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, list):
+        return bool(value)
+    return True
+
+
+def _design_chain(obj):
+    return [
+        item for item in aq_chain(aq_inner(obj)) if IDesignSchemaMarker.providedBy(item)
+    ]
+
+
+def design_overrides(obj):
+    """Return the names of the design fields set on an object."""
+    return [
+        name
+        for name in record_fields() + ["logo_image"]
+        if is_set(get_design_value(obj, name))
+    ]
+
+
+def effective_design(obj):
+    """Return the effective design values of an object, JSON compatible.
+
+    The logo image is the physical path of the object it comes from.
+    """
+    chain = _design_chain(obj)
+    values = {"view_type": get_design_value(obj, "view_type")}
+    for name in INHERITED_FIELDS[1:]:
+        values[name] = None
+        for item in chain:
+            value = get_design_value(item, name)
+            if is_set(value):
+                values[name] = value
+                if name == "logo_image":
+                    values[name] = "/".join(item.getPhysicalPath())
+                break
+
+    colors = {}
+    for item in reversed(chain):
+        schema = get_design_value(item, "color_schema")
+        if isinstance(schema, dict):
+            colors.update(
+                (key, value)
+                for key, value in schema.items()
+                if isinstance(value, str) and value.strip()
+            )
+    values["color_schema"] = colors
+    values["tools_header"] = values["tools_header"] or []
+    return values
+
+
+def _effective_color(obj, name):
+    for item in _design_chain(obj):
+        schema = get_design_value(item, "color_schema")
+        if isinstance(schema, dict):
+            value = schema.get(name)
+            if isinstance(value, str) and value.strip():
+                return parse_color(value) or value
+    return None
+
+
+@indexer(IDesignSchemaMarker)
+def view_type(obj):
+    return get_design_value(obj, "view_type")
+
+
+@indexer(IDesignSchemaMarker)
+def design_overrides_indexer(obj):
+    return design_overrides(obj)
+
+
+@indexer(IDesignSchemaMarker)
+def primary_color(obj):
+    return _effective_color(obj, "primary_color")
+
+
+@indexer(IDesignSchemaMarker)
+def background_color(obj):
+    return _effective_color(obj, "background_color")
+
+
+@indexer(IDesignSchemaMarker)
+def design_schema(obj):
+    return effective_design(obj)
@@ -1,7 +1,23 @@
 """Module where all interfaces, events and exceptions live."""
 
+from zope.interface import Attribute
+from zope.interface import Interface
 from zope.publisher.interfaces.browser import IDefaultBrowserLayer
 
 
 class IBrowserLayer(IDefaultBrowserLayer):
     """Marker interface that defines a browser layer."""
+
+
+class IScanVisitor(Interface):
+    """A job visiting the content of a site in a scan.
+
+    Registered as a named utility, the name selects it in the scan script.
+    Visitors are called from several threads at once and must not keep
+    state between objects.
+    """
+
+    query = Attribute("Catalog query of the objects to visit")
+
+    def visit(obj):
+        """Return an iterable of the results (JSON mappings) for an object."""
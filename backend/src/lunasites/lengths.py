@@ -0,0 +1,117 @@
+"""Parsing of CSS lengths.
+
+Lengths are parsed when they are saved and the parsed form (number, unit
+and whether the length is fixed or relative to something) is stored next
+to the value, so nothing has to parse them again when they are read.
+"""
+
+from functools import lru_cache
+
+import re
+
+
+FIXED_UNITS = frozenset(("px", "pt", "pc", "cm", "mm", "in", "q"))
+RELATIVE_UNITS = frozenset(
+    (
+        "%", "em", "rem", "ex", "ch", "lh",
+        "vw", "vh", "vmin", "vmax",
+        "svw", "svh", "lvw", "lvh", "dvw", "dvh",
+    )
+)  # fmt: skip
+
+KEYWORDS = frozenset(
+    (
+        "auto", "none", "inherit", "initial", "unset", "revert",
+        "fit-content", "max-content", "min-content",
+    )
+)  # fmt: skip
+
+_LENGTH = re.compile(r"([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)([a-z]+|%)?")
+# Math functions, with nothing in their arguments which could end the
+# declaration or rule they are rendered into
+_FUNCTION = re.compile(r"(calc|min|max|clamp|var)\(([\w\s.,%+*/()-]+)\)")
+
+
+def parse_length(value):
+    """Return the parsed form of a CSS length, or None if invalid.
+
+    The parsed form is a mapping of the number, the unit and the type,
+    "fixed" or "relative". Numbers without a unit are pixels. Keywords
+    and math functions have the keyword or function name as unit and no
+    number or type.
+    """
+    if not isinstance(value, str):
+        return None
+    parsed = _parse_length(value)
+    if parsed is None:
+        return None
+    return dict(zip(("number", "unit", "type"), parsed, strict=True))
+
+
+@lru_cache(maxsize=4096)
+def _parse_length(value):
+    value = " ".join(value.split()).lower()
+    if value in KEYWORDS:
+        return None, value, None
+    match = _FUNCTION.fullmatch(value)
+    if match:
+        if _split(match.group(2)) is None:
+            return None
+        return None, match.group(1), None
+    match = _LENGTH.fullmatch(value)
+    if match is None:
+        return None
+    number = float(match.group(1))
+    if number.is_integer():
+        number = int(number)
+    unit = match.group(2) or "px"
+    if unit in FIXED_UNITS:
+        return number, unit, "fixed"
+    if unit in RELATIVE_UNITS:
+        return number, unit, "relative"
+    return None
+
+
+def parse_lengths(value):
+    """Return the parsed lengths of a shorthand value like "8px 16px".
+
+    Returns a list of one to four parsed lengths, or None if invalid.
+    """
+    if not isinstance(value, str):
+        return None
+    parts = _split(value)
+    if parts is None or not 1 <= len(parts) <= 4:
+        return None
+    parsed = [parse_length(part) for part in parts]
+    return None if None in parsed else parsed
+
+
+def _split(value):
+    """Split a value on the whitespace outside of parentheses.
+
+    Returns None when the parentheses are not balanced.
+    """
+    parts, part, depth = [], [], 0
+    for char in value:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                return None
+        elif char.isspace() and not depth:
+            if part:
+                parts.append("".join(part))
+                part = []
+            continue
+        part.append(char)
+    if depth:
+        return None
+    if part:
+        parts.append("".join(part))
+    return parts
+
+
+def is_valid_length(value):
+    """Constraint of length fields: empty or a valid length."""
+    return not value or parse_length(value) is not None
@@ -0,0 +1,133 @@
+"""Resolution of the internal links of the header tools.
+
+Header tools link to site content by UID (resolveuid links) or by path.
+All links of a tools list are looked up together, in one catalog search
+with the permissions of the current user, so links to content the user
+can't see are broken. The result is kept in a process wide cache keyed by
+the tools value, the portal URL, the roles and groups the catalog filters
+on and the catalog counter, so it is computed again only when content
+changed.
+"""
+
+from collections import OrderedDict
+from lunasites.design_values import value_key
+from plone import api
+from plone.restapi.deserializer.utils import PATH_RE
+
+import copy
+import re
+import threading
+
+
+CACHE_SIZE = 256
+
+# Key of the link of a header tool
+LINK_KEY = "href"
+
+_resolveuid_re = re.compile(r"(?:^|/)resolveuid/([^/?#]+)(.*)$")
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def resolve_tool_links(items, key=None):
+    """Return header tools with their internal links resolved.
+
+    Every tool gets the final URL of its link and a ``broken`` flag, set
+    for internal links to content which does not exist. `key` identifies
+    the tools value, the hash of the value by default.
+    """
+    if not isinstance(items, list):
+        return items
+    portal = api.portal.get()
+    catalog = api.portal.get_tool("portal_catalog")
+    user = api.user.get_current()
+    cache_key = (
+        portal.absolute_url(),
+        key or value_key(items),
+        tuple(catalog._listAllowedRolesAndUsers(user)),
+        catalog.getCounter(),
+    )
+    with _lock:
+        resolved = _cache.get(cache_key)
+        if resolved is not None:
+            _cache.move_to_end(cache_key)
+    if resolved is None:
+        resolved = _resolve(items, portal, catalog)
+        with _lock:
+            _cache[cache_key] = resolved
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return copy.deepcopy(resolved)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def _reference(link, portal_url, portal_path):
+    """Return the (index, value, suffix) of an internal link, or None."""
+    match = _resolveuid_re.search(link)
+    if match:
+        return "UID", match.group(1), match.group(2)
+    path = link[len(portal_url) :] if link.startswith(portal_url) else link
+    if not path.startswith("/") or path.startswith("//"):
+        return None
+    if not path.startswith(portal_path + "/"):
+        path = portal_path + path
+    path, suffix = PATH_RE.match(path).groups()
+    return "path", path.rstrip("/"), suffix or ""
+
+
+def _resolve(items, portal, catalog):
+    portal_url = portal.absolute_url()
+    portal_path = "/".join(portal.getPhysicalPath())
+    references = {}
+    for item in items:
+        link = item.get(LINK_KEY) if isinstance(item, dict) else None
+        if isinstance(link, str) and link:
+            reference = _reference(link, portal_url, portal_path)
+            if reference is not None:
+                references[link] = reference
+
+    urls = _lookup(references.values(), catalog)
+    urls["path", portal_path] = portal_url
+
+    resolved = []
+    for item in items:
+        if not isinstance(item, dict):
+            resolved.append(item)
+            continue
+        item = dict(item, broken=False)
+        reference = references.get(item.get(LINK_KEY))
+        if reference is not None:
+            index, value, suffix = reference
+            url = urls.get((index, value))
+            if url is None:
+                item["broken"] = True
+            else:
+                item[LINK_KEY] = url + suffix
+        resolved.append(item)
+    return resolved
+
+
+def _lookup(references, catalog):
+    """Return the URLs of the content references point to, None if missing.
+
+    Links by path are looked up by the UID of their catalog entry, so all
+    links are resolved with one search.
+    """
+    uids = {}
+    for index, value, _suffix in references:
+        if index == "UID":
+            uids[index, value] = value
+            continue
+        rid = catalog.getrid(value)
+        if rid is not None:
+            uids[index, value] = catalog.getMetadataForRID(rid)["UID"]
+    found = {}
+    if uids:
+        for brain in catalog.searchResults(UID=sorted(set(uids.values()))):
+            found[brain.UID] = brain.getURL()
+    return {reference: found.get(uid) for reference, uid in uids.items()}
@@ -0,0 +1,212 @@
+"""Dominant palette extraction for uploaded logos.
+
+Decoding and clustering run in a small background thread pool and the
+results are kept in a process wide cache keyed by the blob identity and
+modification, so request threads only ever look results up.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from lunasites import logger
+from lunasites.colors import rgb_to_oklab
+from PIL import Image
+
+import numpy as np
+import threading
+
+
+PALETTE_SIZE = 6
+SAMPLE_SIZE = 64
+KMEANS_ITERATIONS = 12
+CACHE_SIZE = 256
+WORKERS = 2
+
+# Presets closer than this (CIEDE2000) count as matching the logo
+PRESET_MATCH_THRESHOLD = 8.0
+
+_cache = OrderedDict()
+_pending = {}
+_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=WORKERS, thread_name_prefix="lunasites-palette"
+            )
+        return _executor
+
+
+def palette_key(image):
+    """Cache key of a NamedBlobImage: its oid and last committed serial.
+
+    Returns None for images which were never committed.
+    """
+    oid = getattr(image, "_p_oid", None)
+    if oid is None:
+        return None
+    # Ghosts don't know their serial until they are loaded
+    image._p_activate()
+    return (oid, image._p_serial)
+
+
+def get_palette(image):
+    """Return the cached palette of an image, or None if not computed yet."""
+    key = palette_key(image)
+    with _lock:
+        palette = _cache.get(key)
+        if palette is not None:
+            _cache.move_to_end(key)
+        return palette
+
+
+def schedule_palette(image):
+    """Compute the palette of an image in the background, if needed.
+
+    The blob is handed over by file name when it is committed, so the
+    worker threads never touch the ZODB.
+    """
+    key = palette_key(image)
+    if key is None:
+        return
+    with _lock:
+        if key in _cache or key in _pending:
+            return
+    blob = getattr(image, "_blob", None)
+    try:
+        source = blob.committed()
+    except Exception:
+        source = BytesIO(image.data)
+    executor = _get_executor()
+    with _lock:
+        if key in _pending:
+            return
+        _pending[key] = executor.submit(_compute_palette, key, source)
+
+
+def _compute_palette(key, source):
+    try:
+        palette = extract_palette(source)
+    except Exception:
+        palette = None
+        logger.exception("Could not extract the logo palette")
+    with _lock:
+        _pending.pop(key, None)
+        if palette is None:
+            return
+        _cache[key] = palette
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def wait():
+    """Wait until the scheduled palettes are computed."""
+    with _lock:
+        futures = list(_pending.values())
+    for future in futures:
+        future.result()
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+def extract_palette(source, size=PALETTE_SIZE):
+    """Extract the dominant colors of an image file name or file object.
+
+    The image is downsampled to SAMPLE_SIZE pixels on its longest side,
+    (mostly) transparent pixels are dropped and the remaining ones are
+    clustered with k-means. Returns a list of ``{"color", "weight"}``
+    dicts, the most used color first.
+    """
+    with Image.open(source) as image:
+        image.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE))
+        pixels = np.asarray(image.convert("RGBA"), dtype=float).reshape(-1, 4)
+    pixels = pixels[pixels[:, 3] >= 128, :3] / 255
+    if not len(pixels):
+        return []
+    centers, counts = kmeans(pixels, min(size, len(np.unique(pixels, axis=0))))
+    order = np.argsort(-counts)
+    return [
+        {
+            "color": "#{:02x}{:02x}{:02x}".format(
+                *np.round(centers[i] * 255).astype(int)
+            ),
+            "weight": round(float(counts[i]) / len(pixels), 4),
+        }
+        for i in order
+        if counts[i]
+    ]
+
+
+def kmeans(points, k, iterations=KMEANS_ITERATIONS, seed=0):
+    """Cluster points with k-means (k-means++ seeding).
+
+    Returns the cluster centers and the number of points in each cluster.
+    """
+    rng = np.random.default_rng(seed)
+    centers = [points[rng.integers(len(points))]]
+    for _ in range(1, k):
+        distances = ((points[:, None, :] - np.array(centers)[None]) ** 2).sum(-1)
+        weights = distances.min(axis=1)
+        if not weights.sum():
+            break
+        centers.append(points[rng.choice(len(points), p=weights / weights.sum())])
+    centers = np.array(centers)
+
+    for _ in range(iterations):
+        labels = ((points[:, None, :] - centers[None]) ** 2).sum(-1).argmin(axis=1)
+        updated = np.array(
+            [
+                points[labels == i].mean(axis=0) if (labels == i).any() else centers[i]
+                for i in range(len(centers))
+            ]
+        )
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    labels = ((points[:, None, :] - centers[None]) ** 2).sum(-1).argmin(axis=1)
+    return centers, np.bincount(labels, minlength=len(centers))
+
+
+def suggest_color_schema(palette):
+    """Map a palette onto the color schema roles.
+
+    The lightest color becomes the background and the darkest the text
+    color when they are light/dark enough; the most colorful of the rest
+    (weighted by usage) become primary, secondary and accent colors.
+    """
+    if not palette:
+        return {}
+    hexes = [entry["color"] for entry in palette]
+    rgb = np.array([[int(h[i : i + 2], 16) / 255 for i in (1, 3, 5)] for h in hexes])
+    oklab = rgb_to_oklab(rgb)
+    lightness = oklab[:, 0]
+    chroma = np.hypot(oklab[:, 1], oklab[:, 2])
+    weights = np.array([entry["weight"] for entry in palette])
+
+    schema = {}
+    used = set()
+    lightest = int(lightness.argmax())
+    if lightness[lightest] > 0.9:
+        schema["background_color"] = hexes[lightest]
+        used.add(lightest)
+    else:
+        schema["background_color"] = "#ffffff"
+    darkest = int(lightness.argmin())
+    if lightness[darkest] < 0.4 and darkest not in used:
+        schema["text_color"] = hexes[darkest]
+        used.add(darkest)
+    else:
+        schema["text_color"] = "#222222"
+
+    ranked = [i for i in np.argsort(-(chroma * np.sqrt(weights))) if i not in used]
+    roles = ("primary_color", "secondary_color", "accent_color")
+    for role, i in zip(roles, ranked, strict=False):
+        schema[role] = hexes[i]
+    return schema
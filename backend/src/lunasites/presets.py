@@ -0,0 +1,330 @@
+"""Shared, indexed store for color and design schema presets."""
+
+from lunasites.colors import color_to_rgb
+from lunasites.colors import distance
+from lunasites.colors import METRICS
+from lunasites.colors import to_space
+from plone import api
+
+import hashlib
+import json
+import numpy as np
+import re
+
+
+PRESETS_RECORD = "lunasites.color_schema_presets"
+
+DEFAULT_CATEGORY = "color"
+
+# Number of presets preselected by Euclidean Lab distance before ranking
+# them with CIEDE2000
+NEAREST_CANDIDATES = 256
+
+# Keys of a registry preset that describe the preset instead of a color
+META_KEYS = frozenset(("id", "name", "category", "tags", "description"))
+
+# Presets shipped with the package, formerly hard-coded in the
+# design schema service
+BUILTIN_PRESETS = (
+    {
+        "id": "default",
+        "name": "Default",
+        "category": "design",
+        "colors": {
+            "background_color": "#ffffff",
+            "primary_color": "#0070ae",
+            "secondary_color": "#e73d5c",
+            "text_color": "#333333",
+            "accent_color": "#6bb535",
+        },
+    },
+    {
+        "id": "dark",
+        "name": "Dark Mode",
+        "category": "design",
+        "tags": ["dark"],
+        "colors": {
+            "background_color": "#1a1a1a",
+            "primary_color": "#4a9eff",
+            "secondary_color": "#ff6b9d",
+            "text_color": "#ffffff",
+            "accent_color": "#84d65a",
+        },
+    },
+    {
+        "id": "corporate",
+        "name": "Corporate Blue",
+        "category": "design",
+        "colors": {
+            "background_color": "#f8f9fa",
+            "primary_color": "#003d7a",
+            "secondary_color": "#dc3545",
+            "text_color": "#212529",
+            "accent_color": "#28a745",
+        },
+    },
+    {
+        "id": "nature",
+        "name": "Nature Green",
+        "category": "design",
+        "colors": {
+            "background_color": "#f1f8e9",
+            "primary_color": "#2e7d32",
+            "secondary_color": "#ff8f00",
+            "text_color": "#1b5e20",
+            "accent_color": "#4caf50",
+        },
+    },
+)
+
+
+def make_preset_id(name):
+    """Build a stable id out of a preset name."""
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-")
+
+
+def parse_preset(preset_str):
+    """Parse one registry preset into the normalized preset structure.
+
+    Returns None for presets that can't be parsed.
+    """
+    try:
+        raw = json.loads(preset_str)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(raw, dict) or not raw.get("name"):
+        return None
+    return normalize_preset(raw)
+
+
+def normalize_preset(raw):
+    """Bring a flat (registry) or nested (builtin) preset into one shape."""
+    if isinstance(raw.get("colors"), dict):
+        colors = dict(raw["colors"])
+    else:
+        colors = {
+            k: v for k, v in raw.items() if k not in META_KEYS and isinstance(v, str)
+        }
+    tags = raw.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tags]
+    return {
+        "id": raw.get("id") or make_preset_id(raw["name"]),
+        "name": raw["name"],
+        "category": raw.get("category") or DEFAULT_CATEGORY,
+        "tags": sorted({str(tag) for tag in tags}),
+        "description": raw.get("description", ""),
+        "colors": colors,
+    }
+
+
+def as_flat(preset):
+    """Serialize a preset in the flat shape used by the color-schema widget."""
+    return {"name": preset["name"], **preset["colors"]}
+
+
+def as_design(preset):
+    """Serialize a preset in the shape used by the design-schema service."""
+    return {
+        "id": preset["id"],
+        "name": preset["name"],
+        "category": preset["category"],
+        "tags": preset["tags"],
+        "colors": preset["colors"],
+    }
+
+
+class PresetStore:
+    """Immutable collection of parsed presets with id, name and facet indexes.
+
+    A store is built once per change of the presets registry record and
+    shared (read-only) between requests and threads.
+    """
+
+    def __init__(self, presets, etag):
+        self.etag = etag
+        self._color_arrays = {}
+        self._presets = []
+        self._by_id = {}
+        self._by_name = {}
+        self._by_category = {}
+        self._by_tag = {}
+        for preset in presets:
+            if preset["id"] in self._by_id:
+                # First definition wins, like the former linear lookups
+                continue
+            position = len(self._presets)
+            self._presets.append(preset)
+            self._by_id[preset["id"]] = position
+            self._by_name.setdefault(preset["name"], position)
+            self._by_category.setdefault(preset["category"], []).append(position)
+            for tag in preset["tags"]:
+                self._by_tag.setdefault(tag, []).append(position)
+
+    def __len__(self):
+        return len(self._presets)
+
+    def __iter__(self):
+        return iter(self._presets)
+
+    def get(self, preset_id):
+        position = self._by_id.get(preset_id)
+        return None if position is None else self._presets[position]
+
+    def get_by_name(self, name):
+        position = self._by_name.get(name)
+        return None if position is None else self._presets[position]
+
+    def query(self, category=None, tags=None):
+        """Return the presets in the given category having all given tags."""
+        positions = None
+        if category:
+            positions = set(self._by_category.get(category, ()))
+        for tag in tags or ():
+            tagged = set(self._by_tag.get(tag, ()))
+            positions = tagged if positions is None else positions & tagged
+        if positions is None:
+            return list(self._presets)
+        return [self._presets[position] for position in sorted(positions)]
+
+    def facets(self):
+        return {
+            "categories": {
+                name: len(positions)
+                for name, positions in sorted(self._by_category.items())
+            },
+            "tags": {
+                name: len(positions) for name, positions in sorted(self._by_tag.items())
+            },
+        }
+
+    def color_arrays(self, metric):
+        """Return the preset colors converted for the given metric.
+
+        The result is a (fields, values, norms, mask) tuple: the sorted
+        color field names, a presets x fields x 3 array of converted colors,
+        their squared norms and a presets x fields boolean array telling
+        which colors are set. It is computed once per store and metric.
+        """
+        arrays = self._color_arrays.get(metric)
+        if arrays is None:
+            fields = sorted(
+                {field for preset in self._presets for field in preset["colors"]}
+            )
+            rgb = np.zeros((len(self._presets), len(fields), 3))
+            mask = np.zeros((len(self._presets), len(fields)), dtype=bool)
+            for i, preset in enumerate(self._presets):
+                for j, field in enumerate(fields):
+                    value = color_to_rgb(preset["colors"].get(field))
+                    if value is not None:
+                        rgb[i, j] = value
+                        mask[i, j] = True
+            values = to_space(rgb, metric)
+            arrays = (fields, values, (values**2).sum(axis=-1), mask)
+            self._color_arrays[metric] = arrays
+        return arrays
+
+    def nearest(self, colors, k=5, metric="ciede2000"):
+        """Return the k presets closest to the given colors.
+
+        `colors` is either a list of colors, matched against any color of a
+        preset, or a mapping of color field to color, matched against the
+        same field of a preset (falling back to any color when the preset
+        doesn't define that field). The score of a preset is the mean
+        distance over the query colors. Returns (preset, score) pairs,
+        closest first.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if isinstance(colors, dict):
+            roles, values = list(colors), list(colors.values())
+        else:
+            roles, values = [None] * len(colors), list(colors)
+        query_rgb = []
+        for value in values:
+            rgb = color_to_rgb(value)
+            if rgb is None:
+                raise ValueError(f"Invalid color: {value}")
+            query_rgb.append(rgb)
+        if not query_rgb or not self._presets or k < 1:
+            return []
+
+        fields, preset_values, preset_norms, mask = self.color_arrays(metric)
+        query = to_space(np.array(query_rgb), metric)
+        field_index = {field: j for j, field in enumerate(fields)}
+        role_fields = [field_index.get(role) for role in roles]
+
+        # Euclidean distances in the working space for all presets at once,
+        # expanded as |p|^2 + |q|^2 - 2 p.q so it is a single matrix product
+        squared = (
+            preset_norms[:, :, None]
+            + (query**2).sum(axis=-1)[None, None, :]
+            - 2 * (preset_values @ query.T)
+        )
+        scores = _score(np.sqrt(np.maximum(squared, 0)), mask, role_fields)
+        candidates = np.arange(len(scores))
+
+        if metric == "ciede2000":
+            # Euclidean Lab distance is a close enough approximation to
+            # preselect candidates; refine those with the exact formula
+            if len(scores) > NEAREST_CANDIDATES + k:
+                candidates = np.argpartition(scores, NEAREST_CANDIDATES + k)
+                candidates = candidates[: NEAREST_CANDIDATES + k]
+            exact = distance(
+                preset_values[candidates][:, :, None, :], query[None, None], metric
+            )
+            scores = _score(exact, mask[candidates], role_fields)
+
+        k = min(k, len(scores))
+        closest = np.argpartition(scores, k - 1)[:k]
+        closest = closest[np.argsort(scores[closest])]
+        return [
+            (self._presets[candidates[i]], float(scores[i]))
+            for i in closest
+            if np.isfinite(scores[i])
+        ]
+
+
+def _score(distances, mask, role_fields):
+    """Reduce presets x fields x queries distances to one score per preset."""
+    distances = np.where(mask[:, :, None], distances, np.inf)
+    scores = distances.min(axis=1)
+    for q, j in enumerate(role_fields):
+        if j is not None:
+            scores[:, q] = np.where(mask[:, j], distances[:, j, q], scores[:, q])
+    return scores.mean(axis=1)
+
+
+# (key, store) of the last built store; replaced as a whole so concurrent
+# readers never see a store paired with the wrong key
+_cache = (None, None)
+
+
+def build_store(presets_raw):
+    """Build a new store out of the raw registry presets."""
+    digest = hashlib.blake2b(digest_size=8)
+    presets = []
+    for preset_str in presets_raw:
+        digest.update(preset_str.encode("utf-8"))
+        digest.update(b"\0")
+        preset = parse_preset(preset_str)
+        if preset is not None:
+            presets.append(preset)
+    presets.extend(normalize_preset(preset) for preset in BUILTIN_PRESETS)
+    return PresetStore(presets, etag=digest.hexdigest())
+
+
+def get_preset_store():
+    """Return the preset store, rebuilding it only when the presets changed."""
+    global _cache
+    presets_raw = tuple(
+        api.portal.get_registry_record(PRESETS_RECORD, default=[]) or ()
+    )
+    # hash() of the registry strings is cached on the str objects, so this
+    # check stays cheap while the record sits in the ZODB cache
+    key = hash(presets_raw)
+    cached_key, store = _cache
+    if store is None or cached_key != key:
+        store = build_store(presets_raw)
+        _cache = (key, store)
+    return store
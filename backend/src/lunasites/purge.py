@@ -0,0 +1,59 @@
+"""Purge content changed in bulk from the caching proxies.
+
+plone.app.caching purges the objects a request modified at the end of that
+request. Design changes applied in bulk or by the background reindexing
+send no modified events, and may run without a request, so the paths of
+the objects they change are collected and purged here once the change is
+committed.
+"""
+
+from plone.cachepurging.interfaces import ICachePurgingSettings
+from plone.cachepurging.interfaces import IPurger
+from plone.cachepurging.utils import getPathsToPurge
+from plone.cachepurging.utils import getURLsToPurge
+from plone.registry.interfaces import IRegistry
+from zope.component import queryUtility
+from zope.globalrequest import getRequest
+
+import transaction
+
+
+def _proxies():
+    registry = queryUtility(IRegistry)
+    if registry is None:
+        return ()
+    settings = registry.forInterface(ICachePurgingSettings, check=False)
+    if not settings.enabled:
+        return ()
+    return settings.cachingProxies or ()
+
+
+class PurgePaths:
+    """Paths of changed objects to purge once the transaction is committed."""
+
+    def __init__(self):
+        self.proxies = _proxies()
+        self.paths = set()
+
+    def add(self, obj):
+        if self.proxies:
+            # Worker threads have no global request
+            request = getRequest() or obj.REQUEST
+            self.paths.update(getPathsToPurge(obj, request))
+
+    def purge_after_commit(self):
+        """Purge the paths collected so far after the current commit."""
+        if self.paths:
+            transaction.get().addAfterCommitHook(
+                _purge, args=(sorted(self.paths), self.proxies)
+            )
+            self.paths = set()
+
+
+def _purge(success, paths, proxies):
+    purger = queryUtility(IPurger)
+    if not success or purger is None:
+        return
+    for path in paths:
+        for url in getURLsToPurge(path, proxies):
+            purger.purgeAsync(url)
@@ -0,0 +1,119 @@
+"""Token bucket limits for the lunasites write endpoints.
+
+Every write takes a token from the bucket of its user and from the bucket
+of its site. Buckets refill continuously at the configured rate up to the
+configured burst size, so short bursts go through while a write storm is
+answered with 429 before it reaches the ZODB. The buckets live in process
+memory: storing them in the ZODB would cause the very conflicts they are
+meant to prevent.
+"""
+
+from collections import OrderedDict
+from plone import api
+
+import math
+import threading
+import time
+
+
+# Registry record -> default value
+SETTINGS = {
+    "lunasites.write_limit_user_rate": 2.0,
+    "lunasites.write_limit_user_burst": 30,
+    "lunasites.write_limit_site_rate": 20.0,
+    "lunasites.write_limit_site_burst": 200,
+}
+
+MAX_BUCKETS = 10000
+
+_buckets = OrderedDict()
+_counters = {"allowed": 0, "limited_user": 0, "limited_site": 0}
+_lock = threading.Lock()
+
+
+def get_settings():
+    """Return the rate (tokens per second) and burst of user and site buckets.
+
+    A rate of 0 disables that limit.
+    """
+    return {
+        name.split("write_limit_")[1]: api.portal.get_registry_record(
+            name, default=default
+        )
+        for name, default in SETTINGS.items()
+    }
+
+
+def _wait(key, rate, burst, now):
+    """Return the seconds until the bucket has a token, 0 if it has one."""
+    if not rate:
+        return 0
+    tokens, updated = _buckets.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * rate)
+    _buckets[key] = (tokens, now)
+    _buckets.move_to_end(key)
+    return 0 if tokens >= 1 else (1 - tokens) / rate
+
+
+def _take(key, rate):
+    if rate:
+        tokens, updated = _buckets[key]
+        _buckets[key] = (tokens - 1, updated)
+
+
+def take_write_token(site, user):
+    """Take a token from the buckets of a user and a site.
+
+    Returns 0 when the write may go ahead, otherwise the seconds after
+    which it may be retried. Nothing is taken when either bucket is empty.
+    """
+    settings = get_settings()
+    user_key = ("user", site, user)
+    site_key = ("site", site)
+    now = time.monotonic()
+    with _lock:
+        user_wait = _wait(user_key, settings["user_rate"], settings["user_burst"], now)
+        site_wait = _wait(site_key, settings["site_rate"], settings["site_burst"], now)
+        if user_wait or site_wait:
+            _counters["limited_user" if user_wait else "limited_site"] += 1
+        else:
+            _take(user_key, settings["user_rate"])
+            _take(site_key, settings["site_rate"])
+            _counters["allowed"] += 1
+        # Drop the buckets unused for the longest time, mostly refilled anyway
+        while len(_buckets) > MAX_BUCKETS:
+            _buckets.popitem(last=False)
+    return max(user_wait, site_wait)
+
+
+def check_write_limit(request):
+    """Apply the write limits to a request.
+
+    Returns None when the write may go ahead, otherwise sets the 429 status
+    and Retry-After header and returns the error to reply with.
+    """
+    user = api.user.get_current()
+    user_id = user.getId() if user is not None else None
+    if user_id is None:
+        user_id = "anonymous:" + (request.getClientAddr() or "")
+    site = "/".join(api.portal.get().getPhysicalPath())
+    wait = take_write_token(site, user_id)
+    if not wait:
+        return None
+    request.response.setStatus(429)
+    request.response.setHeader("Retry-After", str(math.ceil(wait)))
+    return {"error": "Too many changes, please retry later"}
+
+
+def get_counters():
+    """Return the number of allowed and limited writes of this process."""
+    with _lock:
+        return dict(_counters, buckets=len(_buckets))
+
+
+def reset():
+    """Forget all buckets and counters."""
+    with _lock:
+        _buckets.clear()
+        for name in _counters:
+            _counters[name] = 0
@@ -0,0 +1,113 @@
+"""Audits of the design data of a site, run as scan visitors."""
+
+from Acquisition import aq_base
+from lunasites.behaviors.design_schema import get_design_record
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.behaviors.design_schema import record_fields
+from lunasites.colors import contrast_ratio
+from lunasites.design_values import get_value_store
+from lunasites.design_values import SHARED_FIELDS
+from lunasites.design_values import SharedValue
+from lunasites.indexers.design_schema import effective_design
+from lunasites.interfaces import IScanVisitor
+from plone import api
+from zope.interface import implementer
+
+
+DESIGN_QUERY = {"object_provides": IDesignSchemaMarker.__identifier__}
+
+# WCAG AA contrast of normal text
+MIN_CONTRAST = 4.5
+
+# Pairs of effective colors whose contrast is checked
+CONTRAST_PAIRS = (
+    ("text_color", "background_color"),
+    ("header_text_color", "header_bg_color"),
+    ("toolbar_font_color", "toolbar_color"),
+    ("dropdown_font_color", "dropdown_color"),
+)
+
+
+def _path(obj):
+    return "/".join(obj.getPhysicalPath())
+
+
+@implementer(IScanVisitor)
+class DesignConsistencyAudit:
+    """Report design data out of step with its storage or the catalog.
+
+    Finds design values left as content attributes, values not shared in
+    the design value store and effective design metadata of the catalog
+    differing from the actual effective values.
+    """
+
+    query = DESIGN_QUERY
+
+    def visit(self, obj):
+        path = _path(obj)
+        base = aq_base(obj)
+        base._p_activate()
+        legacy = sorted(set(record_fields()) & set(vars(base)))
+        if legacy:
+            yield {"path": path, "issue": "legacy-attributes", "fields": legacy}
+
+        record = get_design_record(obj)
+        store = get_value_store()
+        unshared = [
+            name
+            for name in SHARED_FIELDS
+            if isinstance(getattr(record, name, None), SharedValue)
+            and (store is None or not store.is_shared(getattr(record, name)))
+        ]
+        if unshared:
+            yield {"path": path, "issue": "unshared-values", "fields": unshared}
+
+        catalog = api.portal.get_tool("portal_catalog")
+        metadata = catalog.getMetadataForUID(path) or {}
+        if metadata.get("design_schema") != effective_design(obj):
+            yield {"path": path, "issue": "stale-index"}
+
+
+@implementer(IScanVisitor)
+class ContrastAudit:
+    """Report effective color pairs with too little contrast to read."""
+
+    query = DESIGN_QUERY
+
+    def visit(self, obj):
+        colors = effective_design(obj)["color_schema"]
+        for foreground, background in CONTRAST_PAIRS:
+            if foreground not in colors or background not in colors:
+                continue
+            ratio = contrast_ratio(colors[foreground], colors[background])
+            if ratio is not None and ratio < MIN_CONTRAST:
+                yield {
+                    "path": _path(obj),
+                    "foreground": foreground,
+                    "background": background,
+                    "contrast": round(ratio, 2),
+                }
+
+
+@implementer(IScanVisitor)
+class DesignStorageReport:
+    """Report the size of the design record of every object."""
+
+    query = DESIGN_QUERY
+
+    def visit(self, obj):
+        record = get_design_record(obj)
+        if record is None or record._p_oid is None:
+            return
+        data, _serial = record._p_jar.db().storage.load(record._p_oid)
+        record._p_activate()
+        yield {
+            "path": _path(obj),
+            "size": len(data),
+            "fields": sorted(vars(record)),
+            "shared": sorted(
+                name
+                for name, value in vars(record).items()
+                if isinstance(value, SharedValue)
+            ),
+        }
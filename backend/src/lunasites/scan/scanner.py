@@ -0,0 +1,140 @@
+"""Scan the content of a site in parallel.
+
+The objects to visit are found in the catalog and split, in path order,
+into one partition per worker. Every worker is a thread with its own ZODB
+connection, so objects load in parallel, and the results of all workers
+are merged into one stream as they come.
+"""
+
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import noSecurityManager
+from AccessControl.SpecialUsers import system
+from contextlib import contextmanager
+from plone import api
+from Testing.makerequest import makerequest
+from zope.component.hooks import setSite
+
+import queue
+import threading
+import transaction
+
+
+WORKERS = 4
+
+# Results waiting to be consumed, per worker
+QUEUE_SIZE = 1000
+
+# Objects visited between garbage collections of a worker's connection
+CACHE_GC_INTERVAL = 500
+
+_done = object()
+
+
+class ScanError(Exception):
+    """A worker of a scan failed."""
+
+
+def partition(query, workers=WORKERS):
+    """Split the paths of the objects found with a query into partitions.
+
+    Returns up to `workers` lists of paths, in path order.
+    """
+    catalog = api.portal.get_tool("portal_catalog")
+    paths = sorted(
+        (brain.getPath() for brain in catalog.unrestrictedSearchResults(**query)),
+        key=lambda path: path.split("/"),
+    )
+    size = -(-len(paths) // workers) or 1
+    return [paths[start : start + size] for start in range(0, len(paths), size)]
+
+
+def scan(site, visitor, workers=WORKERS):
+    """Visit the objects of the site a visitor queries in parallel.
+
+    Yields the results of the visitor as the workers produce them. Closing
+    the generator stops the workers.
+    """
+    partitions = partition(visitor.query, workers)
+    results = queue.Queue(maxsize=QUEUE_SIZE * max(len(partitions), 1))
+    stop = threading.Event()
+    db = site._p_jar.db()
+    site_path = site.getPhysicalPath()
+    threads = [
+        threading.Thread(
+            target=_work,
+            args=(db, site_path, visitor, paths, results, stop),
+            name=f"lunasites-scan-{number}",
+            daemon=True,
+        )
+        for number, paths in enumerate(partitions)
+    ]
+    for thread in threads:
+        thread.start()
+    running = len(threads)
+    try:
+        while running:
+            result = results.get()
+            if result is _done:
+                running -= 1
+            elif isinstance(result, ScanError):
+                raise result
+            else:
+                yield result
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+@contextmanager
+def open_site(db, site_path):
+    """Open a new connection and set up the site for a worker thread.
+
+    Yields the site, with the system user as the security manager. The
+    transaction of the thread is aborted and the connection closed on exit.
+    """
+    connection = db.open()
+    try:
+        app = makerequest(connection.root()["Application"])
+        site = app.unrestrictedTraverse(site_path)
+        setSite(site)
+        newSecurityManager(None, system)
+        yield site
+    finally:
+        transaction.abort()
+        noSecurityManager()
+        setSite(None)
+        connection.close()
+
+
+def _put(results, stop, item):
+    """Queue an item, unless the scan stopped while the queue was full."""
+    while not stop.is_set():
+        try:
+            results.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _work(db, site_path, visitor, paths, results, stop):
+    try:
+        with open_site(db, site_path) as site:
+            app = site.getPhysicalRoot()
+            for number, path in enumerate(paths, 1):
+                if stop.is_set():
+                    break
+                obj = app.unrestrictedTraverse(path, None)
+                if obj is not None:
+                    for result in visitor.visit(obj) or ():
+                        if not _put(results, stop, result):
+                            return
+                if number % CACHE_GC_INTERVAL == 0:
+                    site._p_jar.cacheGC()
+    except Exception as error:
+        failure = ScanError(f"Scanning {threading.current_thread().name} failed")
+        failure.__cause__ = error
+        _put(results, stop, failure)
+    finally:
+        _put(results, stop, _done)
@@ -0,0 +1 @@
+"""Storage of the custom section templates."""
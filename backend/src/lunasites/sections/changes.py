@@ -0,0 +1,88 @@
+"""Change log of a section library, for clients syncing a local copy.
+
+Every add or removal of a section increments the library version and
+records the section id under it. Only the latest change of every section
+is kept, so the log never grows beyond the sections plus the removed ones
+(tombstones). The oldest tombstones are dropped beyond MAX_TOMBSTONES;
+clients which last synced before that must fetch the whole library again.
+"""
+
+from BTrees.Length import Length
+from BTrees.OIBTree import OIBTree
+from BTrees.OOBTree import OOBTree
+from BTrees.OOBTree import OOTreeSet
+from persistent import Persistent
+
+
+MAX_TOMBSTONES = 1000
+
+
+class ChangeLog(Persistent):
+    """Latest change of every section, keyed by library version.
+
+    The version and the tombstone count are conflict-resolving counters
+    and the changes live in BTrees, so concurrent changes of different
+    sections don't conflict. Changes committed concurrently can get the
+    same version, so `since` includes the changes at the version a client
+    last saw.
+    """
+
+    def __init__(self, version=0):
+        self.counter = Length(version)
+        # Changes at or below this version were dropped
+        self.compacted = version
+        # (version, section id) -> whether the section was removed
+        self.entries = OOBTree()
+        # section id -> version of its latest change
+        self.versions = OIBTree()
+        # (version, section id) of the removed sections
+        self.deleted = OOTreeSet()
+        self.tombstones = Length()
+
+    @property
+    def version(self):
+        return self.counter()
+
+    def record(self, section_id, deleted=False):
+        self.counter.change(1)
+        version = self.counter()
+        self._forget(section_id)
+        self.entries[version, section_id] = deleted
+        self.versions[section_id] = version
+        if deleted:
+            self.deleted.add((version, section_id))
+            self.tombstones.change(1)
+            if self.tombstones() > MAX_TOMBSTONES:
+                self.compact(self.deleted.minKey()[0])
+        return version
+
+    def _forget(self, section_id):
+        previous = self.versions.pop(section_id, None)
+        if previous is None:
+            return
+        key = (previous, section_id)
+        self.entries.pop(key, None)
+        if key in self.deleted:
+            self.deleted.remove(key)
+            self.tombstones.change(-1)
+
+    def compact(self, version):
+        """Drop the tombstones up to a version."""
+        for _version, section_id in list(self.deleted.keys(max=(version + 1,))):
+            self._forget(section_id)
+        self.compacted = max(self.compacted, version)
+
+    def since(self, version):
+        """Return the ids changed and removed at or after a version.
+
+        Returns None when changes after that version were dropped, or for
+        versions this library never had, and the client has to fetch
+        everything.
+        """
+        if version < self.compacted or version > self.version:
+            return None
+        changed = []
+        deleted = []
+        for (_version, section_id), removed in self.entries.items(min=(version,)):
+            (deleted if removed else changed).append(section_id)
+        return changed, deleted
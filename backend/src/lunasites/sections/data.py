@@ -0,0 +1,49 @@
+"""Persistent holder of JSON data, compressed when large."""
+
+from persistent import Persistent
+
+import json
+import zlib
+
+
+# Block data with a larger JSON representation is stored compressed
+COMPRESSION_THRESHOLD = 1024
+COMPRESSION_LEVEL = 6
+
+
+class SectionData(Persistent):
+    """The block data of a section, loaded only when asked for.
+
+    Data whose JSON is larger than COMPRESSION_THRESHOLD bytes is kept as
+    zlib compressed JSON in `compressed` and only decompressed when read,
+    smaller data as is in `value`.
+    """
+
+    value = None
+    compressed = None
+
+    def __init__(self, value):
+        raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(raw) > COMPRESSION_THRESHOLD:
+            compressed = zlib.compress(raw, COMPRESSION_LEVEL)
+            if len(compressed) < len(raw):
+                self.compressed = compressed
+                return
+        self.value = value
+
+    def get(self):
+        if self.compressed is not None:
+            return json.loads(zlib.decompress(self.compressed))
+        return self.value
+
+    def to_json(self):
+        """Return the data as JSON bytes."""
+        if self.compressed is not None:
+            return zlib.decompress(self.compressed)
+        return json.dumps(self.value, separators=(",", ":")).encode("utf-8")
+
+    def deflated(self):
+        """Return the data as zlib compressed JSON, without recompressing."""
+        if self.compressed is not None:
+            return self.compressed
+        return zlib.compress(self.to_json(), COMPRESSION_LEVEL)
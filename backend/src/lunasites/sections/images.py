@@ -0,0 +1,171 @@
+"""Blob storage of images embedded in section data as data URLs.
+
+Sections copied from pages often carry their images inline as base64 data
+URLs. Such strings are stored once per library as blobs, under the hash of
+the data URL, and replaced in the section by a reference to the image,
+which is turned into the URL the image is served from when the section
+is sent to a client. The stored bytes and data URL header rebuild the
+original string exactly, so data URLs which would not round trip stay
+inline, and so do the ones of other than raster images, which are not
+safe to serve from the site. Strings of the data which look like image
+references are escaped, so they can't point at the images of other
+sections.
+"""
+
+from BTrees.OIBTree import OIBTree
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+from ZODB.blob import Blob
+
+import base64
+import binascii
+import hashlib
+import re
+
+
+# Path, relative to the portal URL, the images are served from
+IMAGE_PATH = "/@custom-sections-images/"
+
+# Prefix of the references to stored images in section data
+IMAGE_REF = "@custom-sections-image:"
+
+# Prefix of strings of the data starting with IMAGE_REF or this prefix
+ESCAPED_REF = "@custom-sections-escaped:"
+
+# Types of the data URLs stored as images
+IMAGE_TYPES = frozenset((
+    "image/png",
+    "image/jpeg",
+    "image/gif",
+    "image/webp",
+    "image/avif",
+))
+
+# Smaller data URLs (in characters) stay inline
+MIN_IMAGE_SIZE = 1024
+
+_data_url_re = re.compile(r"data:([\w.+-]+/[\w.+-]+)((?:;[\w.+-]+=[^;,]*)*);base64,")
+
+
+def image_key(data_url):
+    return hashlib.sha256(data_url.encode("utf-8")).hexdigest()
+
+
+class SectionImage(Persistent):
+    """An image of a data URL, the bytes kept in a blob."""
+
+    def __init__(self, header, data):
+        self.header = header
+        self.content_type = _data_url_re.match(header).group(1)
+        self.size = len(data)
+        self.blob = Blob()
+        with self.blob.open("w") as blob:
+            blob.write(data)
+
+    def read(self):
+        with self.blob.open("r") as blob:
+            return blob.read()
+
+    def data_url(self):
+        return self.header + base64.b64encode(self.read()).decode("ascii")
+
+
+class ImageStore(Persistent):
+    """The images of the sections of a library."""
+
+    def __init__(self):
+        # hash of the data URL -> SectionImage
+        self.images = OOBTree()
+        # hash -> number of references from sections
+        self.refcounts = OIBTree()
+
+    def __len__(self):
+        return len(self.images)
+
+    def get(self, key):
+        return self.images.get(key)
+
+    def store(self, value):
+        """Store the images of section data.
+
+        Returns the data with the data URLs replaced by image references,
+        the keys of the stored images, one per replaced data URL, and
+        whether strings looking like references were escaped.
+        """
+        refs = []
+        escaped = []
+        return self._store(value, refs, escaped), refs, bool(escaped)
+
+    def _store(self, value, refs, escaped):
+        if isinstance(value, dict):
+            return {
+                key: self._store(item, refs, escaped) for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._store(item, refs, escaped) for item in value]
+        if isinstance(value, str) and value.startswith((IMAGE_REF, ESCAPED_REF)):
+            escaped.append(value)
+            return ESCAPED_REF + value
+        if (
+            isinstance(value, str)
+            and len(value) >= MIN_IMAGE_SIZE
+            and value.startswith("data:")
+        ):
+            return self._store_image(value, refs)
+        return value
+
+    def _store_image(self, data_url, refs):
+        match = _data_url_re.match(data_url)
+        if match is None or match.group(1).lower() not in IMAGE_TYPES:
+            return data_url
+        header = match.group(0)
+        encoded = data_url[len(header) :]
+        try:
+            data = base64.b64decode(encoded, validate=True)
+        except (binascii.Error, ValueError):
+            return data_url
+        if base64.b64encode(data).decode("ascii") != encoded:
+            # Line breaks or other non canonical base64 would not round trip
+            return data_url
+        key = image_key(data_url)
+        if key not in self.images:
+            self.images[key] = SectionImage(header, data)
+        self.refcounts[key] = self.refcounts.get(key, 0) + 1
+        refs.append(key)
+        return IMAGE_REF + key
+
+    def release(self, refs):
+        """Drop references, removing images which are not used anymore."""
+        for key in refs:
+            count = self.refcounts.get(key, 0) - 1
+            if count > 0:
+                self.refcounts[key] = count
+                continue
+            self.refcounts.pop(key, None)
+            self.images.pop(key, None)
+
+    def restore(self, value):
+        """Return data with the image references replaced by the data URLs."""
+        if isinstance(value, dict):
+            return {key: self.restore(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.restore(item) for item in value]
+        if isinstance(value, str) and value.startswith(ESCAPED_REF):
+            return value[len(ESCAPED_REF) :]
+        if isinstance(value, str) and value.startswith(IMAGE_REF):
+            image = self.images.get(value[len(IMAGE_REF) :])
+            if image is not None:
+                return image.data_url()
+        return value
+
+    def urls(self, value, portal_url):
+        """Return data with the image references replaced by image URLs."""
+        if isinstance(value, dict):
+            return {key: self.urls(item, portal_url) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.urls(item, portal_url) for item in value]
+        if isinstance(value, str) and value.startswith(ESCAPED_REF):
+            return value[len(ESCAPED_REF) :]
+        if isinstance(value, str) and value.startswith(IMAGE_REF):
+            return portal_url + IMAGE_PATH + value[len(IMAGE_REF) :]
+        return value
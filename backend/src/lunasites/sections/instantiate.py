@@ -0,0 +1,151 @@
+"""Insert custom sections into pages."""
+
+from plone import api
+from plone.restapi.deserializer.utils import PATH_RE
+from zope.event import notify
+from zope.lifecycleevent import ObjectModifiedEvent
+
+import uuid
+
+
+# Keys of block data holding links to content
+LINK_KEYS = frozenset(("url", "href", "preview_image", "@id"))
+
+# Key of inserted blocks holding the id of the section they come from
+SOURCE_KEY = "custom_section"
+
+
+def section_blocks(section):
+    """Return the blocks and layout of a section.
+
+    Sections saved from the editor wrap their blocks in a group block.
+    Images stored with the section are inlined again, so pages don't
+    depend on images the library drops once the section changes.
+    """
+    data = section.export_data()
+    if "blocks" not in data and isinstance(data.get("data"), dict):
+        data = data["data"]
+    blocks = data.get("blocks") or {}
+    items = (data.get("blocks_layout") or {}).get("items") or list(blocks)
+    return blocks, items
+
+
+def clone_blocks(blocks, items):
+    """Give blocks, and all blocks nested in them, new ids.
+
+    Returns the new blocks and layout items.
+    """
+    ids = {block_id: str(uuid.uuid4()) for block_id in blocks}
+    cloned = {ids[block_id]: _clone(block) for block_id, block in blocks.items()}
+    return cloned, [ids[block_id] for block_id in items if block_id in ids]
+
+
+def _clone(value):
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    value = {key: _clone(item) for key, item in value.items()}
+    blocks = value.get("blocks")
+    layout = value.get("blocks_layout")
+    if isinstance(blocks, dict) and isinstance(layout, dict):
+        blocks, items = clone_blocks(blocks, layout.get("items") or [])
+        value["blocks"] = blocks
+        value["blocks_layout"] = dict(layout, items=items)
+    return value
+
+
+def resolve_links(context, blocks):
+    """Turn links to site content in blocks into resolveuid links.
+
+    Does what the REST API block deserializers do link by link, but looks
+    all paths up in one catalog query.
+    """
+    portal = api.portal.get()
+    portal_url = portal.absolute_url()
+    portal_path = "/".join(portal.getPhysicalPath())
+    relative_up = len(context.absolute_url().split("/")) - len(portal_url.split("/"))
+
+    links = {}
+    for link in _links(blocks):
+        path = link[len(portal_url) :] if link.startswith(portal_url) else link
+        if not path.startswith("/") or path.startswith("//"):
+            continue
+        if not path.startswith(portal_path + "/"):
+            path = portal_path + path
+        path, suffix = PATH_RE.match(path).groups()
+        links[link] = (path.rstrip("/"), suffix or "")
+    if not links:
+        return blocks
+
+    catalog = api.portal.get_tool("portal_catalog")
+    brains = catalog.unrestrictedSearchResults(
+        path={"query": sorted({path for path, _ in links.values()}), "depth": 0}
+    )
+    uids = {brain.getPath(): brain.UID for brain in brains}
+    resolved = {
+        link: relative_up * "../" + "resolveuid/" + uids[path] + suffix
+        for link, (path, suffix) in links.items()
+        if path in uids
+    }
+    return _replace_links(blocks, resolved)
+
+
+def _links(value):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in LINK_KEYS and isinstance(item, str):
+                yield item
+            else:
+                yield from _links(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _links(item)
+
+
+def _replace_links(value, resolved):
+    if isinstance(value, dict):
+        return {
+            key: (
+                resolved.get(item, item)
+                if key in LINK_KEYS and isinstance(item, str)
+                else _replace_links(item, resolved)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_replace_links(item, resolved) for item in value]
+    return value
+
+
+def insert_section(section, context, position=None, replace=None):
+    """Insert a copy of the blocks of a section into a page.
+
+    The blocks go before the block at `position` of the layout, at the end
+    without it, or in place of the block with the id `replace`. The
+    inserted blocks are tagged with the id of the section. Returns the
+    inserted blocks and the new layout.
+    """
+    blocks, items = clone_blocks(*section_blocks(section))
+    blocks = resolve_links(context, blocks)
+    for block in blocks.values():
+        block[SOURCE_KEY] = section.id
+
+    page_blocks = dict(getattr(context, "blocks", None) or {})
+    layout = dict(getattr(context, "blocks_layout", None) or {})
+    page_items = list(layout.get("items") or [])
+    if replace is not None:
+        if replace not in page_items:
+            raise KeyError(replace)
+        position = page_items.index(replace)
+        page_items.remove(replace)
+        page_blocks.pop(replace, None)
+    if position is None or position > len(page_items):
+        position = len(page_items)
+    page_items[position:position] = items
+    page_blocks.update(blocks)
+
+    context.blocks = page_blocks
+    context.blocks_layout = dict(layout, items=page_items)
+    notify(ObjectModifiedEvent(context))
+    return blocks, context.blocks_layout
@@ -0,0 +1,157 @@
+"""Full-text index of the custom sections.
+
+The index maps every token of a section's name, description, category and
+block text to the ids of the sections containing it, with a small integer
+weight per section. It is kept in the section library and updated as
+sections are added and removed, so searching never loads a section.
+"""
+
+from BTrees.OIBTree import OIBTree
+from BTrees.OOBTree import OOBTree
+from persistent import Persistent
+
+import re
+import unicodedata
+
+
+# Weight of a token per field it is found in
+FIELD_WEIGHTS = {
+    "name": 8,
+    "category": 4,
+    "description": 2,
+    "text": 1,
+}
+
+# Keys of the block data holding user visible text
+TEXT_KEYS = frozenset(
+    (
+        "text",
+        "plaintext",
+        "title",
+        "description",
+        "heading",
+        "label",
+        "placeholder",
+    )
+)
+
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 40
+MAX_TEXT_TOKENS = 500
+
+# Score factor for tokens only matching a query term as a prefix
+PREFIX_FACTOR = 0.5
+
+_token_re = re.compile(r"\w+")
+
+
+def tokenize(text, min_length=MIN_TOKEN_LENGTH):
+    """Split text into lowercase tokens without accents."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [
+        token
+        for token in _token_re.findall(text)
+        if min_length <= len(token) <= MAX_TOKEN_LENGTH
+    ]
+
+
+def extract_text(data):
+    """Return the text strings of Volto block data (Slate leafs, titles...)."""
+    strings = []
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(item, str):
+                    if key in TEXT_KEYS:
+                        strings.append(item)
+                elif isinstance(item, (dict, list)):
+                    stack.append(item)
+        elif isinstance(value, list):
+            stack.extend(item for item in value if isinstance(item, (dict, list)))
+    strings.reverse()
+    return strings
+
+
+def section_tokens(section):
+    """Return the weight of every token of a section."""
+    fields = {
+        "name": tokenize(section.name),
+        "category": tokenize(section.category),
+        "description": tokenize(section.description),
+        "text": [
+            token
+            for text in extract_text(section.data)
+            for token in tokenize(text)
+        ][:MAX_TEXT_TOKENS],
+    }
+    weights = {}
+    for field, tokens in fields.items():
+        for token in set(tokens):
+            weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field]
+    return weights
+
+
+class SectionIndex(Persistent):
+    """Inverted token index over the custom sections."""
+
+    def __init__(self):
+        # token -> OIBTree of section id -> weight
+        self.postings = OOBTree()
+        # section id -> tuple of its tokens, to unindex it
+        self.documents = OOBTree()
+
+    def index(self, section):
+        self.unindex(section.id)
+        weights = section_tokens(section)
+        for token, weight in weights.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = OIBTree()
+            postings[section.id] = weight
+        self.documents[section.id] = tuple(sorted(weights))
+
+    def unindex(self, section_id):
+        for token in self.documents.pop(section_id, ()):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(section_id, None)
+            if not postings:
+                del self.postings[token]
+
+    def search(self, query):
+        """Return the ids of the sections matching all query terms, best first.
+
+        Every term matches the tokens it is a prefix of; exact matches score
+        higher than prefix matches. Returns a list of ``(id, score)`` pairs.
+        """
+        # Single letters are allowed as prefixes while typing
+        terms = set(tokenize(query, min_length=1))
+        if not terms:
+            return []
+        scores = None
+        for term in sorted(terms, key=len, reverse=True):
+            matches = {}
+            for token, postings in self.postings.items(min=term, max=term + "\uffff"):
+                factor = 1 if token == term else PREFIX_FACTOR
+                for section_id, weight in postings.items():
+                    if scores is not None and section_id not in scores:
+                        continue
+                    score = weight * factor
+                    if score > matches.get(section_id, 0):
+                        matches[section_id] = score
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    section_id: scores[section_id] + score
+                    for section_id, score in matches.items()
+                }
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda item: -item[1])
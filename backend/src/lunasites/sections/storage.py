@@ -0,0 +1,385 @@
+"""Persistent storage of custom sections.
+
+Every section is its own persistent object, kept in an OOBTree keyed by id
+in an annotation of the portal. Adding, reading or removing one section
+only loads and writes that section and a BTree bucket, and writes of
+different sections don't conflict with each other.
+
+The block data of a section lives in a separate persistent object, so
+listing sections (names, categories, ...) never loads the block data.
+Large blocks are stored once per library and shared between sections,
+see `lunasites.sections.subtrees`.
+"""
+
+from BTrees.Length import Length
+from BTrees.OOBTree import intersection
+from BTrees.OOBTree import OOBTree
+from BTrees.OOBTree import OOTreeSet
+from lunasites.sections.changes import ChangeLog
+from lunasites.sections.data import COMPRESSION_LEVEL
+from lunasites.sections.data import SectionData
+from lunasites.sections.images import ImageStore
+from lunasites.sections.search import SectionIndex
+from lunasites.sections.subtrees import SubtreeStore
+from persistent import Persistent
+from plone import api
+from plone.registry.interfaces import IRegistry
+from zope.annotation.interfaces import IAnnotations
+from zope.component import getUtility
+
+import json
+import zlib
+
+
+ANNOTATION_KEY = "lunasites.custom_sections"
+
+# Registry record used to store the whole library as one JSON string
+LEGACY_RECORD = "lunasites.custom_sections"
+
+DEFAULT_CATEGORY = "General"
+
+SUMMARY_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "category",
+    "created",
+    "created_by",
+)
+
+SECTION_FIELDS = (*SUMMARY_FIELDS, "data")
+
+
+class CustomSection(Persistent):
+    """A saved section template.
+
+    Once added to a library its embedded images are kept in the image
+    store of the library and its large blocks in the shared subtree store;
+    `image_refs` and `refs` list their hashes. `image_escapes` is set when
+    strings of the data looking like image references were escaped.
+    """
+
+    subtrees = None
+    refs = ()
+    images = None
+    image_refs = ()
+    image_escapes = False
+
+    def __init__(
+        self,
+        section_id,
+        name,
+        data,
+        description="",
+        category=DEFAULT_CATEGORY,
+        created=None,
+        created_by=None,
+    ):
+        self.id = section_id
+        self.name = name
+        self.description = description
+        self.category = category or DEFAULT_CATEGORY
+        self.data = data
+        self.created = created
+        self.created_by = created_by
+
+    @property
+    def data(self):
+        value = self._data.get()
+        if self.subtrees is not None:
+            value = self.subtrees.expand(value)
+        return value
+
+    @data.setter
+    def data(self, value):
+        if self.images is not None:
+            self.images.release(self.image_refs)
+            value, image_refs, escapes = self.images.store(value)
+            self.image_refs = tuple(image_refs)
+            self.image_escapes = escapes
+        if self.subtrees is not None:
+            self.subtrees.release(self.refs)
+            value, refs = self.subtrees.store(value)
+            self.refs = tuple(refs)
+        self._data = SectionData(value)
+
+    def share_blocks(self, subtrees, images=None):
+        """Move the large blocks and the images of the data into stores."""
+        self.release_blocks()
+        data = self.data
+        self.subtrees = subtrees
+        self.images = images
+        self.data = data
+
+    def release_blocks(self):
+        """Take the blocks and images out of the stores again."""
+        if self.subtrees is None and self.images is None:
+            return
+        data = self.export_data()
+        if self.subtrees is not None:
+            self.subtrees.release(self.refs)
+        if self.images is not None:
+            self.images.release(self.image_refs)
+        self.subtrees = self.images = None
+        self.refs = self.image_refs = ()
+        self.image_escapes = False
+        self.data = data
+
+    def _has_images(self):
+        return bool(self.image_refs) or self.image_escapes
+
+    def export_data(self):
+        """Return the block data with the original data URLs of the images."""
+        data = self.data
+        if self._has_images():
+            data = self.images.restore(data)
+        return data
+
+    def public_data(self):
+        """Return the block data with the URLs the images are served from."""
+        data = self.data
+        if self._has_images():
+            data = self.images.urls(data, api.portal.get().absolute_url())
+        return data
+
+    def data_json(self):
+        """Return the block data, as sent to clients, as JSON bytes."""
+        if self.refs or self._has_images():
+            data = json.dumps(self.public_data(), separators=(",", ":"))
+            return data.encode("utf-8")
+        return self._data.to_json()
+
+    def data_deflated(self):
+        """Return the block data, as sent to clients, as zlib compressed JSON.
+
+        Without shared blocks and images this is the stored data as is.
+        """
+        if self.refs or self._has_images():
+            return zlib.compress(self.data_json(), COMPRESSION_LEVEL)
+        return self._data.deflated()
+
+    def summary(self):
+        return {field: getattr(self, field) for field in SUMMARY_FIELDS}
+
+    def to_dict(self):
+        return dict(self.summary(), data=self.public_data())
+
+    def export(self):
+        return dict(self.summary(), data=self.export_data())
+
+
+class SectionLibrary(Persistent):
+    """All custom sections of a site.
+
+    Besides the sections themselves the library keeps the ids in creation
+    order, the ids per category and per creator, a conflict-resolving
+    counter per category, a full-text index and a change log, all updated
+    as sections are added and removed.
+    """
+
+    # Libraries stored before the full-text index existed get it in the
+    # 1002 upgrade step
+    text_index = None
+    subtrees = None
+    changes = None
+    images = None
+    keys = None
+
+    def __init__(self):
+        self.sections = OOBTree()
+        self.count = Length()
+        # (created, id) -> id
+        self.order = OOBTree()
+        # id -> (created, id), the key of the section in `order`
+        self.keys = OOBTree()
+        # category -> OOTreeSet of ids
+        self.by_category = OOBTree()
+        # category -> Length
+        self.category_counts = OOBTree()
+        # created_by -> OOTreeSet of ids
+        self.by_creator = OOBTree()
+        self.text_index = SectionIndex()
+        self.subtrees = SubtreeStore()
+        self.changes = ChangeLog()
+        self.images = ImageStore()
+
+    def __len__(self):
+        return self.count()
+
+    def __contains__(self, section_id):
+        return section_id in self.sections
+
+    def get(self, section_id):
+        return self.sections.get(section_id)
+
+    def values(self):
+        return self.sections.values()
+
+    @property
+    def version(self):
+        return self.changes.version if self.changes is not None else 0
+
+    def _log(self, section_id, deleted=False):
+        if self.changes is None:
+            # Changes before the log existed are unknown, clients have to
+            # fetch everything once
+            self.changes = ChangeLog(version=1)
+        self.changes.record(section_id, deleted=deleted)
+
+    def add(self, section):
+        self._remove(section.id)
+        if self.subtrees is None:
+            self.subtrees = SubtreeStore()
+        if self.images is None:
+            self.images = ImageStore()
+        section.share_blocks(self.subtrees, self.images)
+        self.sections[section.id] = section
+        self.count.change(1)
+        key = (section.created or "", section.id)
+        self.order[key] = section.id
+        if self.keys is None:
+            self.keys = OOBTree()
+        self.keys[section.id] = key
+        _index(self.by_category, section.category, section.id)
+        if section.category not in self.category_counts:
+            self.category_counts[section.category] = Length()
+        self.category_counts[section.category].change(1)
+        _index(self.by_creator, section.created_by or "", section.id)
+        if self.text_index is not None:
+            self.text_index.index(section)
+        self._log(section.id)
+        return section
+
+    def remove(self, section_id):
+        section = self._remove(section_id)
+        if section is not None:
+            self._log(section_id, deleted=True)
+        return section
+
+    def _remove(self, section_id):
+        section = self.sections.pop(section_id, None)
+        if section is None:
+            return None
+        self.count.change(-1)
+        section.release_blocks()
+        self.order.pop((section.created or "", section.id), None)
+        if self.keys is not None:
+            self.keys.pop(section.id, None)
+        _unindex(self.by_category, section.category, section.id)
+        counter = self.category_counts.get(section.category)
+        if counter is not None:
+            counter.change(-1)
+        _unindex(self.by_creator, section.created_by or "", section.id)
+        if self.text_index is not None:
+            self.text_index.unindex(section.id)
+        return section
+
+    def categories(self):
+        """Return the number of sections per category."""
+        return {
+            category: counter()
+            for category, counter in self.category_counts.items()
+            if counter()
+        }
+
+    def _filter(self, category=None, created_by=None):
+        """Return the set of ids of the matching sections, None for all."""
+        ids = None
+        if category is not None:
+            ids = self.by_category.get(category, OOTreeSet())
+        if created_by is not None:
+            creator_ids = self.by_creator.get(created_by, OOTreeSet())
+            ids = creator_ids if ids is None else intersection(ids, creator_ids)
+        return ids
+
+    def query(self, category=None, created_by=None):
+        """Return the ids of the matching sections, in creation order."""
+        ids = self._filter(category=category, created_by=created_by)
+        if ids is None:
+            return list(self.order.values())
+        return sorted(ids, key=self._order_key)
+
+    def _order_key(self, section_id):
+        """Return the key of a section in the creation order."""
+        key = self.keys.get(section_id) if self.keys is not None else None
+        if key is None:
+            # Added before the keys were kept
+            section = self.sections.get(section_id)
+            key = (getattr(section, "created", None) or "", section_id)
+        return key
+
+    def search(self, text, category=None, created_by=None):
+        """Return the ids of the sections matching a full-text query.
+
+        The best matches come first, sections with the same score in
+        creation order.
+        """
+        if self.text_index is None:
+            return []
+        results = self.text_index.search(text)
+        ids = self._filter(category=category, created_by=created_by)
+        if ids is not None:
+            results = [item for item in results if item[0] in ids]
+        results.sort(key=lambda item: (-item[1], self._order_key(item[0])))
+        return [section_id for section_id, score in results]
+
+    def changed_since(self, version):
+        """Return the ids of the sections changed and removed since a version.
+
+        Returns None if the client has to fetch the whole library.
+        """
+        if self.changes is None:
+            return None if version else ([], [])
+        return self.changes.since(version)
+
+    def reindex(self):
+        """Rebuild the full-text index from the stored sections."""
+        self.text_index = SectionIndex()
+        for section in self.sections.values():
+            self.text_index.index(section)
+
+
+def _index(index, key, section_id):
+    ids = index.get(key)
+    if ids is None:
+        ids = index[key] = OOTreeSet()
+    ids.add(section_id)
+
+
+def _unindex(index, key, section_id):
+    ids = index.get(key)
+    if ids is not None and section_id in ids:
+        ids.remove(section_id)
+
+
+def get_library(portal=None, create=False):
+    """Return the section library of the site.
+
+    Without `create` this returns None for sites where no section was ever
+    stored, so reads don't write to the portal.
+    """
+    portal = portal if portal is not None else api.portal.get()
+    annotations = IAnnotations(portal)
+    library = annotations.get(ANNOTATION_KEY)
+    if library is None and create:
+        library = annotations[ANNOTATION_KEY] = SectionLibrary()
+    return library
+
+
+def migrate_registry_sections(portal=None):
+    """Move the sections of the legacy registry record into the library.
+
+    Returns the number of migrated sections.
+    """
+    raw = api.portal.get_registry_record(LEGACY_RECORD, default=None)
+    if not raw:
+        return 0
+    sections = json.loads(raw) if isinstance(raw, str) else raw
+    library = get_library(portal, create=True)
+    for section_id, section in (sections or {}).items():
+        values = {field: section.get(field) for field in SECTION_FIELDS}
+        values["id"] = values["id"] or section_id
+        values["description"] = values["description"] or ""
+        library.add(CustomSection(section_id=values.pop("id"), **values))
+    del getUtility(IRegistry).records[LEGACY_RECORD]
+    return len(sections or {})
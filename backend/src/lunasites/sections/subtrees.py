@@ -0,0 +1,156 @@
+"""Content addressed storage of block subtrees.
+
+Sections saved from the same template share most of their blocks. Every
+block of a section whose JSON is at least MIN_SUBTREE_SIZE bytes is stored
+once under the hash of its canonical JSON and replaced in the section by a
+reference, nested blocks first. Reference counts remove blocks no section
+uses anymore. Dicts of the section data which look like a reference are
+escaped, so they are never taken for one.
+
+Stored blocks never change, so the decoded blocks are kept in a process
+wide LRU cache keyed by their hash.
+"""
+
+from BTrees.OIBTree import OIBTree
+from BTrees.OOBTree import OOBTree
+from collections import OrderedDict
+from lunasites import logger
+from lunasites.sections.data import SectionData
+from persistent import Persistent
+
+import hashlib
+import json
+import threading
+
+
+REF_KEY = "@subtree"
+
+# Wraps dicts of the data with REF_KEY or ESCAPE_KEY as only key
+ESCAPE_KEY = "@subtree-escaped"
+
+# Smaller blocks stay inline, a reference would not save anything
+MIN_SUBTREE_SIZE = 256
+
+CACHE_SIZE = 1024
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def canonical_json(value):
+    """Return the JSON bytes of a value with sorted keys and no whitespace."""
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def _cached(key):
+    with _lock:
+        value = _cache.get(key)
+        if value is not None:
+            _cache.move_to_end(key)
+        return value
+
+
+def _cache_value(key, value):
+    with _lock:
+        _cache[key] = value
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+class SubtreeStore(Persistent):
+    """The shared blocks of the sections of a library."""
+
+    def __init__(self):
+        # hash -> SectionData of the block, nested blocks as references
+        self.nodes = OOBTree()
+        # hash -> number of references from sections
+        self.refcounts = OIBTree()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def store(self, value):
+        """Store the blocks of section data.
+
+        Returns the data with its blocks replaced by references and the
+        hashes of all referenced blocks, one per reference.
+        """
+        refs = []
+        return self._reduce(value, refs), refs
+
+    def _reduce(self, value, refs):
+        if isinstance(value, dict):
+            reduced = {
+                key: (
+                    {
+                        block_id: self._store_block(block, refs)
+                        for block_id, block in item.items()
+                    }
+                    if key == "blocks" and isinstance(item, dict)
+                    else self._reduce(item, refs)
+                )
+                for key, item in value.items()
+            }
+            if _is_special(value):
+                return {ESCAPE_KEY: reduced}
+            return reduced
+        if isinstance(value, list):
+            return [self._reduce(item, refs) for item in value]
+        return value
+
+    def _store_block(self, block, refs):
+        reduced = self._reduce(block, refs)
+        raw = canonical_json(reduced)
+        if len(raw) < MIN_SUBTREE_SIZE:
+            return reduced
+        key = hashlib.sha256(raw).hexdigest()
+        if key not in self.nodes:
+            self.nodes[key] = SectionData(reduced)
+        self.refcounts[key] = self.refcounts.get(key, 0) + 1
+        refs.append(key)
+        return {REF_KEY: key}
+
+    def release(self, refs):
+        """Drop references, removing blocks which are not used anymore."""
+        for key in refs:
+            count = self.refcounts.get(key, 0) - 1
+            if count > 0:
+                self.refcounts[key] = count
+                continue
+            self.refcounts.pop(key, None)
+            self.nodes.pop(key, None)
+
+    def load(self, key):
+        value = _cached(key)
+        if value is None:
+            value = self.nodes[key].get()
+            _cache_value(key, value)
+        return value
+
+    def expand(self, value):
+        """Return data with all block references replaced by the blocks.
+
+        Always returns new containers, the cached blocks are never shared.
+        References to missing blocks are kept as they are.
+        """
+        if isinstance(value, dict):
+            if _is_special(value) and REF_KEY in value:
+                try:
+                    block = self.load(value[REF_KEY])
+                except (KeyError, TypeError):
+                    logger.warning(f"Missing section block {value[REF_KEY]}")
+                    return dict(value)
+                return self.expand(block)
+            if _is_special(value) and isinstance(value[ESCAPE_KEY], dict):
+                value = value[ESCAPE_KEY]
+            return {key: self.expand(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.expand(item) for item in value]
+        return value
+
+
+def _is_special(value):
+    """Return whether a dict is a reference or an escaped dict."""
+    return len(value) == 1 and (REF_KEY in value or ESCAPE_KEY in value)
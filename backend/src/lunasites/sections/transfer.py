@@ -0,0 +1,133 @@
+"""Streaming export and import of section libraries as NDJSON.
+
+Every line is the JSON of one section with all its fields. Both directions
+handle one section at a time, so libraries of any size move in constant
+memory.
+"""
+
+from lunasites import logger
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import DEFAULT_CATEGORY
+from lunasites.sections.storage import SECTION_FIELDS
+
+import json
+import transaction
+import uuid
+
+
+SKIP = "skip"
+OVERWRITE = "overwrite"
+RENAME = "rename"
+POLICIES = (SKIP, OVERWRITE, RENAME)
+
+BATCH_SIZE = 500
+
+
+def export_sections(library):
+    """Yield the sections of a library as NDJSON lines, in creation order.
+
+    Images are exported as the data URLs they were imported as.
+    """
+    if library is None:
+        return
+    for section_id in library.order.values():
+        section = library.get(section_id)
+        line = json.dumps(section.export(), separators=(",", ":"))
+        yield line.encode("utf-8") + b"\n"
+        # Don't keep the exported sections in the connection cache
+        section._data._p_deactivate()
+        section._p_deactivate()
+
+
+def import_sections(
+    library,
+    lines,
+    policy=SKIP,
+    new_ids=False,
+    batch_size=BATCH_SIZE,
+    commit=False,
+    progress=None,
+):
+    """Import sections from NDJSON lines into a library.
+
+    Sections whose id exists already are skipped, replace the existing
+    section (overwrite) or get a new id (rename) depending on `policy`.
+    With `new_ids` every imported section gets a new id. After every
+    `batch_size` sections a savepoint is made, or a commit with `commit`,
+    and `progress` is called with the report so far.
+
+    Returns the report: the number of created, overwritten, renamed and
+    skipped sections, the invalid lines and the ids of the sections which
+    got a new id.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown conflict policy {policy!r}")
+    report = {
+        "created": 0,
+        "overwritten": 0,
+        "renamed": 0,
+        "skipped": 0,
+        "errors": [],
+        "ids": {},
+    }
+    processed = 0
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+            section = _make_section(values)
+        except (ValueError, TypeError, KeyError) as error:
+            report["errors"].append({"line": number, "error": str(error)})
+            continue
+
+        original_id = section.id
+        exists = original_id in library
+        if exists and policy == SKIP and not new_ids:
+            report["skipped"] += 1
+        else:
+            if new_ids or (exists and policy == RENAME):
+                section.id = str(uuid.uuid4())
+                report["ids"][original_id] = section.id
+            library.add(section)
+            if exists and section.id == original_id:
+                report["overwritten"] += 1
+            elif exists and not new_ids:
+                report["renamed"] += 1
+            else:
+                report["created"] += 1
+
+        processed += 1
+        if processed % batch_size == 0:
+            _end_batch(commit, progress, report)
+    _end_batch(commit, progress, report)
+    return report
+
+
+def _make_section(values):
+    if not isinstance(values, dict):
+        raise ValueError("Not a section")
+    if not values.get("name"):
+        raise ValueError("Name is required")
+    if not values.get("data"):
+        raise ValueError("Section data is required")
+    values = {field: values.get(field) for field in SECTION_FIELDS}
+    values["id"] = str(values["id"] or uuid.uuid4())
+    values["description"] = values["description"] or ""
+    values["category"] = values["category"] or DEFAULT_CATEGORY
+    return CustomSection(section_id=values.pop("id"), **values)
+
+
+def _end_batch(commit, progress, report):
+    if commit:
+        transaction.commit()
+    else:
+        # Moves the changes out of memory into the temporary storage
+        transaction.savepoint(optimistic=True)
+    if progress is not None:
+        progress(report)
+    else:
+        logger.info(
+            "Imported sections: {created} created, {overwritten} overwritten, "
+            "{renamed} renamed, {skipped} skipped".format(**report)
+        )
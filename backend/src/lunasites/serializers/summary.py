@@ -1,4 +1,9 @@
+from lunasites.interfaces import IBrowserLayer
 from plone.restapi.interfaces import IJSONSummarySerializerMetadata
+from plone.restapi.interfaces import ISerializeToJsonSummary
+from plone.restapi.serializer.summary import DefaultJSONSummarySerializer
+from Products.ZCatalog.interfaces import ICatalogBrain
+from zope.component import adapter
 from zope.interface import implementer
 
 
@@ -8,3 +13,25 @@ class JSONSummarySerializerMetadata:
 
     def default_metadata_fields(self):
         return {"image_field", "image_scales", "effective", "Subject"}
+
+
+@implementer(ISerializeToJsonSummary)
+@adapter(ICatalogBrain, IBrowserLayer)
+class BrainJSONSummarySerializer(DefaultJSONSummarySerializer):
+    """Summary of catalog brains.
+
+    The effective design values of a page are listed with
+    ``metadata_fields=design_schema``, read from the catalog metadata
+    without loading the page.
+    """
+
+    def __call__(self):
+        summary = super().__call__()
+        design = summary.get("design_schema")
+        if isinstance(design, dict) and design.get("logo_image"):
+            # The metadata holds the path of the object with the logo
+            url = self.request.physicalPathToURL(design["logo_image"])
+            summary["design_schema"] = dict(
+                design, logo_image=url + "/@@download/logo_image"
+            )
+        return summary
@@ -1,10 +1,25 @@
 import json
+from lunasites.colors import normalize_color_schema
+from lunasites.colors import parse_color
+from lunasites.presets import as_design
+from lunasites.presets import as_flat
+from lunasites.presets import get_preset_store
+from lunasites.ratelimit import check_write_limit
+from lunasites.services.utils import batch_results
+from lunasites.services.utils import is_not_modified
+from lunasites.services.utils import make_etag
 from plone import api
+from plone.protect.interfaces import IDisableCSRFProtection
 from plone.restapi.services import Service
+from zope.interface import alsoProvides
 from zope.interface import implementer
 from zope.publisher.interfaces import IPublishTraverse
 
 
+# Upper bound for the number of presets returned by a nearest search
+MAX_NEAREST = 50
+
+
 @implementer(IPublishTraverse)
 class ColorSchemaService(Service):
     """REST API service for managing site color schemas"""
@@ -12,6 +27,8 @@ class ColorSchemaService(Service):
     def __init__(self, context, request):
         super().__init__(context, request)
         self.params = []
+        # Disable CSRF protection for the registry writes
+        alsoProvides(request, IDisableCSRFProtection)
 
     def publishTraverse(self, request, name):
         self.params.append(name)
@@ -19,9 +36,17 @@ class ColorSchemaService(Service):
 
     def reply(self):
         method = self.request.method
+        if self.params and self.params[0] == "nearest":
+            return self._nearest_presets()
+        if self.params and self.params[0] == "validate":
+            return self._validate_colors()
         if method == "GET":
             return self._get_color_schema()
-        elif method == "POST":
+
+        error = check_write_limit(self.request)
+        if error:
+            return error
+        if method == "POST":
             return self._update_color_schema()
         elif method == "PUT":
             return self._apply_preset()
@@ -30,47 +55,104 @@ class ColorSchemaService(Service):
             return {"error": "Method not allowed"}
 
     def _get_color_schema(self):
-        """Get current color schema and available presets"""
+        """Get current color schema and available presets
+
+        The presets are the ones of the registry followed by the built-in
+        presets of the ``design`` category, the ones ``@design-schema``
+        lists, see `lunasites.presets.BUILTIN_PRESETS`.
+        """
         try:
             # Get current color schema
             current_schema = api.portal.get_registry_record(
                 'lunasites.color_schema', default={}
             )
             
-            # Get available presets
-            presets_raw = api.portal.get_registry_record(
-                'lunasites.color_schema_presets', default=[]
+            # Get available presets from the shared preset store
+            store = get_preset_store()
+            category = self.request.form.get("category")
+            tags = self._get_tags()
+
+            etag = make_etag(
+                store.etag, current_schema, category, tags,
+                self.request.form.get("b_start"), self.request.form.get("b_size"),
+            )
+            if is_not_modified(self.request, etag):
+                return self.reply_no_content(status=304)
+
+            presets, total, batching = batch_results(
+                self.request, store.query(category=category, tags=tags)
             )
             
-            # Parse presets from JSON strings
-            presets = []
-            for preset_str in presets_raw:
-                try:
-                    preset = json.loads(preset_str)
-                    presets.append(preset)
-                except json.JSONDecodeError:
-                    continue
-            
-            return {
+            result = {
                 "current_schema": current_schema,
-                "presets": presets,
+                "presets": [as_flat(preset) for preset in presets],
+                "presets_total": total,
+                "facets": store.facets(),
                 "suggestions": self._generate_color_suggestions(current_schema)
             }
+            if batching:
+                result["batching"] = batching
+            return result
         except Exception as e:
             self.request.response.setStatus(500)
             return {"error": str(e)}
 
+    def _get_tags(self):
+        """Get the requested preset tags (repeated or comma separated)"""
+        tags = self.request.form.get("tags") or []
+        if isinstance(tags, str):
+            tags = tags.split(",")
+        return [tag.strip() for tag in tags if tag.strip()]
+
+    def _nearest_presets(self):
+        """Return the presets closest to the given colors.
+
+        Colors come either from the JSON body (``colors`` as a list, or as a
+        mapping of color field to color) or from the ``colors`` query
+        parameter as a comma separated list.
+        """
+        if self.request.method == "POST":
+            try:
+                data = json.loads(self.request.get("BODY") or "{}")
+            except (TypeError, ValueError):
+                self.request.response.setStatus(400)
+                return {"error": "Invalid JSON data"}
+        else:
+            data = dict(self.request.form)
+            if isinstance(data.get("colors"), str):
+                data["colors"] = data["colors"].split(",")
+        colors = data.get("colors")
+        if not colors or not isinstance(colors, (list, dict)):
+            self.request.response.setStatus(400)
+            return {"error": "colors is required"}
+
+        metric = data.get("metric", "ciede2000")
+        try:
+            k = max(1, min(int(data.get("k", 5)), MAX_NEAREST))
+            results = get_preset_store().nearest(colors, k=k, metric=metric)
+        except (TypeError, ValueError) as e:
+            self.request.response.setStatus(400)
+            return {"error": str(e)}
+
+        return {
+            "metric": metric,
+            "items": [
+                {**as_design(preset), "distance": round(score, 4)}
+                for preset, score in results
+            ],
+        }
+
     def _update_color_schema(self):
         """Update the color schema with new values"""
         try:
             data = json.loads(self.request.get("BODY", "{}"))
             schema_data = data.get("schema", {})
             
-            # Validate color values
-            valid_colors = {}
-            for key, value in schema_data.items():
-                if self._is_valid_color(value):
-                    valid_colors[key] = value
+            # Validate color values and store them in canonical form
+            valid_colors, errors, display = normalize_color_schema(schema_data)
+            if errors:
+                self.request.response.setStatus(400)
+                return {"error": "Invalid colors", "errors": errors}
             
             # Update registry
             api.portal.set_registry_record(
@@ -80,41 +162,62 @@ class ColorSchemaService(Service):
             return {
                 "success": True,
                 "updated_schema": valid_colors,
+                "display": display,
                 "suggestions": self._generate_color_suggestions(valid_colors)
             }
         except Exception as e:
             self.request.response.setStatus(400)
             return {"error": str(e)}
 
+    def _validate_colors(self):
+        """Validate and normalize a whole schema in one round trip.
+
+        Accepts ``{"schema": {...}}`` and/or ``{"colors": [...]}`` and
+        doesn't store anything.
+        """
+        try:
+            data = json.loads(self.request.get("BODY") or "{}")
+        except (TypeError, ValueError):
+            self.request.response.setStatus(400)
+            return {"error": "Invalid JSON data"}
+
+        result = {"valid": True}
+        if isinstance(data.get("schema"), dict):
+            schema, errors, display = normalize_color_schema(data["schema"])
+            result.update(schema=schema, errors=errors, display=display)
+            result["valid"] = not errors
+        if isinstance(data.get("colors"), list):
+            colors = [parse_color(color) for color in data["colors"]]
+            result["colors"] = colors
+            result["valid"] = result["valid"] and None not in colors
+        return result
+
     def _apply_preset(self):
         """Apply a preset color schema"""
         try:
             data = json.loads(self.request.get("BODY", "{}"))
             preset_name = data.get("preset_name")
+            preset_id = data.get("preset_id")
             
-            if not preset_name:
+            if not preset_name and not preset_id:
                 self.request.response.setStatus(400)
                 return {"error": "preset_name is required"}
             
-            # Get presets
-            presets_raw = api.portal.get_registry_record(
-                'lunasites.color_schema_presets', default=[]
-            )
-            
             # Find matching preset
-            preset_schema = None
-            for preset_str in presets_raw:
-                try:
-                    preset = json.loads(preset_str)
-                    if preset.get("name") == preset_name:
-                        preset_schema = {k: v for k, v in preset.items() if k != "name"}
-                        break
-                except json.JSONDecodeError:
-                    continue
+            store = get_preset_store()
+            if preset_id:
+                preset = store.get(preset_id)
+            else:
+                preset = store.get_by_name(preset_name)
             
-            if not preset_schema:
+            if preset is None:
                 self.request.response.setStatus(404)
                 return {"error": "Preset not found"}
+
+            preset_name = preset["name"]
+            preset_schema, _errors, _display = normalize_color_schema(
+                preset["colors"]
+            )
             
             # Apply preset
             api.portal.set_registry_record(
@@ -131,46 +234,12 @@ class ColorSchemaService(Service):
             self.request.response.setStatus(400)
             return {"error": str(e)}
 
-    def _is_valid_color(self, color):
-        """Validate color format (hex, rgb, rgba, hsl, etc.)"""
-        if not color or not isinstance(color, str):
-            return False
-        
-        color = color.strip()
-        
-        # Hex colors
-        if color.startswith('#') and len(color) in [4, 7, 9]:
-            try:
-                int(color[1:], 16)
-                return True
-            except ValueError:
-                return False
-        
-        # RGB/RGBA colors
-        if color.startswith(('rgb(', 'rgba(')):
-            return True
-        
-        # HSL/HSLA colors
-        if color.startswith(('hsl(', 'hsla(')):
-            return True
-        
-        # Gradients
-        if 'gradient' in color:
-            return True
-        
-        # Named colors (basic validation)
-        named_colors = ['transparent', 'inherit', 'initial', 'unset']
-        if color.lower() in named_colors:
-            return True
-        
-        return False
-
     def _generate_color_suggestions(self, current_schema):
         """Generate color suggestions based on current schema"""
         if not current_schema:
             return []
         
-        primary_color = current_schema.get('primary_color', '#0070ae')
+        primary_color = parse_color(current_schema.get('primary_color')) or '#0070ae'
         
         # Generate complementary and analogous colors
         suggestions = []
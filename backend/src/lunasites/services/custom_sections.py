@@ -1,11 +1,25 @@
 """Custom sections service for saving and retrieving section templates."""
+from Acquisition import aq_base
+from lunasites.ratelimit import check_write_limit
+from lunasites.sections.images import IMAGE_TYPES
+from lunasites.sections.instantiate import insert_section
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import DEFAULT_CATEGORY
+from lunasites.sections.storage import get_library
+from lunasites.sections.transfer import export_sections
+from lunasites.sections.transfer import import_sections
+from lunasites.sections.transfer import POLICIES
+from lunasites.sections.transfer import SKIP
+from lunasites.services.utils import batch_results
 from plone import api
+from plone.restapi.interfaces import ISerializeToJsonSummary
 from plone.restapi.services import Service
 from plone.restapi.deserializer import json_body
-from Products.CMFCore.utils import getToolByName
+from zope.component import getMultiAdapter
 from zope.interface import implementer
 from zope.publisher.interfaces import IPublishTraverse
 from plone.protect.interfaces import IDisableCSRFProtection
+from ZPublisher.Iterators import filestream_iterator
 from zope.interface import alsoProvides
 import json
 import uuid
@@ -19,6 +33,7 @@ class CustomSectionsService(Service):
     def __init__(self, context, request):
         super().__init__(context, request)
         self.params = []
+        self.body = None
         # Disable CSRF protection properly
         alsoProvides(request, IDisableCSRFProtection)
 
@@ -26,33 +41,23 @@ class CustomSectionsService(Service):
         self.params.append(name)
         return self
 
-    def get_storage_key(self):
-        """Get the registry key for storing custom sections."""
-        return "lunasites.custom_sections"
-
-    def get_custom_sections(self):
-        """Get all custom sections from registry."""
-        try:
-            registry = getToolByName(self.context, "portal_registry")
-            sections_data = registry.get(self.get_storage_key(), "{}")
-            if isinstance(sections_data, str):
-                return json.loads(sections_data)
-            return sections_data or {}
-        except Exception:
-            return {}
-
-    def save_custom_sections(self, sections):
-        """Save custom sections to registry."""
-        registry = getToolByName(self.context, "portal_registry")
-        registry[self.get_storage_key()] = json.dumps(sections)
+    def render(self):
+        content = super().render()
+        return self.body if self.body is not None else content
 
     def reply(self):
         """Handle HTTP requests."""
         method = self.request.method
-        
+
         if method == "GET":
             return self.get_sections()
-        elif method == "POST":
+
+        error = check_write_limit(self.request)
+        if error:
+            return error
+        if method == "POST":
+            if self.params[1:] == ["insert"]:
+                return self.insert_section()
             return self.create_section()
         elif method == "DELETE":
             return self.delete_section()
@@ -61,79 +66,323 @@ class CustomSectionsService(Service):
             return {"error": "Method not allowed"}
 
     def get_sections(self):
-        """Return all custom sections."""
-        sections = self.get_custom_sections()
-        all_sections = list(sections.values())
-        
-        # Extract unique categories
-        categories = set()
-        for section in all_sections:
-            category = section.get("category", "General")
-            categories.add(category)
-        
+        """Return custom sections.
+
+        Supports full-text search with ``q`` (best matches first),
+        filtering by ``category`` and ``created_by``, batching with
+        ``b_start``/``b_size`` and ``summary=1`` to leave the block data
+        out. ``since=<version>`` returns the changes since a version.
+        ``@custom-sections/<id>/usage`` lists the pages using a section,
+        ``@custom-sections/<id>`` returns one full section and
+        ``@custom-sections/<id>/data`` only its block data.
+        """
+        library = get_library()
+        if self.params:
+            section = library.get(self.params[0]) if library is not None else None
+            if section is None:
+                self.request.response.setStatus(404)
+                return {"error": "Section not found"}
+            if self.params[1:] == ["data"]:
+                return self.get_section_data(section)
+            if self.params[1:] == ["usage"]:
+                return self.get_usage(section)
+            return section.to_dict()
+
+        form = self.request.form
+        if form.get("since", "") != "":
+            return self.get_changes(library, form["since"])
+
+        if library is None:
+            return {
+                "sections": [],
+                "categories": [],
+                "category_counts": {},
+                "count": 0,
+                "items_total": 0,
+                "version": 0,
+            }
+
+        filters = {
+            "category": form.get("category") or None,
+            "created_by": form.get("created_by") or None,
+        }
+        if form.get("q"):
+            ids = library.search(form["q"], **filters)
+        else:
+            ids = library.query(**filters)
+        ids, total, batching = batch_results(self.request, ids)
+        sections = self.serialize(library, ids)
+
+        category_counts = library.categories()
+        result = {
+            "sections": sections,
+            "categories": sorted(category_counts),
+            "category_counts": category_counts,
+            "count": len(library),
+            "items_total": total,
+            "version": library.version,
+        }
+        if batching:
+            result["batching"] = batching
+        return result
+
+    def serialize(self, library, ids):
+        summary = self.request.form.get("summary") in ("1", "true", "True", "yes")
+        sections = []
+        for section_id in ids:
+            section = library.get(section_id)
+            sections.append(section.summary() if summary else section.to_dict())
+        return sections
+
+    def get_changes(self, library, since):
+        """Return the sections added and removed since a library version.
+
+        The changes at that version are included, changes committed
+        concurrently can share a version.
+
+        ``full_resync`` tells the client to replace its copy with the
+        returned sections, the changes since its version are not known
+        anymore.
+        """
+        try:
+            since = int(since)
+        except ValueError:
+            self.request.response.setStatus(400)
+            return {"error": "since must be a library version"}
+
+        if library is None:
+            changes = ([], []) if not since else None
+            version = 0
+        else:
+            changes = library.changed_since(since)
+            version = library.version
+        if changes is None:
+            changed = library.query() if library is not None else []
+            deleted = []
+        else:
+            changed, deleted = changes
         return {
-            "sections": all_sections,
-            "categories": sorted(list(categories)),
-            "count": len(sections)
+            "version": version,
+            "full_resync": changes is None,
+            "sections": self.serialize(library, changed),
+            "deleted": deleted,
         }
 
+    def get_usage(self, section):
+        """Return the pages with blocks inserted from a section."""
+        brains = api.content.find(custom_sections=section.id, sort_on="path")
+        brains, total, batching = batch_results(self.request, brains)
+        result = {
+            "@id": self.request["ACTUAL_URL"],
+            "items": [
+                getMultiAdapter((brain, self.request), ISerializeToJsonSummary)()
+                for brain in brains
+            ],
+            "items_total": total,
+        }
+        if batching:
+            result["batching"] = batching
+        return result
+
+    def get_section_data(self, section):
+        """Return the block data of a section as JSON.
+
+        Clients accepting the deflate encoding get the compressed bytes,
+        for sections without shared blocks as they are stored.
+        """
+        response = self.request.response
+        response.setHeader("Content-Type", self.content_type)
+        response.setHeader("Vary", "Accept-Encoding")
+        accept = self.request.getHeader("Accept-Encoding", "")
+        if "deflate" in [value.split(";")[0].strip() for value in accept.split(",")]:
+            response.setHeader("Content-Encoding", "deflate")
+            self.body = section.data_deflated()
+        else:
+            self.body = section.data_json()
+        return self.reply_no_content(200)
+
     def create_section(self):
         """Create a new custom section."""
         try:
             data = json_body(self.request)
-            print(f"Received data: {data}")  # Debug
-        except Exception as e:
-            print(f"JSON parsing error: {e}")  # Debug
+        except Exception:
             self.request.response.setStatus(400)
             return {"error": "Invalid JSON data"}
-        
+
         # Validate required fields
         if not data.get("name"):
             self.request.response.setStatus(400)
             return {"error": "Name is required"}
-        
+
         if not data.get("data"):
             self.request.response.setStatus(400)
             return {"error": "Section data is required"}
 
-        # Generate unique ID
-        section_id = str(uuid.uuid4())
-        
-        # Create section object
-        section = {
-            "id": section_id,
-            "name": data["name"],
-            "description": data.get("description", ""),
-            "category": data.get("category", "General"),
-            "data": data["data"],
-            "created": datetime.now().isoformat(),
-            "created_by": api.user.get_current().getId() if api.user.get_current() else "anonymous",
-        }
-        
-        print(f"Created section: {section}")  # Debug
+        user = api.user.get_current()
+        section = CustomSection(
+            section_id=str(uuid.uuid4()),
+            name=data["name"],
+            description=data.get("description", ""),
+            category=data.get("category", DEFAULT_CATEGORY),
+            data=data["data"],
+            created=datetime.now().isoformat(),
+            created_by=user.getId() if user else "anonymous",
+        )
 
-        # Save to registry
-        sections = self.get_custom_sections()
-        sections[section_id] = section
-        self.save_custom_sections(sections)
+        # Only the new section and one BTree bucket get written
+        get_library(create=True).add(section)
 
         self.request.response.setStatus(201)
-        return section
+        return section.to_dict()
+
+    def insert_section(self):
+        """Insert the blocks of a section into the context page.
+
+        ``POST <page>/@custom-sections/<id>/insert`` with an optional
+        ``position`` in the blocks layout or the id of a block to
+        ``replace``. Returns only the inserted blocks and the new layout.
+        """
+        if not api.user.has_permission("Modify portal content", obj=self.context):
+            self.request.response.setStatus(403)
+            return {"error": "You are not allowed to edit this page"}
+        if not hasattr(aq_base(self.context), "blocks_layout"):
+            self.request.response.setStatus(400)
+            return {"error": "The page does not support blocks"}
+
+        library = get_library()
+        section = library.get(self.params[0]) if library is not None else None
+        if section is None:
+            self.request.response.setStatus(404)
+            return {"error": "Section not found"}
+
+        try:
+            data = json_body(self.request) or {}
+        except Exception:
+            self.request.response.setStatus(400)
+            return {"error": "Invalid JSON data"}
+        position = data.get("position")
+        if position is not None and (not isinstance(position, int) or position < 0):
+            self.request.response.setStatus(400)
+            return {"error": "position must be a non negative integer"}
+
+        try:
+            blocks, layout = insert_section(
+                section, self.context, position=position, replace=data.get("replace")
+            )
+        except KeyError:
+            self.request.response.setStatus(400)
+            return {"error": "Block to replace not found"}
+        return {
+            "blocks": blocks,
+            "blocks_layout": layout,
+            "removed": [data["replace"]] if data.get("replace") else [],
+        }
 
     def delete_section(self):
         """Delete a custom section."""
         if not self.params:
             self.request.response.setStatus(400)
             return {"error": "Section ID is required"}
-        
+
         section_id = self.params[0]
-        sections = self.get_custom_sections()
-        
-        if section_id not in sections:
+        library = get_library()
+
+        if library is None or library.remove(section_id) is None:
             self.request.response.setStatus(404)
             return {"error": "Section not found"}
-        
-        del sections[section_id]
-        self.save_custom_sections(sections)
-        
-        return {"message": "Section deleted successfully", "id": section_id}
\ No newline at end of file
+
+        return {"message": "Section deleted successfully", "id": section_id}
+
+
+class CustomSectionsExport(Service):
+    """Stream all custom sections as NDJSON, one section per line."""
+
+    def render(self):
+        self.check_permission()
+        response = self.request.response
+        response.setHeader("Content-Type", "application/x-ndjson")
+        response.setHeader(
+            "Content-Disposition", 'attachment; filename="custom-sections.ndjson"'
+        )
+        for line in export_sections(get_library()):
+            response.write(line)
+        return b""
+
+
+class CustomSectionsImport(Service):
+    """Import custom sections from an NDJSON request body.
+
+    ``policy`` decides what happens to sections whose id exists already:
+    ``skip`` (default), ``overwrite`` or ``rename``. ``new_ids=1`` gives
+    every imported section a new id.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        alsoProvides(request, IDisableCSRFProtection)
+
+    def reply(self):
+        form = self.request.form
+        policy = form.get("policy") or SKIP
+        if policy not in POLICIES:
+            self.request.response.setStatus(400)
+            return {"error": f"policy must be one of {', '.join(POLICIES)}"}
+
+        error = check_write_limit(self.request)
+        if error:
+            return error
+
+        body = self.request.get("BODYFILE")
+        if body is None:
+            self.request.response.setStatus(400)
+            return {"error": "NDJSON body is required"}
+        body.seek(0)
+        return import_sections(
+            get_library(create=True),
+            body,
+            policy=policy,
+            new_ids=form.get("new_ids") in ("1", "true", "True", "yes"),
+        )
+
+
+@implementer(IPublishTraverse)
+class CustomSectionImage(Service):
+    """Serve an image taken out of the data of a custom section.
+
+    Image URLs contain the hash of the image, so they can be cached
+    forever.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        self.params = []
+
+    def publishTraverse(self, request, name):
+        self.params.append(name)
+        return self
+
+    def render(self):
+        self.check_permission()
+        library = get_library()
+        image = None
+        if library is not None and library.images is not None and self.params:
+            image = library.images.get(self.params[0])
+        response = self.request.response
+        if image is None:
+            response.setStatus(404)
+            response.setHeader("Content-Type", self.content_type)
+            return json.dumps({"error": "Image not found"})
+
+        etag = f'"{self.params[0]}"'
+        response.setHeader("ETag", etag)
+        response.setHeader("Cache-Control", "public, max-age=31536000, immutable")
+        if self.request.getHeader("If-None-Match") == etag:
+            response.setStatus(304)
+            return b""
+        response.setHeader("Content-Type", image.content_type)
+        response.setHeader("Content-Length", str(image.size))
+        response.setHeader("X-Content-Type-Options", "nosniff")
+        if image.content_type.lower() not in IMAGE_TYPES:
+            # Stored before only raster images were
+            response.setHeader("Content-Disposition", "attachment")
+        return filestream_iterator(image.blob.committed(), "rb")
@@ -0,0 +1,59 @@
+"""Apply design values to a whole subtree."""
+
+from lunasites.design_apply import apply_design
+from lunasites.design_apply import BATCH_SIZE
+from lunasites.ratelimit import check_write_limit
+from plone.protect.interfaces import IDisableCSRFProtection
+from plone.restapi.deserializer import json_body
+from plone.restapi.services import Service
+from zope.interface import alsoProvides
+
+
+class DesignApplyPost(Service):
+    """Set or clear design fields on the content below the context.
+
+    The body holds the ``patch`` of design fields and optionally the
+    ``portal_types`` and ``depth`` of the objects to change,
+    ``only_overrides`` to change only objects setting a patched field and
+    ``batch_size``. The whole subtree changes in one transaction, use the
+    design_apply script for subtrees too big for a request.
+    """
+
+    def __init__(self, context, request):
+        super().__init__(context, request)
+        alsoProvides(request, IDisableCSRFProtection)
+
+    def reply(self):
+        try:
+            data = json_body(self.request)
+        except Exception:
+            self.request.response.setStatus(400)
+            return {"error": "Invalid JSON data"}
+        if not isinstance(data, dict):
+            self.request.response.setStatus(400)
+            return {"error": "The body must be a JSON object"}
+        depth = data.get("depth")
+        batch_size = data.get("batch_size") or BATCH_SIZE
+        if depth is not None and not isinstance(depth, int):
+            self.request.response.setStatus(400)
+            return {"error": "depth must be a number"}
+        if not isinstance(batch_size, int) or batch_size < 1:
+            self.request.response.setStatus(400)
+            return {"error": "batch_size must be a positive number"}
+
+        error = check_write_limit(self.request)
+        if error:
+            return error
+
+        try:
+            return apply_design(
+                self.context,
+                data.get("patch"),
+                portal_types=data.get("portal_types"),
+                depth=depth,
+                only_overrides=bool(data.get("only_overrides")),
+                batch_size=batch_size,
+            )
+        except ValueError as error:
+            self.request.response.setStatus(400)
+            return {"error": str(error)}
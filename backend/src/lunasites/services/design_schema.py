@@ -1,5 +1,8 @@
-import json
-from plone import api
+from lunasites.presets import as_design
+from lunasites.presets import get_preset_store
+from lunasites.services.utils import batch_results
+from lunasites.services.utils import is_not_modified
+from lunasites.services.utils import make_etag
 from plone.restapi.services import Service
 from zope.interface import implementer
 from zope.publisher.interfaces import IPublishTraverse
@@ -21,56 +24,35 @@ class DesignSchemaService(Service):
         """Return design schema presets and configurations"""
         
         # This service provides design schema presets that can be used
-        # by the frontend color schema widget
-        design_presets = [
-            {
-                'id': 'default',
-                'name': 'Default',
-                'colors': {
-                    'background_color': '#ffffff',
-                    'primary_color': '#0070ae',
-                    'secondary_color': '#e73d5c',
-                    'text_color': '#333333',
-                    'accent_color': '#6bb535',
-                }
-            },
-            {
-                'id': 'dark',
-                'name': 'Dark Mode',
-                'colors': {
-                    'background_color': '#1a1a1a',
-                    'primary_color': '#4a9eff',
-                    'secondary_color': '#ff6b9d',
-                    'text_color': '#ffffff',
-                    'accent_color': '#84d65a',
-                }
-            },
-            {
-                'id': 'corporate',
-                'name': 'Corporate Blue',
-                'colors': {
-                    'background_color': '#f8f9fa',
-                    'primary_color': '#003d7a',
-                    'secondary_color': '#dc3545',
-                    'text_color': '#212529',
-                    'accent_color': '#28a745',
-                }
-            },
-            {
-                'id': 'nature',
-                'name': 'Nature Green',
-                'colors': {
-                    'background_color': '#f1f8e9',
-                    'primary_color': '#2e7d32',
-                    'secondary_color': '#ff8f00',
-                    'text_color': '#1b5e20',
-                    'accent_color': '#4caf50',
-                }
-            }
-        ]
+        # by the frontend color schema widget. They come from the preset
+        # store shared with the color-schema service.
+        store = get_preset_store()
+        category = self.request.form.get("category")
+        preset_id = self.request.form.get("id") or (self.params[0] if self.params else None)
+
+        etag = make_etag(
+            store.etag, category, preset_id,
+            self.request.form.get("b_start"), self.request.form.get("b_size"),
+        )
+        if is_not_modified(self.request, etag):
+            return self.reply_no_content(status=304)
+
+        if preset_id:
+            preset = store.get(preset_id)
+            if preset is None:
+                self.request.response.setStatus(404)
+                return {'error': 'Preset not found'}
+            return as_design(preset)
+
+        presets, total, batching = batch_results(
+            self.request, store.query(category=category)
+        )
+        design_presets = [as_design(preset) for preset in presets]
         
-        return {
+        result = {
             'presets': design_presets,
+            'presets_total': total,
+            'facets': store.facets(),
             'available_fields': [
                 'background_color',
                 'primary_color', 
@@ -86,4 +68,7 @@ class DesignSchemaService(Service):
                 'dropdown_color',
                 'dropdown_font_color'
             ]
-        }
\ No newline at end of file
+        }
+        if batching:
+            result['batching'] = batching
+        return result
@@ -6,7 +6,16 @@ from zope.component import getUtility
 from zope.interface import implementer
 from zope.publisher.interfaces import IPublishTraverse
 from zope.security import checkPermission
-from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.behaviors.design_schema import get_color_display
+from lunasites.behaviors.design_schema import get_design_length
+from lunasites.behaviors.design_schema import get_design_value
+from lunasites.behaviors.design_schema import get_rendered_value
+from lunasites.behaviors.design_schema import get_shared_value
+from lunasites.behaviors.design_schema import LENGTH_FIELDS
+from lunasites.behaviors.design_schema import RENDERED_FIELDS
+from lunasites.lengths import parse_length
+from lunasites.links import resolve_tool_links
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
 from plone.namedfile.interfaces import IImageScaleTraversable
 
 
@@ -57,8 +66,12 @@ class SmartInheritService(Service):
             'hide_search_button'
         ]
         
+        raw = self.request.form.get("raw") in ("1", "true", "True", "yes")
         result_data = {}
         inherited_from = {}
+        lengths = {}
+        rendered = {}
+        display = {}
         
         # For each field, find the closest ancestor with a non-null value
         for field_name in fields_to_inherit:
@@ -66,6 +79,20 @@ class SmartInheritService(Service):
             
             if value is not None:
                 result_data[field_name] = self._serialize_field_value(value, field_name, source_obj)
+                if field_name in LENGTH_FIELDS:
+                    # Parsed when saved
+                    lengths[field_name] = get_design_length(source_obj, field_name)
+                if field_name in RENDERED_FIELDS:
+                    # Rendered when saved, the raw value only on request
+                    rendered[field_name] = get_rendered_value(source_obj, field_name)
+                    if not raw:
+                        del result_data[field_name]
+                if field_name == 'tools_header':
+                    # Final URLs of internal links, flagging broken ones
+                    shared = get_shared_value(source_obj, field_name)
+                    result_data[field_name] = resolve_tool_links(
+                        result_data[field_name], shared and shared.key
+                    )
                 if source_obj:
                     inherited_from[field_name] = {
                         "@id": source_obj.absolute_url(),
@@ -77,14 +104,18 @@ class SmartInheritService(Service):
         
         # Special handling for color_schema - check individual colors
         if 'color_schema' in result_data:
-            color_result, color_sources = self._get_smart_inherit_colors()
+            color_result, color_sources, display = self._get_smart_inherit_colors()
             result_data['color_schema'] = color_result
             if color_sources:
                 inherited_from['color_schema_details'] = color_sources
+            if color_result.get('toolbar_border_thickness'):
+                lengths['toolbar_border_thickness'] = parse_length(
+                    str(color_result['toolbar_border_thickness'])
+                )
 
         # Add view_type from current object only (no inheritance)
-        if IDesignSchema.providedBy(self.context):
-            current_view_type = getattr(self.context, 'view_type', None)
+        if IDesignSchemaMarker.providedBy(self.context):
+            current_view_type = get_design_value(self.context, 'view_type')
             result_data['view_type'] = self._serialize_field_value(current_view_type, 'view_type', self.context) if current_view_type else None
 
         return {
@@ -93,7 +124,10 @@ class SmartInheritService(Service):
                 "@id": self.context.absolute_url(),
                 "title": getattr(self.context, 'title', '')
             },
-            "field_sources": inherited_from  # Show which object each field came from
+            "field_sources": inherited_from,  # Show which object each field came from
+            "lengths": lengths,  # Number, unit and type of the length fields
+            "rendered": rendered,  # HTML and plain text of the rich text fields
+            "display": display,  # Colors as typed, for colors not typed in hex
         }
 
     def _find_closest_field_value(self, field_name):
@@ -105,11 +139,11 @@ class SmartInheritService(Service):
                 continue
             
             # Check if object provides the behavior
-            if not IDesignSchema.providedBy(obj):
+            if not IDesignSchemaMarker.providedBy(obj):
                 continue
             
             # Get the field value
-            value = getattr(obj, field_name, None)
+            value = get_design_value(obj, field_name)
             
             # Check if value is meaningful (not null, empty dict, empty list, etc.)
             if self._is_meaningful_value(value, field_name):
@@ -138,6 +172,7 @@ class SmartInheritService(Service):
         
         result_colors = {}
         color_sources = {}
+        color_display = {}
         
         # For each color, find the closest ancestor with that color defined
         for color_name in color_fields:
@@ -150,8 +185,11 @@ class SmartInheritService(Service):
                         "@id": source_obj.absolute_url(),
                         "title": getattr(source_obj, 'title', '')
                     }
+                    typed = get_color_display(source_obj).get(color_name)
+                    if typed:
+                        color_display[color_name] = typed
         
-        return result_colors, color_sources
+        return result_colors, color_sources, color_display
 
     def _find_closest_color_value(self, color_name):
         """Find the closest ancestor with a specific color defined"""
@@ -162,11 +200,11 @@ class SmartInheritService(Service):
                 continue
             
             # Check if object provides the behavior
-            if not IDesignSchema.providedBy(obj):
+            if not IDesignSchemaMarker.providedBy(obj):
                 continue
             
             # Get the color_schema field
-            color_schema = getattr(obj, 'color_schema', {})
+            color_schema = get_design_value(obj, 'color_schema', {})
             
             # Check if this specific color is defined and not empty
             if color_schema and isinstance(color_schema, dict):
@@ -0,0 +1,61 @@
+"""Suggest a color schema out of the dominant colors of the logo."""
+
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.palette import get_palette
+from lunasites.palette import PRESET_MATCH_THRESHOLD
+from lunasites.palette import schedule_palette
+from lunasites.palette import suggest_color_schema
+from lunasites.presets import as_design
+from lunasites.presets import get_preset_store
+from plone.restapi.services import Service
+from zope.security import checkPermission
+
+
+class LogoPaletteGet(Service):
+    """Return the logo palette and the color schema suggested from it.
+
+    The palette is computed in the background; while it is not ready the
+    service answers with 202 and the client should ask again.
+    """
+
+    def reply(self):
+        image, source = self._find_logo()
+        if image is None:
+            self.request.response.setStatus(404)
+            return {"error": "No logo image"}
+
+        palette = get_palette(image)
+        if palette is None:
+            schedule_palette(image)
+            self.request.response.setStatus(202)
+            return {"status": "pending"}
+
+        suggestion = suggest_color_schema(palette)
+        nearest = get_preset_store().nearest(suggestion, k=3) if suggestion else []
+        matches_preset = bool(nearest) and nearest[0][1] <= PRESET_MATCH_THRESHOLD
+        return {
+            "status": "ready",
+            "from": {
+                "@id": source.absolute_url(),
+                "title": getattr(source, "title", ""),
+            },
+            "palette": palette,
+            "suggested_color_schema": suggestion,
+            "nearest_presets": [
+                {**as_design(preset), "distance": round(score, 4)}
+                for preset, score in nearest
+            ],
+            "matches_preset": matches_preset,
+        }
+
+    def _find_logo(self):
+        """Find the logo the context shows, the closest one in its parents"""
+        for obj in self.context.aq_chain:
+            if not IDesignSchemaMarker.providedBy(obj):
+                continue
+            if not checkPermission("zope2.View", obj):
+                continue
+            image = getattr(obj, "logo_image", None)
+            if image is not None:
+                return image, obj
+        return None, None
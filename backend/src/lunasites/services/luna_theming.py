@@ -2,6 +2,10 @@
 
 import json
 import logging
+from lunasites.colors import normalize_color_schema
+from lunasites.lengths import parse_length
+from lunasites.lengths import parse_lengths
+from lunasites.ratelimit import check_write_limit
 from plone import api
 from plone.registry.interfaces import IRegistry
 from plone.restapi.interfaces import IExpandableElement
@@ -13,6 +17,37 @@ from zope.interface import implementer, Interface, alsoProvides
 logger = logging.getLogger(__name__)
 
 
+def theming_lengths(data):
+    """Parse the lengths of a theming configuration.
+
+    Returns the parsed lengths, laid out like the configuration, and the
+    dotted paths of the invalid ones with an error message.
+    """
+    lengths, errors = {}, {}
+
+    def parse(path, value, parser=parse_length):
+        if value in (None, ""):
+            return None
+        parsed = parser(str(value))
+        if parsed is None:
+            errors[path] = f"Invalid length: {value}"
+        return parsed
+
+    font_sizes = (data.get("fonts") or {}).get("font_sizes")
+    if isinstance(font_sizes, dict):
+        lengths["font_sizes"] = {
+            size: parse(f"fonts.font_sizes.{size}", value)
+            for size, value in font_sizes.items()
+        }
+    buttons = data.get("buttons") or {}
+    for prop in ("border_radius", "padding"):
+        if prop in buttons:
+            lengths[prop] = parse(f"buttons.{prop}", buttons[prop], parse_lengths)
+    if "container_width" in data:
+        lengths["container_width"] = parse("container_width", data["container_width"])
+    return lengths, errors
+
+
 class LunaThemingGet(Service):
     """GET Luna Theming configuration."""
 
@@ -33,6 +68,10 @@ class LunaThemingGet(Service):
         # Ensure we have default structure
         if not theming_data:
             theming_data = self._get_default_theming()
+
+        # Parsed when saved, configurations saved before lack them
+        if 'lengths' not in theming_data:
+            theming_data['lengths'] = theming_lengths(theming_data)[0]
             
         return {
             'luna_theming': theming_data,
@@ -83,6 +122,10 @@ class LunaThemingPost(Service):
     def reply(self):
         """Update Luna Theming configuration."""
         logger.info("LunaThemingPost.reply() called")
+
+        error = check_write_limit(self.request)
+        if error:
+            return error
         
         data = self.request.get('BODY', '{}')
         logger.info(f"Raw BODY data: {data}")
@@ -96,8 +139,16 @@ class LunaThemingPost(Service):
         logger.info(f"Theming data: {theming_data}")
         
         # Validate and sanitize theming data
-        theming_data = self._validate_theming_data(theming_data)
+        theming_data, errors = self._validate_theming_data(theming_data)
         logger.info(f"Validated theming data: {theming_data}")
+        if errors:
+            self.request.response.setStatus(400)
+            return {'error': 'Invalid colors', 'errors': errors}
+
+        _lengths, errors = theming_lengths(theming_data)
+        if errors:
+            self.request.response.setStatus(400)
+            return {'error': 'Invalid lengths', 'errors': errors}
         
         # Save to registry - merge with existing data
         registry = getUtility(IRegistry)
@@ -117,6 +168,7 @@ class LunaThemingPost(Service):
         
         # Merge with existing data
         merged_data = {**existing_data, **theming_data}
+        merged_data['lengths'] = theming_lengths(merged_data)[0]
         logger.info(f"Merged data: {merged_data}")
         
         registry['lunasites.luna_theming_config'] = json.dumps(merged_data)
@@ -131,17 +183,26 @@ class LunaThemingPost(Service):
         }
     
     def _validate_theming_data(self, data):
-        """Validate and sanitize theming data."""
+        """Validate and sanitize theming data.
+
+        Returns the validated data and the dotted paths of the invalid
+        colors with an error message.
+        """
         validated = {}
+        errors = {}
         
-        # Validate colors section
+        # Validate colors section, keeping colors typed in another notation
+        # than hex as they were typed for editors
         if 'colors' in data:
-            colors = data['colors']
-            validated['colors'] = {}
+            colors = data['colors'] if isinstance(data['colors'], dict) else {}
             color_fields = ['background_color', 'neutral_color', 'primary_color', 'secondary_color', 'tertiary_color']
-            for field in color_fields:
-                if field in colors and self._is_valid_color(colors[field]):
-                    validated['colors'][field] = colors[field]
+            validated['colors'], color_errors, display = normalize_color_schema(
+                {field: colors[field] for field in color_fields if field in colors}
+            )
+            validated['colors_display'] = display
+            errors.update(
+                (f"colors.{field}", error) for field, error in color_errors.items()
+            )
         
         # Validate fonts section
         if 'fonts' in data:
@@ -181,28 +242,11 @@ class LunaThemingPost(Service):
         if 'logo_config' in data:
             validated['logo_config'] = data['logo_config']
         
-        # Pass through container_width without validation
+        # Pass through container_width, checked with the other lengths
         if 'container_width' in data:
             validated['container_width'] = data['container_width']
         
-        return validated
-    
-    def _is_valid_color(self, color):
-        """Check if color is valid hex or rgba."""
-        if not color:
-            return False
-        
-        # Check hex color
-        if color.startswith('#'):
-            hex_part = color[1:]
-            if len(hex_part) in [3, 6] and all(c in '0123456789ABCDEFabcdef' for c in hex_part):
-                return True
-        
-        # Check rgba color
-        if color.startswith('rgba(') and color.endswith(')'):
-            return True
-            
-        return False
+        return validated, errors
 
 
 @implementer(IExpandableElement)
@@ -0,0 +1,34 @@
+"""Helpers shared by the lunasites REST API services."""
+
+from plone.restapi.batching import HypermediaBatch
+
+import hashlib
+import json
+
+
+def make_etag(*parts):
+    """Build a weak ETag out of JSON serializable parts."""
+    digest = hashlib.blake2b(digest_size=10)
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+    return f'W/"{digest.hexdigest()}"'
+
+
+def is_not_modified(request, etag):
+    """Set the ETag header and tell whether the client copy is still fresh."""
+    request.response.setHeader("ETag", etag)
+    if_none_match = request.getHeader("If-None-Match") or ""
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def batch_results(request, items):
+    """Batch items with b_start/b_size when the client asked for it.
+
+    Returns the items of the current page, the total number of items and
+    the hypermedia batching links (None when everything fits in one page).
+    """
+    if "b_size" not in request.form and "b_start" not in request.form:
+        return list(items), len(items), None
+    batch = HypermediaBatch(request, items)
+    return list(batch), batch.items_total, batch.links
@@ -0,0 +1,15 @@
+"""Counters of the write limits."""
+
+from lunasites.ratelimit import get_counters
+from lunasites.ratelimit import get_settings
+from plone.restapi.services import Service
+
+
+class WriteLimitsGet(Service):
+    """Return the write limit settings and the counters of this process."""
+
+    def reply(self):
+        return {
+            "settings": get_settings(),
+            "counters": get_counters(),
+        }
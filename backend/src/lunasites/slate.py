@@ -0,0 +1,113 @@
+"""Rendering of Slate rich text values to HTML and plain text.
+
+Only the elements and marks of the Volto Slate editor are rendered, with
+no attributes but the href of links to http(s), mailto and site URLs, and
+all text escaped, so the HTML is safe to insert as it is.
+"""
+
+from html import escape
+
+import re
+
+
+# Slate element type -> HTML tag
+ELEMENTS = {
+    "p": "p",
+    "h1": "h1",
+    "h2": "h2",
+    "h3": "h3",
+    "h4": "h4",
+    "h5": "h5",
+    "h6": "h6",
+    "blockquote": "blockquote",
+    "ul": "ul",
+    "ol": "ol",
+    "li": "li",
+    "strong": "strong",
+    "b": "strong",
+    "em": "em",
+    "i": "em",
+    "u": "u",
+    "s": "s",
+    "del": "del",
+    "sub": "sub",
+    "sup": "sup",
+    "code": "code",
+    "span": "span",
+}
+
+# Marks of text leaves -> HTML tag
+MARKS = {
+    "bold": "strong",
+    "italic": "em",
+    "underline": "u",
+    "strikethrough": "s",
+    "code": "code",
+}
+
+LINK_TYPES = ("link", "a")
+
+# Elements separated by a space in plain text
+BLOCKS = frozenset(
+    ("p", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "li", "ul", "ol")
+)
+
+_safe_url = re.compile(r"(https?:|mailto:|/|\.\.?/|#|resolveuid/)", re.IGNORECASE)
+
+
+def render_slate(value):
+    """Return the HTML and plain text of a Slate value.
+
+    Returns a mapping with ``html`` and ``text``, None for empty values.
+    """
+    if isinstance(value, dict):
+        value = [value]
+    if not isinstance(value, list) or not value:
+        return None
+    html = "".join(_html(node) for node in value)
+    text = " ".join("".join(part for node in value for part in _text(node)).split())
+    if not text:
+        return None
+    return {"html": html, "text": text}
+
+
+def _html(node):
+    if not isinstance(node, dict):
+        return ""
+    if "text" in node and "children" not in node:
+        html = escape(str(node["text"] or "")).replace("\n", "<br>")
+        for mark, tag in MARKS.items():
+            if node.get(mark):
+                html = f"<{tag}>{html}</{tag}>"
+        return html
+    children = "".join(_html(child) for child in node.get("children") or ())
+    node_type = node.get("type")
+    if node_type in LINK_TYPES:
+        url = _link_url(node)
+        if url is None:
+            return children
+        return f'<a href="{escape(url)}">{children}</a>'
+    tag = ELEMENTS.get(node_type)
+    return f"<{tag}>{children}</{tag}>" if tag else children
+
+
+def _link_url(node):
+    data = node.get("data")
+    if not isinstance(data, dict):
+        data = {}
+    url = data.get("url") or data.get("href") or node.get("url")
+    if isinstance(url, str) and _safe_url.match(url.strip()):
+        return url.strip()
+    return None
+
+
+def _text(node):
+    if not isinstance(node, dict):
+        return
+    if "text" in node and "children" not in node:
+        yield str(node["text"] or "")
+        return
+    for child in node.get("children") or ():
+        yield from _text(child)
+    if node.get("type") in BLOCKS:
+        yield " "
@@ -0,0 +1,46 @@
+"""Keep design schema values in their canonical form."""
+
+from Acquisition import aq_base
+from lunasites.behaviors.design_schema import canonical_colors
+from lunasites.behaviors.design_schema import get_design_value
+from lunasites.behaviors.design_schema import release_design_values
+from lunasites.behaviors.design_schema import set_design_value
+from lunasites.behaviors.design_schema import share_design_values
+from lunasites.design_reindex import schedule_reindex
+
+
+def normalize_design_colors(obj, event):
+    """Store the colors of the object's color schema in canonical form.
+
+    Values are normalized when they are set, this catches the ones set
+    as attributes, keeping the colors as typed as well.
+    """
+    color_schema = get_design_value(obj, "color_schema")
+    if not color_schema or not isinstance(color_schema, dict):
+        return
+    normalized, _display = canonical_colors(color_schema)
+    if normalized != color_schema:
+        set_design_value(obj, "color_schema", normalized)
+
+
+def share_added_design_values(obj, event):
+    """Share the design values of added objects, copies included."""
+    share_design_values(obj)
+
+
+def release_removed_design_values(obj, event):
+    release_design_values(obj)
+
+
+def reindex_design_descendants(obj, event):
+    """Reindex the effective design values of the descendants of an object.
+
+    Only done when the design of the object changed, the way
+    reindexObjectSecurity updates the inherited security of descendants,
+    in the background once the edit is committed.
+    """
+    base = aq_base(obj)
+    if not getattr(base, "_v_design_changed", False):
+        return
+    del base._v_design_changed
+    schedule_reindex(obj)
@@ -0,0 +1,23 @@
+"""Schedule the logo palette extraction when a logo is uploaded."""
+
+from Acquisition import aq_base
+from lunasites.palette import schedule_palette
+
+import transaction
+
+
+def schedule_logo_palette(obj, event):
+    """Queue the palette of the object's logo once the transaction commits.
+
+    The image only gets its oid and blob file on commit, so the work is
+    handed to the thread pool from an after-commit hook.
+    """
+    image = getattr(aq_base(obj), "logo_image", None)
+    if image is None:
+        return
+    transaction.get().addAfterCommitHook(_schedule_after_commit, args=(image,))
+
+
+def _schedule_after_commit(success, image):
+    if success:
+        schedule_palette(image)
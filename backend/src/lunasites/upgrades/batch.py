@@ -0,0 +1,151 @@
+"""Batched, resumable migrations for the lunasites upgrade steps.
+
+A migration visits its items (usually content found in the catalog) in a
+fixed order and commits after every batch, together with a checkpoint: the
+key of the last visited item, kept in an annotation of the portal. Run
+again after an interruption, it goes on after the checkpoint. Batches
+failing with a conflict are retried, and a pause between batches leaves
+room for the requests of a live site.
+
+The batch size and pause are set with the LUNASITES_UPGRADE_BATCH_SIZE and
+LUNASITES_UPGRADE_PAUSE (seconds) environment variables.
+"""
+
+from BTrees.OOBTree import OOBTree
+from lunasites import logger
+from plone import api
+from Products.CMFCore.indexing import processQueue
+from ZODB.POSException import ConflictError
+from zope.annotation.interfaces import IAnnotations
+
+import os
+import time
+import transaction
+
+
+# Annotation of the portal mapping migration names to their checkpoint
+ANNOTATION_KEY = "lunasites.upgrades"
+
+BATCH_SIZE = int(os.getenv("LUNASITES_UPGRADE_BATCH_SIZE") or 500)
+PAUSE = float(os.getenv("LUNASITES_UPGRADE_PAUSE") or 0)
+RETRIES = 3
+
+# Savepoints instead of commits, for the test layers
+COMMIT = True
+
+
+def _checkpoints(create=False):
+    annotations = IAnnotations(api.portal.get())
+    checkpoints = annotations.get(ANNOTATION_KEY)
+    if checkpoints is None and create:
+        checkpoints = annotations[ANNOTATION_KEY] = OOBTree()
+    return checkpoints
+
+
+def get_checkpoint(name):
+    """Return the key of the last item an unfinished migration visited."""
+    checkpoints = _checkpoints()
+    return None if checkpoints is None else checkpoints.get(name)
+
+
+def clear_checkpoint(name):
+    """Forget where an unfinished migration stopped."""
+    checkpoints = _checkpoints()
+    if checkpoints is not None and name in checkpoints:
+        del checkpoints[name]
+
+
+def run_batched(
+    name, items, visit, batch_size=None, pause=None, commit=True, progress=None
+):
+    """Visit items in batches, committing a checkpoint after every batch.
+
+    `items` are (key, get) pairs in ascending key order, `get` returning
+    the item to visit, and `visit` returns whether it changed the item.
+    Items up to the checkpoint of an earlier run of the migration called
+    `name` are skipped. Without `commit` a savepoint is made after every
+    batch instead, and `progress` is called with the report after every
+    batch.
+
+    Returns the report: the number of items visited, the ones changed and
+    the checkpoint the migration resumed after.
+    """
+    batch_size = batch_size or BATCH_SIZE
+    pause = PAUSE if pause is None else pause
+    checkpoint = get_checkpoint(name)
+    report = {"visited": 0, "changed": 0, "resumed_after": checkpoint}
+    batch = []
+    for key, get in items:
+        if checkpoint is not None and key <= checkpoint:
+            continue
+        batch.append((key, get))
+        if len(batch) == batch_size:
+            _run_batch(name, batch, visit, report, commit, progress)
+            batch = []
+            if pause:
+                time.sleep(pause)
+    if batch:
+        _run_batch(name, batch, visit, report, commit, progress)
+    if get_checkpoint(name) is not None:
+        clear_checkpoint(name)
+        _commit(commit)
+    return report
+
+
+def _run_batch(name, batch, visit, report, commit=True, progress=None):
+    for attempt in range(RETRIES + 1):
+        changed = 0
+        try:
+            for _key, get in batch:
+                if visit(get()):
+                    changed += 1
+            _checkpoints(create=True)[name] = batch[-1][0]
+            _commit(commit)
+        except ConflictError:
+            if not commit:
+                # The batch can't be retried without the rest of the transaction
+                raise
+            transaction.abort()
+            if attempt == RETRIES:
+                raise
+            logger.info(f"{name}: conflict, retrying the batch")
+            continue
+        break
+    report["visited"] += len(batch)
+    report["changed"] += changed
+    if progress is not None:
+        progress(report)
+    else:
+        logger.info(f"{name}: visited {report['visited']} items")
+    api.portal.get()._p_jar.cacheGC()
+
+
+def _commit(commit=True):
+    if commit and COMMIT:
+        transaction.commit()
+    else:
+        # Index now instead of keeping all objects queued until the end
+        processQueue()
+        transaction.savepoint(optimistic=True)
+
+
+def catalog_items(**query):
+    """Return the (path, get) items of the content found with a query.
+
+    Items are in path order, ancestors before their descendants.
+    """
+    catalog = api.portal.get_tool("portal_catalog")
+    brains = catalog.unrestrictedSearchResults(**query)
+    items = [(tuple(brain.getPath().split("/")), brain) for brain in brains]
+    items.sort(key=lambda item: item[0])
+    return [(path, brain._unrestrictedGetObject) for path, brain in items]
+
+
+def migrate_content(name, visit, batch_size=None, pause=None, **query):
+    """Visit the content found with a catalog query in resumable batches.
+
+    See run_batched.
+    """
+    return run_batched(
+        name, catalog_items(**query), visit, batch_size=batch_size, pause=pause
+    )
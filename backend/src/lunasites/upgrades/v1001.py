@@ -0,0 +1,11 @@
+"""Move custom sections out of the registry into their own storage."""
+
+from lunasites import logger
+from lunasites.sections.storage import migrate_registry_sections
+from plone import api
+
+
+def migrate_custom_sections(setup_tool):
+    """Store every custom section as its own object in the section library."""
+    count = migrate_registry_sections(api.portal.get())
+    logger.info(f"Migrated {count} custom sections out of the registry")
@@ -0,0 +1,32 @@
+"""Build the full-text index of the custom sections."""
+
+from lunasites import logger
+from lunasites.sections.search import SectionIndex
+from lunasites.sections.storage import get_library
+from lunasites.upgrades.batch import get_checkpoint
+from lunasites.upgrades.batch import run_batched
+from plone import api
+
+
+NAME = "index_custom_sections"
+
+
+def index_custom_sections(setup_tool):
+    """Index the sections stored before the full-text index existed."""
+    library = get_library(api.portal.get())
+    if library is None:
+        return
+    if get_checkpoint(NAME) is None:
+        library.text_index = SectionIndex()
+    index = library.text_index
+
+    def visit(section):
+        index.index(section)
+        return True
+
+    items = (
+        (section_id, lambda section_id=section_id: library.sections[section_id])
+        for section_id in library.sections
+    )
+    report = run_batched(NAME, items, visit)
+    logger.info(f"Indexed {report['visited']} custom sections")
@@ -0,0 +1,16 @@
+"""Index which custom sections pages use."""
+
+from lunasites import logger
+from plone import api
+
+
+def add_custom_sections_index(setup_tool):
+    """Add the custom_sections index.
+
+    Only blocks inserted from now on are tagged with their section, so the
+    index starts empty and no content has to be reindexed.
+    """
+    catalog = api.portal.get_tool("portal_catalog")
+    if "custom_sections" not in catalog.indexes():
+        catalog.addIndex("custom_sections", "KeywordIndex")
+        logger.info("Added the custom_sections index")
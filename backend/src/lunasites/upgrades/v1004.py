@@ -0,0 +1,20 @@
+"""Add the settings of the write limits."""
+
+from lunasites.ratelimit import SETTINGS
+from plone.registry import field
+from plone.registry import Record
+from plone.registry.interfaces import IRegistry
+from zope.component import getUtility
+
+
+def add_write_limit_settings(setup_tool):
+    """Add the write limit records, without touching the other records."""
+    registry = getUtility(IRegistry)
+    for name, default in SETTINGS.items():
+        if name in registry.records:
+            continue
+        if isinstance(default, float):
+            registry_field = field.Float(title=name, min=0.0)
+        else:
+            registry_field = field.Int(title=name, min=1)
+        registry.records[name] = Record(registry_field, default)
@@ -0,0 +1,38 @@
+"""Move the design schema fields into their own record."""
+
+from lunasites import logger
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.behaviors.design_schema import move_design_fields
+from lunasites.upgrades.batch import migrate_content
+from plone import api
+
+
+def reindex_design_marker(setup_tool):
+    """Catalog content with the design schema under its marker interface.
+
+    Before 1005 the behavior marked content with IDesignSchema itself, so
+    existing content is not found by the marker the later steps query.
+    """
+    catalog = api.portal.get_tool("portal_catalog")
+
+    def visit(obj):
+        catalog.catalog_object(obj, idxs=["object_provides"], update_metadata=0)
+        return True
+
+    report = migrate_content(
+        "reindex_design_marker",
+        visit,
+        object_provides=IDesignSchema.__identifier__,
+    )
+    logger.info(f"Reindexed the design marker of {report['visited']} objects")
+
+
+def migrate_design_fields(setup_tool):
+    """Move design values stored as content attributes into design records."""
+    report = migrate_content(
+        "migrate_design_fields",
+        move_design_fields,
+        object_provides=IDesignSchemaMarker.__identifier__,
+    )
+    logger.info(f"Moved the design fields of {report['changed']} objects")
@@ -0,0 +1,16 @@
+"""Share identical design values between content objects."""
+
+from lunasites import logger
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.behaviors.design_schema import share_design_values
+from lunasites.upgrades.batch import migrate_content
+
+
+def share_existing_design_values(setup_tool):
+    """Store the design values of existing objects in the design value store."""
+    report = migrate_content(
+        "share_existing_design_values",
+        share_design_values,
+        object_provides=IDesignSchemaMarker.__identifier__,
+    )
+    logger.info(f"Shared the design values of {report['changed']} objects")
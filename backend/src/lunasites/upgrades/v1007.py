@@ -0,0 +1,40 @@
+"""Index the design schema of content."""
+
+from lunasites import logger
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.upgrades.batch import migrate_content
+from plone import api
+
+
+INDEXES = {
+    "view_type": "FieldIndex",
+    "design_overrides": "KeywordIndex",
+    "primary_color": "FieldIndex",
+    "background_color": "FieldIndex",
+}
+
+COLUMNS = ("design_schema",)
+
+
+def add_design_indexes(setup_tool):
+    """Add the design schema indexes and metadata and index existing content."""
+    catalog = api.portal.get_tool("portal_catalog")
+    added = [name for name in INDEXES if name not in catalog.indexes()]
+    for name in added:
+        catalog.addIndex(name, INDEXES[name])
+    for name in COLUMNS:
+        if name not in catalog.schema():
+            catalog.addColumn(name)
+
+    idxs = added or list(INDEXES)
+
+    def visit(obj):
+        catalog.catalog_object(obj, idxs=idxs, update_metadata=1)
+        return True
+
+    report = migrate_content(
+        "add_design_indexes",
+        visit,
+        object_provides=IDesignSchemaMarker.__identifier__,
+    )
+    logger.info(f"Indexed the design of {report['visited']} objects")
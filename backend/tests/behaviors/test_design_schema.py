@@ -0,0 +1,137 @@
+from lunasites.behaviors.design_schema import ANNOTATION_KEY
+from lunasites.behaviors.design_schema import get_design_record
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.upgrades.v1005 import migrate_design_fields
+from plone import api
+from zope.annotation.interfaces import IAnnotations
+
+import pytest
+
+
+class TestDesignRecord:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        with api.env.adopt_roles(["Manager"]):
+            self.page = api.content.create(
+                container=portal, type="Document", id="page", title="Page"
+            )
+
+    def test_values_are_stored_in_the_record(self):
+        assert IDesignSchemaMarker.providedBy(self.page)
+        design = IDesignSchema(self.page)
+        assert design.color_schema == {}
+        design.color_schema = {"primary_color": "#ffffff"}
+        design.navbar_width = "1200px"
+        design.tools_header = None
+        record = IAnnotations(self.page)[ANNOTATION_KEY]
+        assert record.color_schema.value == {"primary_color": "#ffffff"}
+        assert record.tools_header == []
+        assert design.navbar_width == "1200px"
+        assert "navbar_width" not in vars(self.page)
+
+    def test_defaults_are_not_shared(self, portal):
+        with api.env.adopt_roles(["Manager"]):
+            other = api.content.create(
+                container=portal, type="Document", id="other", title="Other"
+            )
+        IDesignSchema(self.page).tools_header = None
+        IDesignSchema(other).tools_header = None
+        IDesignSchema(self.page).tools_header.append({"title": "Contact"})
+        IDesignSchema(self.page).color_schema["primary_color"] = "#000000"
+        assert IDesignSchema(other).tools_header == []
+        assert IDesignSchema(other).color_schema == {}
+
+    def test_legacy_attributes(self):
+        self.page.navbar_width = "90%"
+        assert IDesignSchema(self.page).navbar_width == "90%"
+        IDesignSchema(self.page).navbar_width = "80%"
+        assert "navbar_width" not in vars(self.page)
+        assert IDesignSchema(self.page).navbar_width == "80%"
+
+    def test_migration(self):
+        self.page.color_schema = {"text_color": "#000000"}
+        self.page.hide_login_button = True
+        migrate_design_fields(None)
+        record = get_design_record(self.page)
+        assert record.color_schema.value == {"text_color": "#000000"}
+        assert record.hide_login_button is True
+        assert "color_schema" not in vars(self.page)
+        assert IDesignSchema(self.page).hide_login_button is True
+
+
+def test_rest_api_roundtrip(manager_request):
+    manager_request.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+    response = manager_request.patch(
+        "/doc",
+        json={"color_schema": {"primary_color": "#FFF"}, "navbar_width": "1200px"},
+    )
+    assert response.status_code == 204
+    data = manager_request.get("/doc").json()
+    assert data["color_schema"] == {"primary_color": "#ffffff"}
+    assert data["navbar_width"] == "1200px"
+
+
+def test_lengths(manager_request):
+    manager_request.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+    response = manager_request.patch("/doc", json={"navbar_width": "wide"})
+    assert response.status_code == 400
+    manager_request.patch(
+        "/doc",
+        json={
+            "navbar_width": "90vw",
+            "color_schema": {"toolbar_border_thickness": "2px"},
+        },
+    )
+    behavior = "lunasites.behaviors.design_schema.IDesignSchema"
+    response = manager_request.get(
+        "/doc/@design-schema-inherit", params={"expand.inherit.behaviors": behavior}
+    )
+    lengths = response.json()[behavior]["lengths"]
+    assert lengths["navbar_width"] == {"number": 90, "unit": "vw", "type": "relative"}
+    assert lengths["toolbar_border_thickness"]["unit"] == "px"
+
+
+def test_rendered_logo_text(manager_request):
+    manager_request.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+    logo_text = [
+        {"type": "p", "children": [{"text": "Luna ", "bold": True}, {"text": "<b>"}]}
+    ]
+    manager_request.patch("/doc", json={"logo_text": logo_text})
+    behavior = "lunasites.behaviors.design_schema.IDesignSchema"
+    response = manager_request.get(
+        "/doc/@design-schema-inherit", params={"expand.inherit.behaviors": behavior}
+    )
+    data = response.json()[behavior]
+    assert "logo_text" not in data["data"]
+    assert data["rendered"]["logo_text"] == {
+        "html": "<p><strong>Luna </strong>&lt;b&gt;</p>",
+        "text": "Luna <b>",
+    }
+    response = manager_request.get(
+        "/doc/@design-schema-inherit",
+        params={"expand.inherit.behaviors": behavior, "raw": "1"},
+    )
+    assert response.json()[behavior]["data"]["logo_text"] == logo_text
+
+
+def test_colors(manager_request):
+    manager_request.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+    response = manager_request.patch(
+        "/doc", json={"color_schema": {"primary_color": "#fff", "text_color": "bad"}}
+    )
+    assert response.status_code == 400
+    manager_request.patch(
+        "/doc",
+        json={"color_schema": {"primary_color": "rgb(255, 0, 0)", "text_color": "#000"}},
+    )
+    behavior = "lunasites.behaviors.design_schema.IDesignSchema"
+    response = manager_request.get(
+        "/doc/@design-schema-inherit", params={"expand.inherit.behaviors": behavior}
+    )
+    data = response.json()[behavior]
+    assert data["data"]["color_schema"] == {
+        "primary_color": "#ff0000",
+        "text_color": "#000000",
+    }
+    assert data["display"] == {"primary_color": "rgb(255, 0, 0)"}
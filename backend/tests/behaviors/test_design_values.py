@@ -0,0 +1,76 @@
+from lunasites.behaviors.design_schema import get_design_record
+from lunasites.behaviors.design_schema import get_shared_value
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.behaviors.design_schema import same_design_value
+from lunasites.design_values import get_value_store
+from lunasites.design_values import SharedValue
+from lunasites.upgrades.v1006 import share_existing_design_values
+from plone import api
+
+import pytest
+
+
+SCHEMA = {"primary_color": "#ffffff", "background_color": "#000000"}
+
+
+class TestSharedValues:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        with api.env.adopt_roles(["Manager"]):
+            self.pages = [
+                api.content.create(
+                    container=portal, type="Document", id=f"page-{i}", title="Page"
+                )
+                for i in range(3)
+            ]
+
+    def test_identical_values_are_stored_once(self):
+        for page in self.pages:
+            IDesignSchema(page).color_schema = dict(SCHEMA)
+        store = get_value_store()
+        assert len(store) == 1
+        shared = get_shared_value(self.pages[0], "color_schema")
+        assert all(
+            get_shared_value(page, "color_schema") is shared for page in self.pages
+        )
+        assert store.refcounts[shared.key] == 3
+        assert same_design_value(self.pages[0], self.pages[2], "color_schema")
+
+    def test_copy_on_write(self):
+        for page in self.pages:
+            IDesignSchema(page).color_schema = dict(SCHEMA)
+        value = IDesignSchema(self.pages[0]).color_schema
+        value["primary_color"] = "#ff0000"
+        assert IDesignSchema(self.pages[1]).color_schema == SCHEMA
+        IDesignSchema(self.pages[0]).color_schema = value
+        assert IDesignSchema(self.pages[0]).color_schema == value
+        assert IDesignSchema(self.pages[1]).color_schema == SCHEMA
+        assert not same_design_value(self.pages[0], self.pages[1], "color_schema")
+        assert len(get_value_store()) == 2
+
+    def test_unused_values_are_removed(self):
+        IDesignSchema(self.pages[0]).tools_header = [{"title": "Contact"}]
+        IDesignSchema(self.pages[1]).tools_header = [{"title": "Contact"}]
+        IDesignSchema(self.pages[0]).tools_header = []
+        assert len(get_value_store()) == 1
+        with api.env.adopt_roles(["Manager"]):
+            api.content.delete(self.pages[1])
+        assert len(get_value_store()) == 0
+
+    def test_copies_share_values(self):
+        IDesignSchema(self.pages[0]).color_schema = dict(SCHEMA)
+        with api.env.adopt_roles(["Manager"]):
+            copy = api.content.copy(self.pages[0], self.portal, "copy")
+        shared = get_shared_value(self.pages[0], "color_schema")
+        assert get_shared_value(copy, "color_schema") is shared
+        assert get_value_store().refcounts[shared.key] == 2
+
+    def test_migration(self):
+        for page in self.pages:
+            get_design_record(page, create=True).color_schema = dict(SCHEMA)
+        share_existing_design_values(None)
+        record = get_design_record(self.pages[0])
+        assert isinstance(record.color_schema, SharedValue)
+        assert len(get_value_store()) == 1
+        assert IDesignSchema(self.pages[2]).color_schema == SCHEMA
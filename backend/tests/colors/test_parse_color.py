@@ -0,0 +1,54 @@
+from lunasites.colors import normalize_color_schema
+from lunasites.colors import parse_color
+
+import pytest
+
+
+class TestParseColor:
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("#ffffff", "#ffffff"),
+            ("#FFF", "#ffffff"),
+            (" #abc ", "#aabbcc"),
+            ("#0070AEff", "#0070ae"),
+            ("#0070ae80", "#0070ae80"),
+            ("rgb(255,255,255)", "#ffffff"),
+            ("rgb(100%, 0%, 0%)", "#ff0000"),
+            ("rgba(0, 112, 174, 0.5)", "#0070ae80"),
+            ("rgb(255 255 255 / 50%)", "#ffffff80"),
+            ("hsl(0, 100%, 50%)", "#ff0000"),
+            ("hsl(120deg 100% 25%)", "#008000"),
+            ("White", "#ffffff"),
+            ("Transparent", "transparent"),
+            ("linear-gradient( 90deg ,#fff,  #000 )", "linear-gradient(90deg, #fff, #000)"),
+        ],
+    )
+    def test_canonical(self, value, expected):
+        assert parse_color(value) == expected
+
+    @pytest.mark.parametrize(
+        "value", ["", None, 12, "#12345", "#ggg", "rgb(1,2)", "hsl(1, 2, 3)", "bogus"]
+    )
+    def test_invalid(self, value):
+        assert parse_color(value) is None
+
+
+class TestNormalizeColorSchema:
+    def test_normalize(self):
+        schema, errors, display = normalize_color_schema(
+            {
+                "primary_color": "rgb(0,112,174)",
+                "text_color": "#FFF",
+                "accent_color": "nope",
+                "toolbar_border_thickness": "1px",
+                "secondary_color": "",
+            }
+        )
+        assert schema == {
+            "primary_color": "#0070ae",
+            "text_color": "#ffffff",
+            "toolbar_border_thickness": "1px",
+        }
+        assert list(errors) == ["accent_color"]
+        assert display == {"primary_color": "rgb(0,112,174)"}
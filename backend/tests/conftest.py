@@ -1,8 +1,14 @@
+from lunasites import design_reindex
+from lunasites import links
+from lunasites import ratelimit
 from lunasites.testing import ACCEPTANCE_TESTING
 from lunasites.testing import FUNCTIONAL_TESTING
 from lunasites.testing import INTEGRATION_TESTING
+from lunasites.upgrades import batch
 from pytest_plone import fixtures_factory
 
+import pytest
+
 
 pytest_plugins = ["pytest_plone"]
 
@@ -14,3 +20,27 @@ globals().update(
         (INTEGRATION_TESTING, "integration"),
     ))
 )
+
+
+@pytest.fixture(autouse=True)
+def reset_write_limits():
+    """Start every test with full write limit buckets."""
+    ratelimit.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_link_cache():
+    """Catalog counters of the test layers start over, so do the links."""
+    links.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def no_upgrade_commits(monkeypatch):
+    """Let upgrade steps make savepoints instead of committing the test layer."""
+    monkeypatch.setattr(batch, "COMMIT", False)
+
+
+@pytest.fixture(autouse=True)
+def no_background_reindex(monkeypatch):
+    """Reindex the design of descendants in the test transaction."""
+    monkeypatch.setattr(design_reindex, "IN_BACKGROUND", False)
@@ -0,0 +1,92 @@
+from lunasites import design_reindex
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.upgrades import batch
+from lunasites.upgrades.v1007 import add_design_indexes
+from plone import api
+from zope.event import notify
+from zope.lifecycleevent import ObjectModifiedEvent
+
+import pytest
+import transaction
+
+
+class TestDesignIndexes:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.catalog = api.portal.get_tool("portal_catalog")
+        with api.env.adopt_roles(["Manager"]):
+            self.folder = api.content.create(
+                container=portal, type="Document", id="folder", title="Folder"
+            )
+            self.page = api.content.create(
+                container=self.folder, type="Document", id="page", title="Page"
+            )
+        design = IDesignSchema(self.folder)
+        design.color_schema = {"primary_color": "#FF0000", "text_color": "#000"}
+        design.navbar_width = "1200px"
+        notify(ObjectModifiedEvent(self.folder))
+        design = IDesignSchema(self.page)
+        design.view_type = "homepage"
+        design.color_schema = {"background_color": "#eeeeee"}
+        notify(ObjectModifiedEvent(self.page))
+
+    def paths(self, **query):
+        return sorted(brain.getId for brain in self.catalog(**query))
+
+    def test_own_values(self):
+        assert self.paths(view_type="homepage") == ["page"]
+        assert self.paths(design_overrides="navbar_width") == ["folder"]
+        assert self.paths(design_overrides="color_schema") == ["folder", "page"]
+
+    def test_effective_colors(self):
+        assert self.paths(primary_color="#ff0000") == ["folder", "page"]
+        assert self.paths(background_color="#eeeeee") == ["page"]
+
+    def test_metadata(self):
+        (brain,) = self.catalog(getId="page")
+        assert brain.design_schema["view_type"] == "homepage"
+        assert brain.design_schema["navbar_width"] == "1200px"
+        assert brain.design_schema["color_schema"] == {
+            "primary_color": "#ff0000",
+            "text_color": "#000000",
+            "background_color": "#eeeeee",
+        }
+
+    def test_ancestor_changes_are_inherited(self):
+        IDesignSchema(self.folder).color_schema = {"primary_color": "#00ff00"}
+        notify(ObjectModifiedEvent(self.folder))
+        assert self.paths(primary_color="#00ff00") == ["folder", "page"]
+        (brain,) = self.catalog(getId="page")
+        assert brain.design_schema["color_schema"]["primary_color"] == "#00ff00"
+
+    def test_upgrade(self):
+        self.catalog.delIndex("view_type")
+        add_design_indexes(None)
+        assert self.paths(view_type="homepage") == ["page"]
+
+
+class TestBackgroundReindex:
+    @pytest.fixture(autouse=True)
+    def _setup(self, functional_portal, monkeypatch):
+        monkeypatch.setattr(design_reindex, "IN_BACKGROUND", True)
+        monkeypatch.setattr(batch, "COMMIT", True)
+        self.catalog = api.portal.get_tool("portal_catalog")
+        with api.env.adopt_roles(["Manager"]):
+            self.folder = api.content.create(
+                container=functional_portal, type="Document", id="folder"
+            )
+            api.content.create(container=self.folder, type="Document", id="page")
+        transaction.commit()
+
+    def test_reindexed_after_commit(self):
+        IDesignSchema(self.folder).color_schema = {"primary_color": "#00ff00"}
+        notify(ObjectModifiedEvent(self.folder))
+        assert [brain.getId for brain in self.catalog(primary_color="#00ff00")] == [
+            "folder"
+        ]
+        transaction.commit()
+        design_reindex.wait()
+        transaction.begin()
+        assert sorted(
+            brain.getId for brain in self.catalog(primary_color="#00ff00")
+        ) == ["folder", "page"]
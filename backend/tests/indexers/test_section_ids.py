@@ -0,0 +1,14 @@
+from lunasites.indexers.custom_sections import section_ids
+
+
+def test_section_ids():
+    blocks = {
+        "a": {"@type": "slate", "custom_section": "s1"},
+        "b": {
+            "@type": "gridBlock",
+            "blocks": {"c": {"@type": "slate", "custom_section": "s2"}},
+            "custom_section": "s1",
+        },
+        "d": {"@type": "slate"},
+    }
+    assert section_ids(blocks) == ["s1", "s2"]
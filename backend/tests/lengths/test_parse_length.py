@@ -0,0 +1,73 @@
+from lunasites.colors import normalize_color_schema
+from lunasites.lengths import is_valid_length
+from lunasites.lengths import parse_length
+from lunasites.lengths import parse_lengths
+
+import pytest
+
+
+class TestParseLength:
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("1200px", (1200, "px", "fixed")),
+            ("1200", (1200, "px", "fixed")),
+            (" 90% ", (90, "%", "relative")),
+            ("1.5REM", (1.5, "rem", "relative")),
+            (".5in", (0.5, "in", "fixed")),
+            ("-2vw", (-2, "vw", "relative")),
+            ("auto", (None, "auto", None)),
+            ("calc(100% - 2rem)", (None, "calc", None)),
+            ("min(100% - (2rem + 1px), 80ch)", (None, "min", None)),
+            ("var(--navbar-width)", (None, "var", None)),
+        ],
+    )
+    def test_valid(self, value, expected):
+        assert parse_length(value) == dict(
+            zip(("number", "unit", "type"), expected, strict=True)
+        )
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "",
+            "wide",
+            "12 px",
+            "12foo",
+            "px",
+            None,
+            12,
+            "calc(1px);}body{color:red",
+            "calc(1px;} a{b:c)",
+            "calc(1px) max(2px)",
+            "calc((1px)",
+            "var(--x) ;",
+        ],
+    )
+    def test_invalid(self, value):
+        assert parse_length(value) is None
+
+    def test_shorthand(self):
+        assert [length["number"] for length in parse_lengths("8px 16px")] == [8, 16]
+        assert parse_lengths("8px wide") is None
+        assert parse_lengths("1px 2px 3px 4px 5px") is None
+        assert [
+            length["unit"] for length in parse_lengths("calc(100% - 2rem) 1rem")
+        ] == [
+            "calc",
+            "rem",
+        ]
+        assert parse_lengths("calc(100% - 2rem 1rem") is None
+
+    def test_constraint(self):
+        assert is_valid_length("")
+        assert is_valid_length("90vw")
+        assert not is_valid_length("90 vw")
+
+    def test_color_schema_lengths(self):
+        normalized, errors, _display = normalize_color_schema({
+            "toolbar_border_thickness": "thick",
+            "text_color": "#000",
+        })
+        assert normalized == {"text_color": "#000000"}
+        assert "toolbar_border_thickness" in errors
@@ -0,0 +1,95 @@
+from lunasites.presets import build_store
+from lunasites.presets import get_preset_store
+
+import json
+import pytest
+
+
+RAW_PRESETS = (
+    json.dumps({"name": "Modern Blue", "primary_color": "#0070ae"}),
+    json.dumps(
+        {
+            "name": "Night",
+            "category": "marketplace",
+            "tags": ["dark", "contrast"],
+            "background_color": "#000000",
+        }
+    ),
+    "not json",
+)
+
+
+class TestPresetStore:
+    @pytest.fixture(autouse=True)
+    def _store(self):
+        self.store = build_store(RAW_PRESETS)
+
+    def test_invalid_presets_skipped(self):
+        assert self.store.get_by_name("Modern Blue") is not None
+        assert len(self.store) == 2 + 4  # registry presets + builtin presets
+
+    def test_lookup_by_id(self):
+        preset = self.store.get("modern-blue")
+        assert preset["colors"] == {"primary_color": "#0070ae"}
+        assert self.store.get("dark")["name"] == "Dark Mode"
+
+    @pytest.mark.parametrize(
+        "category,tags,expected",
+        [
+            ("marketplace", None, ["Night"]),
+            (None, ["dark"], ["Night", "Dark Mode"]),
+            ("design", ["dark"], ["Dark Mode"]),
+            ("color", ["dark"], []),
+        ],
+    )
+    def test_query(self, category, tags, expected):
+        presets = self.store.query(category=category, tags=tags)
+        assert [preset["name"] for preset in presets] == expected
+
+    def test_facets(self):
+        facets = self.store.facets()
+        assert facets["categories"] == {"color": 1, "design": 4, "marketplace": 1}
+        assert facets["tags"]["dark"] == 2
+
+    def test_etag_follows_content(self):
+        assert build_store(RAW_PRESETS).etag == self.store.etag
+        assert build_store(RAW_PRESETS[:1]).etag != self.store.etag
+
+
+class TestPresetStoreCache:
+    def test_store_reused_until_change(self, portal):
+        from plone import api
+
+        store = get_preset_store()
+        assert get_preset_store() is store
+        presets = api.portal.get_registry_record("lunasites.color_schema_presets")
+        api.portal.set_registry_record(
+            "lunasites.color_schema_presets", presets[:1]
+        )
+        assert get_preset_store() is not store
+
+
+class TestNearestPresets:
+    @pytest.fixture(autouse=True)
+    def _store(self):
+        self.store = build_store(RAW_PRESETS)
+
+    @pytest.mark.parametrize("metric", ["ciede2000", "oklab"])
+    def test_exact_match_first(self, metric):
+        results = self.store.nearest(["#0070ae"], k=2, metric=metric)
+        assert len(results) == 2
+        preset, score = results[0]
+        assert preset["name"] in ("Modern Blue", "Default")
+        assert score == pytest.approx(0, abs=1e-6)
+
+    def test_field_mapping(self):
+        results = self.store.nearest({"background_color": "#010101"}, k=1)
+        assert results[0][0]["name"] == "Night"
+
+    def test_invalid_color(self):
+        with pytest.raises(ValueError):
+            self.store.nearest(["not-a-color"])
+
+    def test_invalid_metric(self):
+        with pytest.raises(ValueError):
+            self.store.nearest(["#ffffff"], metric="rgb")
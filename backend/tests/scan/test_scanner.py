@@ -0,0 +1,88 @@
+from lunasites.behaviors.design_schema import get_design_record
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.interfaces import IScanVisitor
+from lunasites.scan.scanner import partition
+from lunasites.scan.scanner import scan
+from lunasites.scan.scanner import ScanError
+from plone import api
+from zope.component import getUtility
+from zope.interface import implementer
+
+import pytest
+import threading
+import transaction
+
+
+@implementer(IScanVisitor)
+class Titles:
+    def __init__(self):
+        self.query = {"portal_type": "Document"}
+
+    def visit(self, obj):
+        yield {"title": obj.Title(), "thread": threading.current_thread().name}
+
+
+@implementer(IScanVisitor)
+class Failing:
+    def __init__(self):
+        self.query = {"portal_type": "Document"}
+
+    def visit(self, obj):
+        raise RuntimeError("broken")
+
+
+class TestScan:
+    @pytest.fixture(autouse=True)
+    def _setup(self, functional_portal):
+        self.portal = functional_portal
+        with api.env.adopt_roles(["Manager"]):
+            self.pages = [
+                api.content.create(
+                    container=functional_portal,
+                    type="Document",
+                    id=f"page-{i}",
+                    title=f"Page {i}",
+                )
+                for i in range(6)
+            ]
+        design = IDesignSchema(self.pages[0])
+        design.color_schema = {"text_color": "#777777", "background_color": "#ffffff"}
+        transaction.commit()
+
+    def test_partition(self):
+        partitions = partition({"portal_type": "Document"}, workers=4)
+        assert [len(paths) for paths in partitions] == [2, 2, 2]
+
+    def test_scan(self):
+        results = list(scan(self.portal, Titles(), workers=3))
+        assert sorted(result["title"] for result in results) == [
+            f"Page {i}" for i in range(6)
+        ]
+        assert len({result["thread"] for result in results}) == 3
+
+    def test_failures(self):
+        with pytest.raises(ScanError):
+            list(scan(self.portal, Failing(), workers=2))
+
+    def test_contrast_audit(self):
+        visitor = getUtility(IScanVisitor, name="contrast")
+        (result,) = scan(self.portal, visitor)
+        assert result["path"].endswith("/page-0")
+        assert result["contrast"] == 4.48
+
+    def test_consistency_audit(self):
+        get_design_record(self.pages[1], create=True).view_type = "homepage"
+        transaction.commit()
+        visitor = getUtility(IScanVisitor, name="design-consistency")
+        issues = {
+            (result["path"].rsplit("/", 1)[1], result["issue"])
+            for result in scan(self.portal, visitor)
+        }
+        assert issues == {("page-1", "stale-index")}
+
+    def test_storage_report(self):
+        visitor = getUtility(IScanVisitor, name="design-storage")
+        (result,) = scan(self.portal, visitor)
+        assert result["path"].endswith("/page-0")
+        assert result["size"] > 0
+        assert "color_schema" in result["fields"]
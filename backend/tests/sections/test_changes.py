@@ -0,0 +1,90 @@
+"""Change log of the section library."""
+from lunasites.sections import changes
+from lunasites.sections.changes import ChangeLog
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import get_library
+
+import pytest
+import transaction
+
+
+class TestChangeLog:
+    def test_since(self):
+        log = ChangeLog()
+        log.record("a")
+        log.record("b")
+        log.record("a", deleted=True)
+        log.record("c")
+        assert log.version == 4
+        assert log.since(0) == (["b", "c"], ["a"])
+        assert log.since(3) == (["c"], ["a"])
+        # Changes committed concurrently can share the version
+        assert log.since(4) == (["c"], [])
+
+    def test_one_entry_per_section(self):
+        log = ChangeLog()
+        for _ in range(5):
+            log.record("a")
+        assert list(log.entries.items()) == [((5, "a"), False)]
+
+    def test_unknown_versions(self):
+        log = ChangeLog()
+        log.record("a")
+        assert log.since(2) is None
+
+    def test_compaction(self, monkeypatch):
+        monkeypatch.setattr(changes, "MAX_TOMBSTONES", 2)
+        log = ChangeLog()
+        for section_id in "abc":
+            log.record(section_id, deleted=True)
+        assert log.tombstones() == 2
+        assert log.since(0) is None
+        assert log.since(1) == ([], ["b", "c"])
+
+
+class TestLibraryVersion:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.library = get_library(portal, create=True)
+
+    def test_replacing_is_no_removal(self):
+        section = CustomSection(section_id="a", name="A", data={})
+        self.library.add(section)
+        self.library.add(section)
+        assert self.library.version == 2
+        assert self.library.changed_since(0) == (["a"], [])
+
+    def test_library_without_log(self):
+        self.library.changes = None
+        assert self.library.changed_since(0) == ([], [])
+        self.library.add(CustomSection(section_id="a", name="A", data={}))
+        assert self.library.changed_since(0) is None
+        assert self.library.changed_since(1) == (["a"], [])
+
+
+class TestConcurrentChanges:
+    @pytest.fixture(autouse=True)
+    def _setup(self, functional_portal):
+        self.portal = functional_portal
+        library = get_library(functional_portal, create=True)
+        library.add(CustomSection(section_id="a", name="A", data={}))
+        transaction.commit()
+
+    def test_no_conflict(self):
+        manager = transaction.TransactionManager()
+        connection = self.portal._p_jar.db().open(manager)
+        try:
+            root = connection.root()["Application"]
+            portal = root.unrestrictedTraverse(self.portal.getPhysicalPath())
+            get_library(portal).add(CustomSection(section_id="b", name="B", data={}))
+            get_library(self.portal).add(
+                CustomSection(section_id="c", name="C", data={})
+            )
+            manager.commit()
+            transaction.commit()
+        finally:
+            connection.close()
+        library = get_library(self.portal)
+        assert library.version == 3
+        changed, _deleted = library.changed_since(2)
+        assert sorted(changed) == ["b", "c"]
@@ -0,0 +1,93 @@
+"""Images embedded in section data."""
+
+from lunasites.sections.images import IMAGE_PATH
+from lunasites.sections.images import IMAGE_REF
+from lunasites.sections.images import ImageStore
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import get_library
+
+import base64
+import json
+import pytest
+
+
+PNG = base64.b64encode(bytes(range(256)) * 8).decode("ascii")
+DATA_URL = f"data:image/png;base64,{PNG}"
+
+
+def make_data(url=DATA_URL):
+    return {"blocks": {"a": {"@type": "image", "url": url, "alt": "Logo"}}}
+
+
+class TestImageStore:
+    def test_store_and_restore(self):
+        store = ImageStore()
+        value, refs, escaped = store.store(make_data())
+        assert not escaped
+        url = value["blocks"]["a"]["url"]
+        assert url == IMAGE_REF + refs[0]
+        image = store.get(refs[0])
+        assert image.content_type == "image/png"
+        assert image.size == 2048
+        assert store.restore(value) == make_data()
+        assert store.urls(value, "http://site") == make_data(
+            "http://site" + IMAGE_PATH + refs[0]
+        )
+
+    def test_non_canonical_base64_stays_inline(self):
+        url = f"data:image/png;base64,{PNG[:76]}\n{PNG[76:]}"
+        value, refs, _escaped = ImageStore().store(make_data(url))
+        assert refs == []
+        assert value == make_data(url)
+
+    def test_small_and_other_strings_stay_inline(self):
+        data = make_data("data:image/gif;base64,R0lGODlhAQABAAAAACw=")
+        data["blocks"]["a"]["alt"] = "data:" + "x" * 2000
+        assert ImageStore().store(data) == (data, [], False)
+
+    @pytest.mark.parametrize("content_type", ["image/svg+xml", "text/html"])
+    def test_other_types_stay_inline(self, content_type):
+        url = f"data:{content_type};base64,{PNG}"
+        assert ImageStore().store(make_data(url)) == (make_data(url), [], False)
+
+    def test_references_in_data_are_escaped(self):
+        store = ImageStore()
+        _value, refs, _escaped = store.store(make_data())
+        data = make_data(IMAGE_REF + refs[0])
+        value, refs, escaped = store.store(data)
+        assert (refs, escaped) == ([], True)
+        assert store.restore(value) == data
+        assert store.urls(value, "http://site") == data
+
+
+class TestLibraryImages:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        self.library = get_library(portal, create=True)
+        for section_id in ("a", "b"):
+            self.library.add(
+                CustomSection(section_id=section_id, name="A", data=make_data())
+            )
+
+    def test_images_are_shared(self):
+        assert len(self.library.images) == 1
+        section = self.library.get("a")
+        url = section.to_dict()["data"]["blocks"]["a"]["url"]
+        assert url == self.portal.absolute_url() + IMAGE_PATH + section.image_refs[0]
+        assert json.loads(section.data_json()) == section.to_dict()["data"]
+        assert self.library.get("b").export()["data"] == make_data()
+
+    def test_remove_releases_images(self):
+        section = self.library.remove("a")
+        assert section.data == make_data()
+        assert len(self.library.images) == 1
+        self.library.remove("b")
+        assert len(self.library.images) == 0
+
+    def test_references_in_data_are_kept(self):
+        ref = IMAGE_REF + self.library.get("a").image_refs[0]
+        self.library.add(CustomSection(section_id="c", name="C", data=make_data(ref)))
+        section = self.library.get("c")
+        assert section.to_dict()["data"] == make_data(ref)
+        assert json.loads(section.data_json()) == make_data(ref)
@@ -0,0 +1,106 @@
+"""Inserting custom sections into pages."""
+from lunasites.sections.instantiate import clone_blocks
+from lunasites.sections.instantiate import insert_section
+from lunasites.sections.instantiate import resolve_links
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import get_library
+from plone import api
+
+import base64
+import pytest
+
+
+GROUP = {
+    "@type": "group",
+    "data": {
+        "blocks": {
+            "inner": {"@type": "slate", "plaintext": "Inner"},
+        },
+        "blocks_layout": {"items": ["inner"]},
+    },
+}
+
+
+def test_clone_blocks():
+    blocks, items = clone_blocks({"a": GROUP, "b": {"@type": "slate"}}, ["b", "a"])
+    assert len(items) == 2
+    assert set(blocks) == set(items)
+    assert "a" not in blocks
+    group = blocks[items[1]]
+    inner_items = group["data"]["blocks_layout"]["items"]
+    assert inner_items != ["inner"]
+    assert list(group["data"]["blocks"]) == inner_items
+
+
+class TestInsert:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        with api.env.adopt_roles(["Manager"]):
+            self.target = api.content.create(
+                container=portal, type="Document", id="target", title="Target"
+            )
+            self.page = api.content.create(
+                container=portal, type="Document", id="page", title="Page"
+            )
+        self.page.blocks = {"x": {"@type": "title"}, "y": {"@type": "slate"}}
+        self.page.blocks_layout = {"items": ["x", "y"]}
+        self.section = CustomSection(
+            section_id="s",
+            name="S",
+            data={
+                "@type": "group",
+                "data": {
+                    "blocks": {
+                        "a": {"@type": "teaser", "href": "/target"},
+                        "b": {"@type": "image", "url": "/target/@@images/image"},
+                    },
+                    "blocks_layout": {"items": ["a", "b"]},
+                },
+            },
+        )
+
+    def test_resolve_links(self):
+        uid = api.content.get_uuid(self.target)
+        blocks = {
+            "a": {"href": [{"@id": self.target.absolute_url()}]},
+            "b": {"url": "/target#top"},
+            "c": {"url": "/missing"},
+            "d": {"url": "https://plone.org"},
+        }
+        resolved = resolve_links(self.page, blocks)
+        assert resolved["a"]["href"][0]["@id"] == f"../resolveuid/{uid}"
+        assert resolved["b"]["url"] == f"../resolveuid/{uid}#top"
+        assert resolved["c"]["url"] == "/missing"
+        assert resolved["d"]["url"] == "https://plone.org"
+
+    def test_insert_at_position(self):
+        blocks, layout = insert_section(self.section, self.page, position=1)
+        items = layout["items"]
+        assert items[0] == "x" and items[-1] == "y"
+        assert items[1:3] == list(blocks)
+        uid = api.content.get_uuid(self.target)
+        assert blocks[items[1]]["href"] == f"../resolveuid/{uid}"
+        assert blocks[items[2]]["url"] == f"../resolveuid/{uid}/@@images/image"
+        assert set(self.page.blocks) == {"x", "y", *blocks}
+
+    def test_replace(self):
+        blocks, layout = insert_section(self.section, self.page, replace="y")
+        assert layout["items"] == ["x", *blocks]
+        assert "y" not in self.page.blocks
+        with pytest.raises(KeyError):
+            insert_section(self.section, self.page, replace="missing")
+
+    def test_images_are_inlined(self, portal):
+        png = base64.b64encode(bytes(range(256)) * 8).decode("ascii")
+        data_url = f"data:image/png;base64,{png}"
+        library = get_library(portal, create=True)
+        library.add(
+            CustomSection(
+                section_id="images",
+                name="Images",
+                data={"blocks": {"a": {"@type": "image", "url": data_url}}},
+            )
+        )
+        blocks, _layout = insert_section(library.get("images"), self.page)
+        library.remove("images")
+        assert [block["url"] for block in blocks.values()] == [data_url]
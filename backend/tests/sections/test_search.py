@@ -0,0 +1,77 @@
+"""Full-text index of the custom sections."""
+from lunasites.sections.search import extract_text
+from lunasites.sections.search import SectionIndex
+from lunasites.sections.search import tokenize
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import get_library
+
+import pytest
+
+
+def make_section(section_id, name, text="", **kwargs):
+    data = {
+        "blocks": {
+            "a": {
+                "@type": "slate",
+                "value": [{"type": "p", "children": [{"text": text}]}],
+            }
+        }
+    }
+    return CustomSection(section_id=section_id, name=name, data=data, **kwargs)
+
+
+def test_tokenize():
+    assert tokenize("Héro Section, 2 columns!") == ["hero", "section", "columns"]
+
+
+def test_extract_text():
+    data = {
+        "blocks": {
+            "a": {"@type": "teaser", "title": "Teaser", "href": "/page"},
+            "b": {"value": [{"children": [{"text": "Hello"}, {"text": "world"}]}]},
+        }
+    }
+    assert sorted(extract_text(data)) == ["Hello", "Teaser", "world"]
+
+
+class TestSectionIndex:
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.index = SectionIndex()
+        self.index.index(make_section("a", "Hero banner", "Welcome to our shop"))
+        self.index.index(make_section("b", "Footer", "Contact the hero team"))
+        self.index.index(make_section("c", "Pricing", "Three plans"))
+
+    def test_ranking(self):
+        assert [section_id for section_id, _ in self.index.search("hero")] == [
+            "a",
+            "b",
+        ]
+
+    def test_prefix_and_all_terms(self):
+        assert [item[0] for item in self.index.search("her tea")] == ["b"]
+        assert [item[0] for item in self.index.search("pri")] == ["c"]
+        assert self.index.search("hero pricing") == []
+
+    def test_unindex(self):
+        self.index.unindex("a")
+        assert [item[0] for item in self.index.search("hero")] == ["b"]
+        assert "welcome" not in self.index.postings
+
+
+class TestLibrarySearch:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.library = get_library(portal, create=True)
+        self.library.add(make_section("a", "Hero", created="1", category="Heroes"))
+        self.library.add(make_section("b", "Big hero", created="2"))
+
+    def test_search_filters(self):
+        assert self.library.search("hero") == ["a", "b"]
+        assert self.library.search("hero", category="Heroes") == ["a"]
+
+    def test_reindex(self):
+        self.library.text_index = None
+        assert self.library.search("hero") == []
+        self.library.reindex()
+        assert self.library.search("big") == ["b"]
@@ -0,0 +1,94 @@
+from lunasites.sections.data import COMPRESSION_THRESHOLD
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import get_library
+from lunasites.sections.storage import LEGACY_RECORD
+from lunasites.sections.storage import migrate_registry_sections
+from plone import api
+from plone.registry import field
+from plone.registry import Record
+from plone.registry.interfaces import IRegistry
+from zope.component import getUtility
+
+import json
+import pytest
+import zlib
+
+
+def make_section(section_id, **kwargs):
+    return CustomSection(
+        section_id=section_id,
+        name=f"Section {section_id}",
+        data={"blocks": {}},
+        **kwargs,
+    )
+
+
+class TestSectionLibrary:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+
+    def test_no_library_until_first_write(self):
+        assert get_library(self.portal) is None
+        assert get_library(self.portal, create=True) is get_library(self.portal)
+
+    def test_add_and_remove(self):
+        library = get_library(self.portal, create=True)
+        library.add(make_section("a"))
+        library.add(make_section("b", category="Heroes"))
+        assert len(library) == 2
+        assert library.get("b").category == "Heroes"
+        assert library.remove("a").id == "a"
+        assert library.remove("a") is None
+        assert len(library) == 1
+
+    def test_query_order(self):
+        library = get_library(self.portal, create=True)
+        for section_id, created in (("c", "03"), ("a", "01"), ("b", "02")):
+            library.add(make_section(section_id, category="Heroes", created=created))
+        library.add(make_section("d", created="00"))
+        assert library.query() == ["d", "a", "b", "c"]
+        assert library.query(category="Heroes") == ["a", "b", "c"]
+        # Libraries stored before the keys were kept
+        library.keys = None
+        assert library.query(category="Heroes") == ["a", "b", "c"]
+
+
+class TestSectionData:
+    def test_small_data_is_stored_as_is(self):
+        section = make_section("a")
+        assert section._data.compressed is None
+        assert section.data == {"blocks": {}}
+
+    def test_large_data_is_compressed(self):
+        blocks = {
+            f"block-{i}": {"@type": "slate", "plaintext": "Lorem ipsum"}
+            for i in range(100)
+        }
+        section = CustomSection(section_id="a", name="A", data={"blocks": blocks})
+        stored = section._data
+        assert stored.value is None
+        assert len(stored.compressed) < COMPRESSION_THRESHOLD
+        assert section.data == {"blocks": blocks}
+        assert json.loads(zlib.decompress(stored.deflated())) == {"blocks": blocks}
+
+
+class TestRegistryMigration:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        registry = getUtility(IRegistry)
+        registry.records[LEGACY_RECORD] = Record(field.Text(title="Legacy"))
+        registry[LEGACY_RECORD] = json.dumps(
+            {
+                "s1": {"id": "s1", "name": "Hero", "data": {"blocks": {}}},
+                "s2": {"name": "Footer", "category": "Footers", "data": {}},
+            }
+        )
+
+    def test_migrate(self):
+        assert migrate_registry_sections(self.portal) == 2
+        library = get_library(self.portal)
+        assert library.get("s1").category == "General"
+        assert library.get("s2").name == "Footer"
+        assert api.portal.get_registry_record(LEGACY_RECORD, default=None) is None
@@ -0,0 +1,92 @@
+"""Shared storage of the blocks of custom sections."""
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import get_library
+from lunasites.sections.subtrees import ESCAPE_KEY
+from lunasites.sections.subtrees import REF_KEY
+from lunasites.sections.subtrees import SubtreeStore
+
+import pytest
+
+
+HERO = {
+    "@type": "gridBlock",
+    "description": "Hero section " * 20,
+    "blocks": {
+        "image": {"@type": "image", "url": "/hero.png", "alt": "Hero " * 60},
+        "text": {"@type": "slate", "plaintext": "Welcome"},
+    },
+    "blocks_layout": {"items": ["image", "text"]},
+}
+
+
+def make_data(heading):
+    return {
+        "blocks": {
+            "title": {"@type": "slate", "plaintext": heading},
+            "hero": HERO,
+        },
+        "blocks_layout": {"items": ["title", "hero"]},
+    }
+
+
+class TestSubtreeStore:
+    def test_store_and_expand(self):
+        store = SubtreeStore()
+        reduced, refs = store.store(make_data("One"))
+        assert len(refs) == 2
+        assert set(reduced["blocks"]["hero"]) == {REF_KEY}
+        assert reduced["blocks"]["title"]["plaintext"] == "One"
+        assert store.expand(reduced) == make_data("One")
+
+    def test_shared_and_released(self):
+        store = SubtreeStore()
+        _, refs_one = store.store(make_data("One"))
+        _, refs_two = store.store(make_data("Two"))
+        assert refs_one == refs_two
+        assert len(store) == 2
+        store.release(refs_one)
+        assert len(store) == 2
+        store.release(refs_two)
+        assert len(store) == 0
+
+    def test_expand_returns_copies(self):
+        store = SubtreeStore()
+        reduced, _ = store.store(make_data("One"))
+        store.expand(reduced)["blocks"]["hero"]["blocks"].clear()
+        assert store.expand(reduced) == make_data("One")
+
+    def test_reference_like_data_is_escaped(self):
+        store = SubtreeStore()
+        data = make_data("One")
+        data["blocks"]["title"]["styles"] = {REF_KEY: "user value"}
+        data["blocks"]["hero"]["styles"] = {ESCAPE_KEY: {REF_KEY: "other"}}
+        reduced, _ = store.store(data)
+        assert store.expand(reduced) == data
+
+    def test_missing_block(self):
+        data = {"blocks": {"hero": {REF_KEY: "missing"}}}
+        assert SubtreeStore().expand(data) == data
+
+
+class TestLibrarySharing:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.library = get_library(portal, create=True)
+        for section_id in ("a", "b"):
+            self.library.add(
+                CustomSection(
+                    section_id=section_id, name="Hero", data=make_data(section_id)
+                )
+            )
+
+    def test_sections_share_blocks(self):
+        assert len(self.library.subtrees) == 2
+        assert self.library.get("a").data == make_data("a")
+        assert self.library.get("b").data == make_data("b")
+
+    def test_remove_releases_blocks(self):
+        section = self.library.remove("a")
+        assert section.data == make_data("a")
+        assert len(self.library.subtrees) == 2
+        self.library.remove("b")
+        assert len(self.library.subtrees) == 0
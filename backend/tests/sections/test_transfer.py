@@ -0,0 +1,60 @@
+"""NDJSON export and import of section libraries."""
+from lunasites.sections.storage import CustomSection
+from lunasites.sections.storage import get_library
+from lunasites.sections.transfer import export_sections
+from lunasites.sections.transfer import import_sections
+
+import json
+import pytest
+
+
+class TestTransfer:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.library = get_library(portal, create=True)
+        self.library.add(
+            CustomSection(section_id="a", name="A", data={"a": 1}, created="1")
+        )
+        self.library.add(
+            CustomSection(section_id="b", name="B", data={"b": 1}, created="2")
+        )
+        self.lines = list(export_sections(self.library))
+
+    def test_export(self):
+        assert [json.loads(line)["id"] for line in self.lines] == ["a", "b"]
+        assert json.loads(self.lines[0])["data"] == {"a": 1}
+
+    @pytest.mark.parametrize(
+        "policy,expected,count",
+        [
+            ("skip", {"skipped": 2}, 2),
+            ("overwrite", {"overwritten": 2}, 2),
+            ("rename", {"renamed": 2}, 4),
+        ],
+    )
+    def test_policies(self, policy, expected, count):
+        lines = [line.replace(b'"A"', b'"New"') for line in self.lines]
+        report = import_sections(self.library, lines, policy=policy, batch_size=1)
+        assert {key: report[key] for key in expected} == expected
+        assert len(self.library) == count
+        name = self.library.get("a").name
+        assert name == ("New" if policy == "overwrite" else "A")
+
+    def test_new_ids(self):
+        report = import_sections(self.library, self.lines, new_ids=True)
+        assert report["created"] == 2
+        assert set(report["ids"]) == {"a", "b"}
+        assert self.library.get(report["ids"]["a"]).data == {"a": 1}
+
+    def test_invalid_lines(self):
+        lines = [b"{}", b"", b"[1]", b'{"name": "C", "data": {"c": 1}}']
+        report = import_sections(self.library, lines)
+        assert [error["line"] for error in report["errors"]] == [1, 3]
+        assert report["created"] == 1
+
+    def test_progress(self):
+        reports = []
+        import_sections(
+            self.library, self.lines, new_ids=True, batch_size=1, progress=reports.append
+        )
+        assert len(reports) == 3
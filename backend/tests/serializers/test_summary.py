@@ -0,0 +1,71 @@
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.interfaces import IBrowserLayer
+from plone import api
+from plone.restapi.interfaces import ISerializeToJsonSummary
+from Products.ZCatalog.CatalogBrains import AbstractCatalogBrain
+from zope.component import getMultiAdapter
+from zope.event import notify
+from zope.interface import alsoProvides
+from zope.lifecycleevent import ObjectModifiedEvent
+
+import pytest
+
+
+class TestDesignSummary:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal, monkeypatch):
+        self.request = portal.REQUEST
+        alsoProvides(self.request, IBrowserLayer)
+        with api.env.adopt_roles(["Manager"]):
+            self.page = api.content.create(
+                container=portal, type="Document", id="page", title="Page"
+            )
+        design = IDesignSchema(self.page)
+        design.view_type = "homepage"
+        design.color_schema = {"primary_color": "#123456"}
+        notify(ObjectModifiedEvent(self.page))
+        (self.brain,) = api.portal.get_tool("portal_catalog")(getId="page")
+
+        def load(brain, *args):
+            raise AssertionError("The object was loaded")
+
+        monkeypatch.setattr(AbstractCatalogBrain, "getObject", load)
+        monkeypatch.setattr(AbstractCatalogBrain, "_unrestrictedGetObject", load)
+
+    def summary(self, **form):
+        self.request.form.update(form)
+        return getMultiAdapter((self.brain, self.request), ISerializeToJsonSummary)()
+
+    def test_design_metadata_from_the_catalog(self):
+        summary = self.summary(metadata_fields="design_schema")
+        design = summary["design_schema"]
+        assert design["view_type"] == "homepage"
+        assert design["color_schema"] == {"primary_color": "#123456"}
+        assert design["logo_image"] is None
+
+    def test_not_listed_by_default(self):
+        assert "design_schema" not in self.summary()
+
+
+def test_search_lists_design(manager_request):
+    manager_request.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+    manager_request.patch(
+        "/doc",
+        json={
+            "view_type": "homepage",
+            "logo_image": {
+                "data": "R0lGODlhAQABAAAAACw=",
+                "encoding": "base64",
+                "filename": "logo.gif",
+                "content-type": "image/gif",
+            },
+        },
+    )
+    response = manager_request.get(
+        "/@search", params={"getId": "doc", "metadata_fields": "design_schema"}
+    )
+    (item,) = response.json()["items"]
+    assert item["design_schema"]["view_type"] == "homepage"
+    assert item["design_schema"]["logo_image"] == (
+        item["@id"] + "/@@download/logo_image"
+    )
@@ -0,0 +1,76 @@
+import pytest
+
+
+class TestColorSchemaService:
+    def test_get(self, manager_request):
+        response = manager_request.get("/@color-schema")
+        assert response.status_code == 200
+        data = response.json()
+        assert "Modern Blue" in [preset["name"] for preset in data["presets"]]
+        assert data["facets"]["categories"]["design"] == 4
+
+    def test_builtin_presets(self, manager_request):
+        response = manager_request.get("/@color-schema", params={"category": "design"})
+        assert [preset["name"] for preset in response.json()["presets"]] == [
+            "Default",
+            "Dark Mode",
+            "Corporate Blue",
+            "Nature Green",
+        ]
+
+    def test_etag(self, manager_request):
+        etag = manager_request.get("/@color-schema").headers["ETag"]
+        response = manager_request.get(
+            "/@color-schema", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+    def test_update_normalizes(self, manager_request):
+        response = manager_request.post(
+            "/@color-schema", json={"schema": {"primary_color": "#FFF"}}
+        )
+        assert response.status_code == 200
+        data = manager_request.get("/@color-schema").json()
+        assert data["current_schema"] == {"primary_color": "#ffffff"}
+
+    def test_update_rejects_invalid_colors(self, manager_request):
+        current = manager_request.get("/@color-schema").json()["current_schema"]
+        response = manager_request.post(
+            "/@color-schema",
+            json={"schema": {"primary_color": "#FFF", "text_color": "bad"}},
+        )
+        assert response.status_code == 400
+        assert list(response.json()["errors"]) == ["text_color"]
+        data = manager_request.get("/@color-schema").json()
+        assert data["current_schema"] == current
+
+    def test_apply_preset(self, manager_request):
+        response = manager_request.put(
+            "/@color-schema", json={"preset_name": "Dark Mode"}
+        )
+        assert response.status_code == 200
+        assert response.json()["schema"]["background_color"] == "#1a1a1a"
+
+    def test_nearest(self, manager_request):
+        response = manager_request.get(
+            "/@color-schema/nearest", params={"colors": "0070ae,ffffff", "k": 2}
+        )
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 2
+
+    @pytest.mark.parametrize("k", [None, [], "many"])
+    def test_nearest_invalid_k(self, manager_request, k):
+        response = manager_request.post(
+            "/@color-schema/nearest", json={"colors": ["#0070ae"], "k": k}
+        )
+        assert response.status_code == 400
+
+    def test_validate(self, manager_request):
+        response = manager_request.post(
+            "/@color-schema/validate",
+            json={"schema": {"primary_color": "rgb(0,0,0)", "text_color": "bad"}},
+        )
+        data = response.json()
+        assert data["valid"] is False
+        assert data["schema"] == {"primary_color": "#000000"}
+        assert list(data["errors"]) == ["text_color"]
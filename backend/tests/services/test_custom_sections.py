@@ -0,0 +1,176 @@
+import base64
+import json
+import pytest
+
+
+class TestCustomSectionsService:
+    @pytest.fixture(autouse=True)
+    def _setup(self, manager_request):
+        self.api = manager_request
+        self.ids = []
+        for name, category in (
+            ("Hero", "Heroes"),
+            ("Footer", "Footers"),
+            ("Big hero", "Heroes"),
+        ):
+            response = self.api.post(
+                "/@custom-sections",
+                json={
+                    "name": name,
+                    "category": category,
+                    "data": {"blocks": {"a": {"@type": "slate"}}},
+                },
+            )
+            assert response.status_code == 201
+            self.ids.append(response.json()["id"])
+
+    def test_list(self):
+        data = self.api.get("/@custom-sections").json()
+        assert data["count"] == 3
+        assert data["categories"] == ["Footers", "Heroes"]
+        assert data["category_counts"] == {"Footers": 1, "Heroes": 2}
+        assert [section["name"] for section in data["sections"]] == [
+            "Hero",
+            "Footer",
+            "Big hero",
+        ]
+        assert "data" in data["sections"][0]
+
+    def test_summary_and_filter(self):
+        data = self.api.get(
+            "/@custom-sections", params={"summary": "1", "category": "Heroes"}
+        ).json()
+        assert data["items_total"] == 2
+        assert {section["name"] for section in data["sections"]} == {
+            "Hero",
+            "Big hero",
+        }
+        assert "data" not in data["sections"][0]
+
+    def test_batching(self):
+        data = self.api.get(
+            "/@custom-sections", params={"b_start": 1, "b_size": 1}
+        ).json()
+        assert data["items_total"] == 3
+        assert [section["name"] for section in data["sections"]] == ["Footer"]
+        assert "next" in data["batching"]
+
+    def test_get_one(self):
+        response = self.api.get(f"/@custom-sections/{self.ids[1]}")
+        assert response.status_code == 200
+        assert response.json()["data"] == {"blocks": {"a": {"@type": "slate"}}}
+        assert self.api.get("/@custom-sections/missing").status_code == 404
+
+    def test_delete_updates_counts(self):
+        response = self.api.delete(f"/@custom-sections/{self.ids[0]}")
+        assert response.status_code == 200
+        data = self.api.get("/@custom-sections", params={"summary": "1"}).json()
+        assert data["category_counts"] == {"Footers": 1, "Heroes": 1}
+
+    def test_search(self):
+        data = self.api.get(
+            "/@custom-sections", params={"q": "her", "summary": "1"}
+        ).json()
+        assert data["items_total"] == 2
+        assert [section["name"] for section in data["sections"]] == [
+            "Hero",
+            "Big hero",
+        ]
+
+    def test_data(self):
+        blocks = {str(i): {"@type": "slate", "plaintext": "Text"} for i in range(200)}
+        section_id = self.api.post(
+            "/@custom-sections", json={"name": "Large", "data": {"blocks": blocks}}
+        ).json()["id"]
+        url = f"/@custom-sections/{section_id}/data"
+        response = self.api.get(url, headers={"Accept-Encoding": "deflate"})
+        assert response.headers["Content-Encoding"] == "deflate"
+        assert response.json() == {"blocks": blocks}
+        response = self.api.get(url, headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in response.headers
+        assert response.json() == {"blocks": blocks}
+
+    def test_changes_since(self):
+        version = self.api.get("/@custom-sections").json()["version"]
+        self.api.delete(f"/@custom-sections/{self.ids[0]}")
+        self.api.post("/@custom-sections", json={"name": "New", "data": {"a": 1}})
+        data = self.api.get(
+            "/@custom-sections", params={"since": version, "summary": "1"}
+        ).json()
+        assert data["full_resync"] is False
+        assert data["version"] == version + 2
+        # The changes at the version the client saw are returned again
+        assert [section["name"] for section in data["sections"]] == ["Big hero", "New"]
+        assert data["deleted"] == [self.ids[0]]
+        data = self.api.get("/@custom-sections", params={"since": 1000}).json()
+        assert data["full_resync"] is True
+        assert len(data["sections"]) == 3
+        response = self.api.get("/@custom-sections", params={"since": "x"})
+        assert response.status_code == 400
+
+    def test_export_import(self):
+        response = self.api.get("/@custom-sections-export")
+        assert response.headers["Content-Type"] == "application/x-ndjson"
+        lines = response.content.splitlines()
+        assert [json.loads(line)["name"] for line in lines] == [
+            "Hero",
+            "Footer",
+            "Big hero",
+        ]
+        body = b"\n".join(lines + [b"not json"])
+        report = self.api.post(
+            "/@custom-sections-import", params={"policy": "rename"}, data=body
+        ).json()
+        assert report["renamed"] == 3
+        assert report["errors"][0]["line"] == 4
+        assert self.api.get("/@custom-sections").json()["count"] == 6
+        report = self.api.post("/@custom-sections-import", data=body).json()
+        assert report["skipped"] == 3
+
+    def test_images(self):
+        png = base64.b64encode(bytes(range(256)) * 8).decode("ascii")
+        data = {"blocks": {"a": {"url": f"data:image/png;base64,{png}"}}}
+        section = self.api.post(
+            "/@custom-sections", json={"name": "Image", "data": data}
+        ).json()
+        url = section["data"]["blocks"]["a"]["url"]
+        portal_url = self.api.get("/").json()["@id"]
+        assert url.startswith(portal_url + "/@custom-sections-images/")
+        response = self.api.get(url)
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "image/png"
+        assert "immutable" in response.headers["Cache-Control"]
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+        assert response.content == bytes(range(256)) * 8
+        assert self.api.get("/@custom-sections-images/missing").status_code == 404
+        exported = self.api.get("/@custom-sections-export").content.splitlines()
+        assert json.loads(exported[-1])["data"] == data
+
+    def test_insert(self):
+        self.api.post("/", json={"@type": "Document", "id": "page", "title": "Page"})
+        url = f"/page/@custom-sections/{self.ids[0]}/insert"
+        data = self.api.post(url, json={"position": 0}).json()
+        assert len(data["blocks"]) == 1
+        block_id = data["blocks_layout"]["items"][0]
+        block = {"@type": "slate", "custom_section": self.ids[0]}
+        assert data["blocks"][block_id] == block
+        page = self.api.get("/page").json()
+        assert page["blocks"][block_id] == block
+        assert self.api.post("/page/@custom-sections/missing/insert").status_code == 404
+
+    def test_usage(self):
+        for page_id in ("one", "two"):
+            self.api.post(
+                "/", json={"@type": "Document", "id": page_id, "title": page_id}
+            )
+            self.api.post(f"/{page_id}/@custom-sections/{self.ids[0]}/insert")
+        data = self.api.get(f"/@custom-sections/{self.ids[0]}/usage").json()
+        assert data["items_total"] == 2
+        assert [item["@id"].split("/")[-1] for item in data["items"]] == ["one", "two"]
+        data = self.api.get(
+            f"/@custom-sections/{self.ids[0]}/usage", params={"b_size": 1}
+        ).json()
+        assert len(data["items"]) == 1
+        assert "next" in data["batching"]
+        data = self.api.get(f"/@custom-sections/{self.ids[1]}/usage").json()
+        assert data["items_total"] == 0
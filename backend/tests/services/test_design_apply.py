@@ -0,0 +1,110 @@
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.design_apply import _apply
+from lunasites.design_apply import apply_design
+from lunasites.design_apply import checkpoint_name
+from lunasites.upgrades.batch import get_checkpoint
+from plone import api
+from unittest import mock
+
+import pytest
+
+
+class TestApplyDesign:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.portal = portal
+        self.catalog = api.portal.get_tool("portal_catalog")
+        with api.env.adopt_roles(["Manager"]):
+            self.folder = api.content.create(
+                container=portal, type="Document", id="folder", title="Folder"
+            )
+            self.pages = [
+                api.content.create(
+                    container=self.folder, type="Document", id=f"page-{i}", title="P"
+                )
+                for i in range(5)
+            ]
+            self.deep = api.content.create(
+                container=self.pages[0], type="Document", id="deep", title="Deep"
+            )
+        IDesignSchema(self.pages[1]).navbar_width = "90%"
+
+    def test_apply(self):
+        report = apply_design(
+            self.folder, {"color_schema": {"primary_color": "#F00"}}, batch_size=2
+        )
+        assert report["changed"] == 7
+        assert IDesignSchema(self.deep).color_schema == {"primary_color": "#ff0000"}
+        assert len(self.catalog(primary_color="#ff0000")) == 7
+
+    def test_filters(self):
+        report = apply_design(self.folder, {"navbar_width": "80%"}, depth=1)
+        assert report["total"] == 5
+        assert IDesignSchema(self.deep).navbar_width is None
+        report = apply_design(self.folder, {"navbar_width": None}, only_overrides=True)
+        assert report["changed"] == 5
+        assert IDesignSchema(self.pages[1]).navbar_width is None
+
+    def test_ancestors_are_inherited_by_the_rest_of_the_subtree(self):
+        apply_design(self.folder, {"color_schema": {"primary_color": "#00f"}}, depth=0)
+        assert len(self.catalog(primary_color="#0000ff")) == 7
+
+    def test_resume(self):
+        patch = {"view_type": "homepage"}
+
+        def fail_on_page_3(obj, patch):
+            if obj.getId() == "page-3":
+                raise RuntimeError
+            return _apply(obj, patch)
+
+        with (
+            mock.patch("lunasites.design_apply._apply", fail_on_page_3),
+            pytest.raises(RuntimeError),
+        ):
+            apply_design(self.folder, patch, batch_size=3)
+        name = checkpoint_name(self.folder, patch)
+        assert get_checkpoint(name)[-1] == "deep"
+        report = apply_design(self.folder, patch, batch_size=3, resume=True)
+        assert report["total"] == 4
+        assert report["resumed_after"].endswith("/page-0/deep")
+        assert get_checkpoint(name) is None
+
+    def test_purge(self):
+        purged = []
+        with (
+            mock.patch("lunasites.purge._proxies", return_value=("http://proxy",)),
+            mock.patch(
+                "lunasites.purge.PurgePaths.purge_after_commit",
+                lambda purge: purged.extend(purge.paths),
+            ),
+        ):
+            apply_design(self.folder, {"navbar_width": "80%"}, depth=0)
+        assert "/plone/folder/page-0/deep" in purged
+        assert "/plone/folder" in purged
+
+    def test_invalid_patch(self):
+        with pytest.raises(ValueError):
+            apply_design(self.folder, {"navbar_width": "wide"})
+        with pytest.raises(ValueError):
+            apply_design(self.folder, {"title": "Rebranded"})
+
+
+def test_service(manager_request):
+    manager_request.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+    response = manager_request.post(
+        "/@design-apply",
+        json={"patch": {"view_type": "homepage"}, "portal_types": ["Document"]},
+    )
+    assert response.status_code == 200
+    assert response.json()["changed"] == 1
+    assert manager_request.get("/doc").json()["view_type"]["token"] == "homepage"
+    response = manager_request.post("/@design-apply", json={"patch": {"x": 1}})
+    assert response.status_code == 400
+    response = manager_request.post("/@design-apply", json=[{"patch": {}}])
+    assert response.status_code == 400
+    response = manager_request.post(
+        "/@design-apply",
+        data="{not json",
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 400
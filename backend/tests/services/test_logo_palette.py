@@ -0,0 +1,65 @@
+from io import BytesIO
+from lunasites import palette
+from PIL import Image
+from unittest import mock
+
+import base64
+import pytest
+
+
+def make_png():
+    image = Image.new("RGB", (40, 20), (255, 0, 0))
+    image.paste((0, 0, 255), (20, 0, 40, 20))
+    output = BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+class TestLogoPalette:
+    @pytest.fixture(autouse=True)
+    def _setup(self, manager_request):
+        palette.clear_cache()
+        self.api = manager_request
+        self.api.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+
+    def upload_logo(self):
+        logo = {
+            "data": base64.b64encode(make_png()).decode("ascii"),
+            "encoding": "base64",
+            "filename": "logo.png",
+            "content-type": "image/png",
+        }
+        self.api.patch("/doc", json={"logo_image": logo})
+
+    def test_no_logo(self):
+        assert self.api.get("/doc/@logo-palette").status_code == 404
+
+    def test_palette(self):
+        self.upload_logo()
+        palette.wait()
+        response = self.api.get("/doc/@logo-palette")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["from"]["@id"].endswith("/doc")
+        assert [entry["color"] for entry in data["palette"]] == ["#ff0000", "#0000ff"]
+        assert data["suggested_color_schema"]["primary_color"] == "#0000ff"
+        assert len(data["nearest_presets"]) == 3
+
+    def test_pending_until_computed(self):
+        self.upload_logo()
+        palette.wait()
+        palette.clear_cache()
+        response = self.api.get("/doc/@logo-palette")
+        assert response.status_code == 202
+        assert response.json() == {"status": "pending"}
+        palette.wait()
+        assert self.api.get("/doc/@logo-palette").json()["status"] == "ready"
+
+    def test_cache_is_reused(self):
+        self.upload_logo()
+        palette.wait()
+        first = self.api.get("/doc/@logo-palette").json()
+        with mock.patch("lunasites.palette.extract_palette") as extract:
+            assert self.api.get("/doc/@logo-palette").json() == first
+        extract.assert_not_called()
@@ -0,0 +1,47 @@
+def test_lengths_are_parsed_when_saved(manager_request):
+    response = manager_request.post(
+        "/@luna-theming",
+        json={
+            "luna_theming": {"buttons": {"border_radius": "6px", "padding": "8px 1rem"}}
+        },
+    )
+    assert response.status_code == 200
+    data = manager_request.get("/@luna-theming").json()["luna_theming"]
+    assert data["lengths"]["padding"][1] == {
+        "number": 1,
+        "unit": "rem",
+        "type": "relative",
+    }
+    assert data["lengths"]["font_sizes"]["small"]["number"] == 14
+
+
+def test_invalid_lengths_are_rejected(manager_request):
+    response = manager_request.post(
+        "/@luna-theming",
+        json={"luna_theming": {"fonts": {"font_sizes": {"small": "tiny"}}}},
+    )
+    assert response.status_code == 400
+    assert list(response.json()["errors"]) == ["fonts.font_sizes.small"]
+
+
+def test_colors(manager_request):
+    response = manager_request.post(
+        "/@luna-theming",
+        json={"luna_theming": {"colors": {"primary_color": "rgb(255, 0, 0)"}}},
+    )
+    assert response.status_code == 200
+    data = manager_request.get("/@luna-theming").json()["luna_theming"]
+    assert data["colors"] == {"primary_color": "#ff0000"}
+    assert data["colors_display"] == {"primary_color": "rgb(255, 0, 0)"}
+
+
+def test_invalid_colors_are_rejected(manager_request):
+    response = manager_request.post(
+        "/@luna-theming",
+        json={"luna_theming": {"colors": {"primary_color": "reddish"}}},
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "error": "Invalid colors",
+        "errors": {"colors.primary_color": "Invalid color: reddish"},
+    }
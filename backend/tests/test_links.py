@@ -0,0 +1,71 @@
+from lunasites.links import resolve_tool_links
+from plone import api
+from plone.app.testing import logout
+
+import pytest
+
+
+class TestResolveToolLinks:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        with api.env.adopt_roles(["Manager"]):
+            self.page = api.content.create(
+                container=portal, type="Document", id="contact", title="Contact"
+            )
+        self.url = self.page.absolute_url()
+
+    def test_resolve(self):
+        tools = resolve_tool_links(
+            [
+                {"title": "By UID", "href": f"../resolveuid/{self.page.UID()}"},
+                {"title": "By path", "href": "/contact#form"},
+                {"title": "By URL", "href": self.url},
+                {"title": "Missing", "href": "/missing"},
+                {"title": "Missing UID", "href": "resolveuid/0000"},
+                {"title": "External", "href": "https://example.com/contact"},
+            ]
+        )
+        assert [(tool["href"], tool["broken"]) for tool in tools] == [
+            (self.url, False),
+            (self.url + "#form", False),
+            (self.url, False),
+            ("/missing", True),
+            ("resolveuid/0000", True),
+            ("https://example.com/contact", False),
+        ]
+
+    def test_content_changes(self):
+        tools = [{"title": "Contact", "href": "/contact"}]
+        assert not resolve_tool_links(tools)[0]["broken"]
+        with api.env.adopt_roles(["Manager"]):
+            api.content.delete(self.page)
+        assert resolve_tool_links(tools)[0]["broken"]
+
+    def test_private_content(self):
+        tools = [
+            {"title": "By path", "href": "/contact"},
+            {"title": "By UID", "href": f"resolveuid/{self.page.UID()}"},
+        ]
+        with api.env.adopt_roles(["Manager"]):
+            assert [tool["broken"] for tool in resolve_tool_links(tools)] == [
+                False,
+                False,
+            ]
+        logout()
+        assert [tool["broken"] for tool in resolve_tool_links(tools)] == [True, True]
+
+
+def test_inherit_resolves_tools(manager_request):
+    manager_request.post("/", json={"@type": "Document", "id": "doc", "title": "Doc"})
+    manager_request.post("/doc", json={"@type": "Document", "id": "sub", "title": "S"})
+    manager_request.patch(
+        "/doc", json={"tools_header": [{"title": "S", "href": "/doc/sub"}]}
+    )
+    behavior = "lunasites.behaviors.design_schema.IDesignSchema"
+    response = manager_request.get(
+        "/doc/sub/@design-schema-inherit",
+        params={"expand.inherit.behaviors": behavior},
+    )
+    (tool,) = response.json()[behavior]["data"]["tools_header"]
+    assert tool["href"].endswith("/doc/sub")
+    assert tool["broken"] is False
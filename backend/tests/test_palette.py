@@ -0,0 +1,65 @@
+from io import BytesIO
+from lunasites import palette
+from lunasites.palette import extract_palette
+from lunasites.palette import get_palette
+from lunasites.palette import suggest_color_schema
+from PIL import Image
+from plone import api
+from plone.namedfile.file import NamedBlobImage
+
+import pytest
+import transaction
+
+
+def make_png():
+    """A 40x20 logo, red on the left, blue on the right, with a hole."""
+    image = Image.new("RGBA", (40, 20), (255, 0, 0, 255))
+    image.paste((0, 0, 255, 255), (20, 0, 40, 20))
+    image.paste((0, 255, 0, 0), (0, 0, 4, 4))
+    output = BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+def test_extract_palette():
+    assert extract_palette(BytesIO(make_png())) == [
+        {"color": "#0000ff", "weight": 0.5102},
+        {"color": "#ff0000", "weight": 0.4898},
+    ]
+
+
+def test_suggest_color_schema():
+    assert suggest_color_schema([
+        {"color": "#ffffff", "weight": 0.5},
+        {"color": "#111111", "weight": 0.3},
+        {"color": "#ff0000", "weight": 0.2},
+    ]) == {
+        "background_color": "#ffffff",
+        "text_color": "#111111",
+        "primary_color": "#ff0000",
+    }
+
+
+class TestLogoPalette:
+    @pytest.fixture(autouse=True)
+    def _setup(self, functional_portal):
+        palette.clear_cache()
+        with api.env.adopt_roles(["Manager"]):
+            api.content.create(
+                container=functional_portal,
+                type="Document",
+                id="doc",
+                title="Doc",
+                logo_image=NamedBlobImage(make_png(), filename="logo.png"),
+            )
+        transaction.commit()
+        palette.wait()
+        self.portal = functional_portal
+
+    def test_computed_after_commit(self):
+        transaction.begin()
+        self.portal._p_jar.cacheMinimize()
+        image = self.portal["doc"].logo_image
+        # Found under the key of the image as loaded by a later request
+        assert image._p_changed is None
+        assert get_palette(image)[0]["color"] == "#0000ff"
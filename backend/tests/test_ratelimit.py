@@ -0,0 +1,65 @@
+from lunasites import ratelimit
+from plone import api
+
+import pytest
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = {"user_rate": 1.0, "user_burst": 2, "site_rate": 10.0, "site_burst": 3}
+    monkeypatch.setattr(ratelimit, "get_settings", lambda: settings)
+    return settings
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_user_burst_and_refill(settings, clock):
+    assert ratelimit.take_write_token("/plone", "jane") == 0
+    assert ratelimit.take_write_token("/plone", "jane") == 0
+    assert ratelimit.take_write_token("/plone", "jane") == pytest.approx(1)
+    clock[0] += 0.5
+    assert ratelimit.take_write_token("/plone", "jane") == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert ratelimit.take_write_token("/plone", "jane") == 0
+    assert ratelimit.get_counters()["limited_user"] == 2
+
+
+def test_site_limit(settings, clock):
+    for user in ("a", "b", "c"):
+        assert ratelimit.take_write_token("/plone", user) == 0
+    assert ratelimit.take_write_token("/plone", "d") == pytest.approx(0.1)
+    assert ratelimit.take_write_token("/other", "d") == 0
+    assert ratelimit.get_counters()["limited_site"] == 1
+
+
+def test_disabled(settings, clock):
+    settings["user_rate"] = settings["site_rate"] = 0
+    for _ in range(10):
+        assert ratelimit.take_write_token("/plone", "jane") == 0
+
+
+def test_too_many_requests(settings, manager_request):
+    settings["user_burst"] = 1
+    response = manager_request.post(
+        "/@custom-sections", json={"name": "A", "data": {"a": 1}}
+    )
+    assert response.status_code == 201
+    response = manager_request.post(
+        "/@custom-sections", json={"name": "B", "data": {"b": 1}}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert manager_request.get("/@custom-sections").status_code == 200
+    counters = manager_request.get("/@write-limits").json()["counters"]
+    assert counters["allowed"] == 1
+    assert counters["limited_user"] == 1
+
+
+def test_settings_installed(portal):
+    assert api.portal.get_registry_record("lunasites.write_limit_user_burst") == 30
+    assert ratelimit.get_settings()["site_rate"] == 20.0
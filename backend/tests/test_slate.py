@@ -0,0 +1,65 @@
+from lunasites.slate import render_slate
+
+import pytest
+
+
+def test_render():
+    value = [
+        {
+            "type": "h2",
+            "children": [
+                {"text": "Luna", "bold": True, "italic": True},
+                {"text": " Sites"},
+            ],
+        },
+        {
+            "type": "p",
+            "children": [
+                {"text": "See "},
+                {
+                    "type": "link",
+                    "data": {"url": "https://example.com/?a=1&b=2"},
+                    "children": [{"text": "us"}],
+                },
+            ],
+        },
+    ]
+    assert render_slate(value) == {
+        "html": "<h2><em><strong>Luna</strong></em> Sites</h2>"
+        '<p>See <a href="https://example.com/?a=1&amp;b=2">us</a></p>',
+        "text": "Luna Sites See us",
+    }
+
+
+def test_escaping():
+    value = [
+        {
+            "type": "script",
+            "children": [{"text": "<script>alert(1)</script>"}],
+        },
+        {
+            "type": "link",
+            "data": {"url": "javascript:alert(1)"},
+            "children": [{"text": "click"}],
+        },
+    ]
+    assert render_slate(value)["html"] == (
+        "&lt;script&gt;alert(1)&lt;/script&gt;click"
+    )
+
+
+@pytest.mark.parametrize("value", [None, "", [], [{"type": "p", "children": []}]])
+def test_empty(value):
+    assert render_slate(value) is None
+
+
+def test_link_without_data():
+    value = [
+        {
+            "type": "link",
+            "data": "https://example.com",
+            "url": "https://example.com/us",
+            "children": [{"text": "us"}],
+        }
+    ]
+    assert render_slate(value)["html"] == '<a href="https://example.com/us">us</a>'
@@ -0,0 +1,60 @@
+from lunasites.upgrades.batch import get_checkpoint
+from lunasites.upgrades.batch import migrate_content
+from lunasites.upgrades.batch import run_batched
+from plone import api
+from ZODB.POSException import ConflictError
+
+import pytest
+
+
+class TestRunBatched:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        self.items = [(f"item-{i:02}", lambda i=i: i) for i in range(10)]
+
+    def test_resume_after_interruption(self):
+        visited = []
+
+        def failing(item):
+            if item == 7:
+                raise RuntimeError("interrupted")
+            visited.append(item)
+            return item % 2 == 0
+
+        with pytest.raises(RuntimeError):
+            run_batched("test", self.items, failing, batch_size=3)
+        assert get_checkpoint("test") == "item-05"
+
+        visited.clear()
+        report = run_batched("test", self.items, lambda item: visited.append(item))
+        assert visited == [6, 7, 8, 9]
+        assert report["resumed_after"] == "item-05"
+        assert get_checkpoint("test") is None
+
+    def test_conflicts_are_retried(self):
+        attempts = []
+
+        def conflicting(item):
+            attempts.append(item)
+            if len(attempts) == 2:
+                raise ConflictError()
+            return True
+
+        report = run_batched("test", self.items, conflicting, batch_size=5)
+        assert report == {"visited": 10, "changed": 10, "resumed_after": None}
+        assert attempts[:4] == [0, 1, 0, 1]
+        assert len(attempts) == 12
+
+
+def test_migrate_content(portal):
+    with api.env.adopt_roles(["Manager"]):
+        folder = api.content.create(
+            container=portal, type="Document", id="folder", title="Folder"
+        )
+        api.content.create(container=folder, type="Document", id="page", title="Page")
+    visited = []
+    report = migrate_content(
+        "test", lambda obj: visited.append(obj.getId()), portal_type="Document"
+    )
+    assert visited == ["folder", "page"]
+    assert report["changed"] == 0
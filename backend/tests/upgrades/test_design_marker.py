@@ -0,0 +1,45 @@
+from lunasites.behaviors.design_schema import get_design_record
+from lunasites.behaviors.design_schema import IDesignSchema
+from lunasites.behaviors.design_schema import IDesignSchemaMarker
+from lunasites.upgrades.v1005 import migrate_design_fields
+from lunasites.upgrades.v1005 import reindex_design_marker
+from plone import api
+from Products.CMFCore.indexing import processQueue
+from types import SimpleNamespace
+
+import pytest
+
+
+class TestDesignMarker:
+    @pytest.fixture(autouse=True)
+    def _setup(self, portal):
+        with api.env.adopt_roles(["Manager"]):
+            self.page = api.content.create(
+                container=portal, type="Document", id="page", title="Page"
+            )
+        self.page.navbar_width = "90%"
+        # Cataloged before 1005, with IDesignSchema as marker
+        processQueue()
+        catalog = api.portal.get_tool("portal_catalog")
+        index = catalog._catalog.getIndex("object_provides")
+        rid = catalog.getrid("/".join(self.page.getPhysicalPath()))
+        provides = [
+            identifier
+            for identifier in index.getEntryForObject(rid)
+            if identifier != IDesignSchemaMarker.__identifier__
+        ]
+        index.unindex_object(rid)
+        index.index_object(
+            rid,
+            SimpleNamespace(object_provides=[*provides, IDesignSchema.__identifier__]),
+        )
+
+    def find(self):
+        return api.content.find(object_provides=IDesignSchemaMarker.__identifier__)
+
+    def test_upgrade_from_old_marker(self):
+        assert len(self.find()) == 0
+        reindex_design_marker(None)
+        migrate_design_fields(None)
+        assert [brain.getObject() for brain in self.find()] == [self.page]
+        assert get_design_record(self.page).navbar_width == "90%"
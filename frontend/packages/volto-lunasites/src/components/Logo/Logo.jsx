@@ -26,12 +26,15 @@ const Logo = () => {
   const lang = useSelector((state) => state.intl.locale);
   const intl = useIntl();
   // Get logo data from Redux store (DesignSchemaProvider handles the loading)
-  const designSchemaData = useSelector(
+  const designSchema = useSelector(
     (state) =>
       state?.designSchema?.data?.[
         'lunasites.behaviors.design_schema.IDesignSchema'
-      ]?.data,
+      ],
   );
+  const designSchemaData = designSchema?.data;
+  // Logo text of the design schema, rendered to sanitized HTML by the backend
+  const renderedLogoText = designSchema?.rendered?.logo_text;
 
   // Get logo config from luna theming
   const lunaTheming = useSelector((state) => state.lunaTheming);
@@ -43,13 +46,51 @@ const Logo = () => {
   const logoLayout = logoConfig.layout || 'horizontal';
   const logoTextBold = designSchemaData?.logo_text_bold || false;
 
+  const logoHasText = () => {
+    if (!logoText) {
+      return !!renderedLogoText?.text?.trim();
+    }
+    return typeof logoText === 'string'
+      ? logoText.length > 0
+      : logoText.length > 0 && serializeNodesToText(logoText)?.trim() !== '';
+  };
+
+  // Handle both string and slate text
+  const renderLogoText = () => {
+    const className = `logo-text-content ${logoTextBold ? 'logo-text-bold' : ''}`;
+    if (!logoText) {
+      return (
+        <div
+          className={className}
+          dangerouslySetInnerHTML={{ __html: renderedLogoText.html }}
+        />
+      );
+    }
+    if (typeof logoText === 'string') {
+      return <div className={className}>{logoText}</div>;
+    }
+    const textContent = {
+      blocks: {
+        'logo-text': {
+          '@type': 'slate',
+          value: logoText,
+          plaintext: '',
+        },
+      },
+      blocks_layout: {
+        items: ['logo-text'],
+      },
+    };
+    return (
+      <div className={className}>
+        <RenderBlocks content={textContent} />
+      </div>
+    );
+  };
+
   // Render logo based on layout configuration
   const renderLogo = () => {
-    const hasText =
-      logoText &&
-      (typeof logoText === 'string'
-        ? logoText.length > 0
-        : logoText.length > 0 && serializeNodesToText(logoText)?.trim() !== '');
+    const hasText = logoHasText();
     const hasImage = logoImage;
 
     // Handle layout-specific rendering
@@ -70,37 +111,7 @@ const Logo = () => {
     }
 
     if (logoLayout === 'text_only' && hasText) {
-      // Handle both string and slate text
-      if (typeof logoText === 'string') {
-        return (
-          <div
-            className={`logo-text-content ${logoTextBold ? 'logo-text-bold' : ''}`}
-          >
-            {logoText}
-          </div>
-        );
-      } else {
-        const textContent = {
-          blocks: {
-            'logo-text': {
-              '@type': 'slate',
-              value: logoText,
-              plaintext: '',
-            },
-          },
-          blocks_layout: {
-            items: ['logo-text'],
-          },
-        };
-
-        return (
-          <div
-            className={`logo-text-content ${logoTextBold ? 'logo-text-bold' : ''}`}
-          >
-            <RenderBlocks content={textContent} />
-          </div>
-        );
-      }
+      return renderLogoText();
     }
 
     // Case 1: Both image and text available with layout options
@@ -110,39 +121,6 @@ const Logo = () => {
           ? logoImage
           : logoImage.download || logoImage['@id'] || logoImage;
 
-      const renderTextContent = () => {
-        if (typeof logoText === 'string') {
-          return (
-            <div
-              className={`logo-text-content ${logoTextBold ? 'logo-text-bold' : ''}`}
-            >
-              {logoText}
-            </div>
-          );
-        } else {
-          const textContent = {
-            blocks: {
-              'logo-text': {
-                '@type': 'slate',
-                value: logoText,
-                plaintext: '',
-              },
-            },
-            blocks_layout: {
-              items: ['logo-text'],
-            },
-          };
-
-          return (
-            <div
-              className={`logo-text-content ${logoTextBold ? 'logo-text-bold' : ''}`}
-            >
-              <RenderBlocks content={textContent} />
-            </div>
-          );
-        }
-      };
-
       return (
         <div
           className={`logo-combined logo-layout-${logoLayout}`}
@@ -163,7 +141,7 @@ const Logo = () => {
             className="logo-image"
             style={{ flexShrink: 0 }}
           />
-          <div style={{ flexShrink: 0 }}>{renderTextContent()}</div>
+          <div style={{ flexShrink: 0 }}>{renderLogoText()}</div>
         </div>
       );
     }
@@ -186,26 +164,7 @@ const Logo = () => {
 
     // Case 3: Only text logo
     if (hasText) {
-      const textContent = {
-        blocks: {
-          'logo-text': {
-            '@type': 'slate',
-            value: logoText,
-            plaintext: '',
-          },
-        },
-        blocks_layout: {
-          items: ['logo-text'],
-        },
-      };
-
-      return (
-        <div
-          className={`logo-text-content ${logoTextBold ? 'logo-text-bold' : ''}`}
-        >
-          <RenderBlocks content={textContent} />
-        </div>
-      );
+      return renderLogoText();
     }
 
     // Case 4: No logo - return null (don't render anything)
@@ -214,10 +173,7 @@ const Logo = () => {
 
   // Determine the CSS class based on logo content
   const getLogoLinkClass = () => {
-    const hasText =
-      logoText &&
-      logoText.length > 0 &&
-      serializeNodesToText(logoText)?.trim() !== '';
+    const hasText = logoHasText();
     const hasImage = logoImage;
 
     if (hasImage && hasText) {